@@ -0,0 +1,60 @@
+'''VmdMotion.bake against get_vmd_transform for each frame
+
+$ cd misc
+$ python bench_bake.py [n_frames] [linear_rate]
+'''
+import random
+import sys
+import time
+import numpy as np
+sys.path.append('../vmdgadgets')
+from vmdutil import vmdutil
+from vmdutil import vmdmotion
+from vmdutil import vmddef
+
+
+def make_bone_track(n_frames, linear_rate, seed=0):
+    rng = random.Random(seed)
+    linear = vmdutil.LERP_CONTROLPOINTS
+    frames = []
+    frame_no = 0
+    while frame_no < n_frames:
+        q = [rng.uniform(-1, 1) for i in range(4)]
+        n = sum([v * v for v in q]) ** 0.5
+        interpolation = [rng.randrange(128) for i in range(64)]
+        for channel in range(4):
+            if rng.random() < linear_rate:
+                for i, v in enumerate(linear):
+                    interpolation[i * 4 + 16 * channel] = v
+        frames.append(vmddef.bone(
+            b'bone', frame_no, tuple([rng.uniform(-5, 5) for i in range(3)]),
+            tuple([v / n for v in q]), tuple(interpolation)))
+        frame_no += rng.randrange(1, 16)
+    return frames
+
+
+if __name__ == '__main__':
+    n_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    linear_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    motion = vmdmotion.VmdMotion(make_bone_track(n_frames, linear_rate))
+    vmdutil.curve_cache.exact = True  # same values as bake
+    start = time.perf_counter()
+    loop = [motion.get_vmd_transform(frame_no, 'bone')
+            for frame_no in range(n_frames)]
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    rotations, positions = motion.bake('bone', 0, n_frames)
+    first_time = time.perf_counter() - start
+    bake_time = first_time
+    for i in range(4):  # with arrays of the track made
+        start = time.perf_counter()
+        motion.bake('bone', 0, n_frames)
+        bake_time = min(bake_time, time.perf_counter() - start)
+    assert np.allclose(rotations, [r for r, p in loop], 0, 1e-12)
+    assert np.allclose(positions, [p for r, p in loop], 0, 1e-12)
+    print('{} frames, {:.0%} linear curves'.format(n_frames, linear_rate))
+    print('{:<8}{:8.3f} sec'.format('loop', loop_time))
+    print('{:<8}{:8.3f} sec  x{:.0f}'.format(
+        'bake', first_time, loop_time / first_time))
+    print('{:<8}{:8.3f} sec  x{:.0f}'.format(
+        'rebake', bake_time, loop_time / bake_time))
@@ -0,0 +1,36 @@
+'''scalar, cached and batched interpolation curve evaluation
+
+$ cd misc
+$ python bench_bezier.py [n] [n_curves]
+'''
+import sys
+import time
+import numpy as np
+sys.path.append('../vmdgadgets')
+from vmdutil import vmdutil
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    n_curves = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    rng = np.random.default_rng(0)
+    curves = rng.integers(0, 128, (n_curves, 4))
+    cp = curves[rng.integers(0, n_curves, n)]
+    bx = rng.random(n)
+    start = time.perf_counter()
+    s = [vmdutil.interpolation_ratio(p, x)
+         for p, x in zip(cp.tolist(), bx.tolist())]
+    scalar = time.perf_counter() - start
+    cache = vmdutil.CurveCache()
+    start = time.perf_counter()
+    c = [cache.ratio(p, x) for p, x in zip(cp.tolist(), bx.tolist())]
+    cached = time.perf_counter() - start
+    start = time.perf_counter()
+    a = vmdutil.interpolation_ratios(cp, bx)
+    batch = time.perf_counter() - start
+    assert (a == s).all()
+    print('{} points on {} curves'.format(n, n_curves))
+    print('{:<8}{:8.2f} us'.format('scalar', scalar / n * 1e6))
+    print('{:<8}{:8.2f} us  ({} tables, max error {:.1e})'.format(
+        'cached', cached / n * 1e6, cache.misses, np.abs(a - c).max()))
+    print('{:<8}{:8.2f} us'.format('batch', batch / n * 1e6))
@@ -0,0 +1,110 @@
+'''per element decode/encode cost of pmx sections on a morph heavy model
+
+$ cd misc
+$ python bench_pmx.py [n_morphs] [n_offsets]
+'''
+import gc
+import sys
+import time
+sys.path.append('../vmdgadgets')
+from vmdutil import pmxutil
+from vmdutil import pmxdef
+
+N_VERTEXES = 70000
+N_BONES = 300
+
+
+def make_morph_model(n_morphs, n_offsets):
+    pmx = pmxutil.Pmxio()
+    pmx.model_info = pmxdef.model_info('bench', 'bench', '', '')
+    weights = (
+        (0, pmxdef.vertex_bdef1(1)),
+        (1, pmxdef.vertex_bdef2(1, 2, 0.5)),
+        (2, pmxdef.vertex_bdef4(1, 2, 3, 4, 0.25, 0.25, 0.25, 0.25)),
+        (3, pmxdef.vertex_sdef(
+            1, 2, 0.5, (0.0, 1.0, 0.0), (0.0, 1.0, 0.5), (0.0, 1.0, -0.5))))
+    vertexes = []
+    for i in range(N_VERTEXES):
+        weight_type, weight = weights[i % len(weights)]
+        vertexes.append(pmxdef.vertex(
+            (i * 0.01, 1.0, -1.0), (0.0, 1.0, 0.0), (0.5, 0.25), (),
+            weight_type, weight, 1.0))
+    pmx.set_elements('vertexes', vertexes)
+    pmx.set_elements('faces', [
+        (i, i + 1, i + 2) for i in range(0, N_VERTEXES - 2, 3)])
+    pmx.set_elements('bones', [pmxdef.bone(
+        'bone{}'.format(i), 'bone{}'.format(i), (0.0, i * 0.1, 0.0), i - 1,
+        0, 0x1e, (0.0, 0.1, 0.0), None, None, None, None, None)
+        for i in range(N_BONES)])
+    morphs = []
+    for i in range(n_morphs):
+        morph_type = (1, 3, 2, 8, 0)[i % 5]
+        if morph_type == 1:
+            offsets = [pmxdef.morph_vertex(
+                (i + j) % N_VERTEXES, (0.1, 0.2, 0.3))
+                for j in range(n_offsets)]
+        elif morph_type == 3:
+            offsets = [pmxdef.morph_uv(
+                (i + j) % N_VERTEXES, (0.1, 0.2, 0.0, 0.0))
+                for j in range(n_offsets)]
+        elif morph_type == 2:
+            offsets = [pmxdef.morph_bone(
+                j % N_BONES, (0.0, 0.1, 0.0), (0.0, 0.0, 0.0, 1.0))
+                for j in range(n_offsets)]
+        elif morph_type == 8:
+            offsets = [pmxdef.morph_material(
+                0, 1, (1.0,) * 4, (1.0,) * 3, 1.0, (1.0,) * 3, (1.0,) * 4,
+                1.0, (1.0,) * 4, (1.0,) * 4, (1.0,) * 4)
+                for j in range(n_offsets)]
+        else:
+            offsets = [pmxdef.morph_group(j % n_morphs, 0.5)
+                       for j in range(n_offsets)]
+        morphs.append(pmxdef.morph(
+            'morph{}'.format(i), 'morph{}'.format(i), 4, morph_type,
+            len(offsets), tuple(offsets)))
+    pmx.set_elements('morphs', morphs)
+    return pmx
+
+
+def best(func, repeat=3):
+    # gc is stopped, to measure decoding rather than collecting
+    result = None
+    gc.disable()
+    try:
+        for i in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            if result is None or elapsed < result:
+                result = elapsed
+    finally:
+        gc.enable()
+    return result
+
+
+def bench(pmx, element, n_records):
+    pack = pmxdef.PMX_IO_UTIL[element][0]
+    objs = pmx.get_elements(element)
+    decode = best(lambda: pmx.decode_section(element))
+    encode = best(lambda: [pack(pmx.header, obj) for obj in objs])
+    print('{:<10}{:9d}{:10.2f} us{:10.2f} us'.format(
+        element, n_records, decode / n_records * 1e6,
+        encode / n_records * 1e6))
+
+
+if __name__ == '__main__':
+    n_morphs = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    n_offsets = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    buf = bytes(make_morph_model(n_morphs, n_offsets).to_bytes())
+    pmx = pmxutil.Pmxio()
+    pmx.buf = buf
+    pmx.read_bytes()
+    print('{:<10}{:>9}{:>13}{:>13}'.format(
+        'element', 'records', 'decode', 'encode'))
+    bench(pmx, 'vertexes', N_VERTEXES)
+    bench(pmx, 'faces', N_VERTEXES // 3)
+    bench(pmx, 'bones', N_BONES)
+    bench(pmx, 'morphs', n_morphs)
+    n = n_morphs * n_offsets
+    print('{:<10}{:9d}{:10.2f} us'.format(
+        'offsets', n, best(lambda: pmx.decode_section('morphs')) / n * 1e6))
@@ -0,0 +1,46 @@
+'''scalar and array quaternion functions of vmdutil
+
+$ cd misc
+$ python bench_quaternion.py [n]
+'''
+import sys
+import time
+import numpy as np
+sys.path.append('../vmdgadgets')
+from vmdutil import vmdutil
+
+
+def unit_quaternions(rng, n):
+    q = rng.uniform(-1, 1, (n, 4))
+    return q / np.sqrt((q * q).sum(1))[:, None]
+
+
+def bench(name, scalar, array, args):
+    lists = [a.tolist() for a in args]
+    start = time.perf_counter()
+    s = [scalar(*a) for a in zip(*lists)]
+    scalar_time = time.perf_counter() - start
+    start = time.perf_counter()
+    a = array(*args)
+    array_time = time.perf_counter() - start
+    print('{:<10}{:8.2f} us{:8.3f} us  x{:<6.0f}max error {:.1e}'.format(
+        name, scalar_time / len(s) * 1e6, array_time / len(s) * 1e6,
+        scalar_time / array_time, np.abs(a - s).max()))
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = np.random.default_rng(0)
+    q1 = unit_quaternions(rng, n)
+    q2 = unit_quaternions(rng, n)
+    v = rng.uniform(-10, 10, (n, 3))
+    t = rng.random(n)
+    print('{} quaternions'.format(n))
+    bench('multiply', vmdutil.multiply_quaternion,
+          vmdutil.multiply_quaternion_array, (q1, q2))
+    bench('rotate', vmdutil.rotate_v3q, vmdutil.rotate_v3q_array, (v, q1))
+    bench('diff', vmdutil.diff_q, vmdutil.diff_q_array, (q1, q2))
+    bench('normalize', vmdutil.normalize_v, vmdutil.normalize_v_array,
+          (q1 * 2,))
+    bench('slerp', vmdutil.slerp_q, vmdutil.slerp_q_array, (q1, q2, t))
+    bench('scale', vmdutil.scale_q, vmdutil.scale_q_array, (q1, t))
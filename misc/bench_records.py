@@ -0,0 +1,35 @@
+'''memory of namedtuple and compact(__slots__) frame records
+
+$ cd misc
+$ python bench_records.py [n_frames]
+'''
+import sys
+import time
+import tracemalloc
+sys.path.append('../vmdgadgets')
+import vmdutil
+from bench_vmdio import make_bone_motion
+
+
+def measure(label, buf, n_frames, **kwargs):
+    vmd = vmdutil.Vmdio()
+    vmd.buf = buf
+    tracemalloc.start()
+    start = time.perf_counter()
+    vmd.read_bytes(**kwargs)
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print('{:<12}{:8.1f} bytes/frame{:8.3f} sec'.format(
+        label, size / n_frames, elapsed))
+    return vmd
+
+
+if __name__ == '__main__':
+    n_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    buf = bytes(make_bone_motion(n_frames).to_bytes())
+    print('{} bone frames'.format(n_frames))
+    a = measure('namedtuple', buf, n_frames)
+    b = measure('compact', buf, n_frames, compact=True)
+    assert a.get_frames('bones') == b.get_frames('bones')
+    assert a.to_bytes() == b.to_bytes()
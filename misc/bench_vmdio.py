@@ -0,0 +1,79 @@
+'''benchmarks of Vmdio
+
+$ cd misc
+$ python bench_vmdio.py [n_frames]
+'''
+import sys
+import os
+import io
+import time
+import tempfile
+sys.path.append('../vmdgadgets')
+import vmdutil
+from vmdutil import vmddef
+
+
+def make_bone_motion(n_frames):
+    names = [vmdutil.str_to_b(name) for name in (
+        '全ての親', 'センター', '上半身', '下半身', '首', '頭',
+        '右腕', '左腕', '右足ＩＫ', '左足ＩＫ')]
+    frames = [
+        vmddef.BONE_SAMPLE._replace(
+            name=names[i % len(names)], frame=i // len(names),
+            position=(i * 0.5, 1.0, -1.0),
+            rotation=(0.0, 0.0, 0.0, 1.0))
+        for i in range(n_frames)]
+    vmd = vmdutil.Vmdio()
+    vmd.set_frames('bones', frames)
+    return vmd
+
+
+def to_bytes_concat(vmd):
+    # Vmdio.to_bytes() before preallocation
+    buf = bytearray()
+    buf += vmddef.pack_header(vmd.header)
+    for element in vmddef.VMD_ELEMENTS:
+        io_util = vmddef.VMD_IO_UTIL[element]
+        frames = vmd.get_frames(element)
+        buf += vmddef.pack_count(vmddef.count(len(frames)))
+        for frame in frames:
+            buf += io_util[1](frame)
+    return buf
+
+
+def bench(label, f, *args):
+    start = time.perf_counter()
+    result = f(*args)
+    print('{:<24}{:8.3f} sec'.format(label, time.perf_counter() - start))
+    return result
+
+
+def store_fd(vmd):
+    writer = io.BytesIO()
+    vmd.store_fd(writer)
+    return writer.getvalue()
+
+
+def bench_write(vmd):
+    a = bench('concat', to_bytes_concat, vmd)
+    b = bench('to_bytes(pack_into)', vmd.to_bytes)
+    c = bench('store_fd(chunks)', store_fd, vmd)
+    assert a == b == c
+
+    # sections which are not decoded are copied as they are
+    fd, filename = tempfile.mkstemp(suffix='.vmd')
+    os.close(fd)
+    vmd.store(filename)
+    lazy = vmdutil.Vmdio()
+    lazy.load(filename, lazy=True)
+    d = bench('to_bytes(lazy)', lazy.to_bytes)
+    assert a == d
+    del lazy
+    os.remove(filename)
+
+
+if __name__ == '__main__':
+    n_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    vmd = make_bone_motion(n_frames)
+    print('{} bone frames'.format(n_frames))
+    bench_write(vmd)
@@ -27,9 +27,9 @@ if '__main__' == __name__:
     cam_f = sys.argv[2] # camera motion
     head_out = sys.argv[3] # output
     camera = vmdutil.Vmdio()
-    camera.load(cam_f)
+    camera.load(cam_f, raw=True)
     motion = vmdutil.Vmdio()
-    motion.load(head_f)
+    motion.load(head_f, raw=True)
     cut_frames = search_cut(camera.get_frames('cameras'))
     name_dict = vmdutil.make_name_dict(
         vmdutil.frames_to_dict(motion.get_frames('bones')), True)
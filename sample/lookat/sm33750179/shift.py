@@ -15,7 +15,7 @@ def in_range(frame, offset=0):
 
 if '__main__' == __name__ :
     vmdin = vmdutil.Vmdio()
-    vmdin.load(sys.argv[1])
+    vmdin.load(sys.argv[1], raw=True)
     bones = vmdin.get_frames('bones')
     for i in range(3):
         offset = (i + 1) * OFFSET
@@ -0,0 +1,129 @@
+'''small motions and models for tests, made in code
+'''
+from vmdutil import pmxdef
+from vmdutil import pmxutil
+from vmdutil import vmddef
+from vmdutil import vmdutil
+
+
+def make_pmx(n_vertexes=300, n_bones=300, n_morphs=20, n_exuvs=0,
+             weight_run=1):
+    # over 255 vertexes and bones, to use 2 byte indexes
+    pmx = pmxutil.Pmxio()
+    pmx.header = pmx.header._replace(n_exuvs=n_exuvs)
+    pmx.model_info = pmxdef.model_info('model', 'model', 'info', 'info_en')
+    weights = (
+        (0, lambda i: pmxdef.vertex_bdef1(i % n_bones)),
+        (1, lambda i: pmxdef.vertex_bdef2(1, i % n_bones, 0.25)),
+        (2, lambda i: pmxdef.vertex_bdef4(
+            1, 2, 3, i % n_bones, 0.5, 0.25, 0.125, 0.125)),
+        (3, lambda i: pmxdef.vertex_sdef(
+            1, 2, 0.5, (0.0, 1.0, 0.0), (0.0, 1.0, 0.5),
+            (0.0, 1.0, -0.5))))
+    vertexes = []
+    for i in range(n_vertexes):
+        weight_type, weight = weights[
+            (i // weight_run * 7 // 3) % len(weights)]
+        vertexes.append(pmxdef.vertex(
+            (i * 0.5, 1.0, -i * 0.25), (0.0, 1.0, 0.0), (0.5, i * 0.125),
+            tuple([(j, 0.5, i * 0.25, 1.0) for j in range(n_exuvs)]),
+            weight_type, weight(i), 1.0))
+    pmx.set_elements('vertexes', vertexes)
+    pmx.set_elements('faces', [
+        (i, (i + 1) % n_vertexes, (i + 2) % n_vertexes)
+        for i in range(n_vertexes)])
+    pmx.set_elements('textures', [
+        pmxdef.texture('tex{}.png'.format(i)) for i in range(3)])
+    pmx.set_elements('materials', [pmxdef.material(
+        'material{}'.format(i), 'material{}'.format(i),
+        (1.0, 0.5, 0.25, 1.0), (0.5, 0.5, 0.5), 5.0, (0.25, 0.25, 0.25),
+        0x1f, (0.0, 0.0, 0.0, 1.0), 1.0, i, -1, 0, 1, i, 'memo',
+        n_vertexes * 3 // 2) for i in range(2)])
+    bones = [pmxdef.bone(
+        'bone{}'.format(i), 'bone{}'.format(i), (0.0, i * 0.1, 0.0),
+        i - 1, 0, 0x1e, (0.0, 0.1, 0.0), None, None, None, None, None)
+        for i in range(n_bones)]
+    bones[3] = bones[3]._replace(
+        flag=0x1f | pmxdef.BONE_ADD_ROTATE, disp_dir=4,
+        additional_transform=pmxdef.bone_additional_transform(2, 0.5))
+    bones[5] = bones[5]._replace(
+        flag=0x1e | pmxdef.BONE_IS_IK, ik=pmxdef.bone_ik(
+            4, 40, 0.5, 2, (
+                pmxdef.bone_ik_link(
+                    3, 1, (-1.0, 0.0, 0.0), (0.0, 0.0, 0.0)),
+                pmxdef.bone_ik_link(2, 0, None, None))))
+    pmx.set_elements('bones', bones)
+    morphs = []
+    for i in range(n_morphs):
+        morph_type = (1, 3, 2, 8, 0)[i % 5]
+        if morph_type == 1:
+            offsets = [pmxdef.morph_vertex(
+                (i + j) % n_vertexes, (0.5, 0.25, j * 0.125))
+                for j in range(30)]
+        elif morph_type == 3:
+            offsets = [pmxdef.morph_uv(
+                (i + j) % n_vertexes, (0.5, j * 0.25, 0.0, 0.0))
+                for j in range(30)]
+        elif morph_type == 2:
+            offsets = [pmxdef.morph_bone(
+                j % n_bones, (0.0, 0.5, 0.0), (0.0, 0.0, 0.0, 1.0))
+                for j in range(3)]
+        elif morph_type == 8:
+            offsets = [pmxdef.morph_material(
+                j, 1, (1.0,) * 4, (1.0,) * 3, 1.0, (1.0,) * 3, (1.0,) * 4,
+                1.0, (1.0,) * 4, (1.0,) * 4, (1.0,) * 4) for j in range(2)]
+        else:
+            offsets = [pmxdef.morph_group(j, 0.5) for j in range(3)]
+        morphs.append(pmxdef.morph(
+            'morph{}'.format(i), 'morph{}'.format(i), 4, morph_type,
+            len(offsets), tuple(offsets)))
+    pmx.set_elements('morphs', morphs)
+    pmx.set_elements('disp_nodes', [
+        pmxdef.disp_node('Root', 'Root', 1, 1, (
+            pmxdef.disp_node_item(pmxdef.DISP_NODE_ITEM_BONE, 0),)),
+        pmxdef.disp_node('表情', 'Exp', 1, 2, (
+            pmxdef.disp_node_item(pmxdef.DISP_NODE_ITEM_MORPH, 0),
+            pmxdef.disp_node_item(pmxdef.DISP_NODE_ITEM_MORPH, 1)))])
+    pmx.set_elements('rigid_bodies', [pmxdef.rigid_body(
+        'body{}'.format(i), 'body{}'.format(i), i, 1, 0xfffe, 0,
+        (1.0, 1.0, 1.0), (0.0, i * 1.0, 0.0), (0.0, 0.0, 0.0), 1.0, 0.5,
+        0.5, 0.0, 0.5, i % 2) for i in range(3)])
+    pmx.set_elements('joints', [pmxdef.joint(
+        'joint', 'joint', pmxdef.JOINT_6DOF_SPRING, 0, 1,
+        (0.0, 1.0, 0.0), (0.0, 0.0, 0.0), (0.0,) * 3, (0.0,) * 3,
+        (-1.0,) * 3, (1.0,) * 3, (0.0,) * 3, (0.0,) * 3)])
+    return pmx
+
+
+def make_pmx_bytes(**args):
+    return bytes(make_pmx(**args).to_bytes())
+
+
+def make_vmd(n_bones=30, n_frames=200):
+    vmd = vmdutil.Vmdio()
+    vmd.header = vmddef.header(vmddef.HEADER1, b'model')
+    vmd.set_frames('bones', [vmddef.bone(
+        '骨{}'.format(i).encode(vmddef.ENCODING), frame_no,
+        (i * 0.5, frame_no * 0.25, 0.0), (0.0, 0.0, 0.0, 1.0),
+        tuple([(i + frame_no + j) % 128 for j in range(64)]))
+        for frame_no in range(0, n_frames, 3) for i in range(n_bones)])
+    vmd.set_frames('morphs', [vmddef.morph(
+        'morph{}'.format(i).encode(vmddef.ENCODING), frame_no, i * 0.125)
+        for frame_no in range(0, n_frames, 5) for i in range(10)])
+    vmd.set_frames('cameras', [vmddef.camera(
+        frame_no, -10.0, (0.0, 10.0, 0.0), (0.5, 0.0, 0.0),
+        vmddef.CAMERA_LERP_INTERPOLATION, 30, 0)
+        for frame_no in range(0, n_frames, 7)])
+    vmd.set_frames('lights', [vmddef.light(
+        frame_no, (0.5, 0.5, 0.5), (-0.5, -1.0, 0.5))
+        for frame_no in range(0, n_frames, 11)])
+    vmd.set_frames('selfshadows', [vmddef.selfshadow(frame_no, 1, 0.5)
+                                   for frame_no in range(0, n_frames, 13)])
+    vmd.set_frames('showiks', [vmddef.showik(
+        frame_no, 1, 2, (vmddef.ikinfo(b'ik1', 1), vmddef.ikinfo(b'ik2', 0)))
+        for frame_no in range(0, n_frames, 17)])
+    return vmd
+
+
+def make_vmd_bytes(**args):
+    return bytes(make_vmd(**args).to_bytes())
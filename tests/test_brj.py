@@ -0,0 +1,22 @@
+import brj
+import models
+
+
+def test_fill_bones():
+    pmx = models.make_pmx(n_bones=10)
+    bones = pmx.get_elements('bones')
+    bones[0] = bones[0]._replace(name_jp='センター')
+    pmx.set_elements('bones', bones)
+    bodies = pmx.get_elements('rigid_bodies')
+    bodies[0] = bodies[0]._replace(name_jp='body', bone=-1)
+    bodies[1] = bodies[1]._replace(name_jp='body', bone=-1)
+    bodies[2] = bodies[2]._replace(name_jp='bone3', bone=-1)
+    pmx.set_elements('rigid_bodies', bodies)
+    pmx.get_index_dict('bones')
+    brj.fill_bones(pmx)
+    bones = pmx.get_elements('bones')
+    assert [bone.name_jp for bone in bones[10:]] == ['body', 'body']
+    assert [bone.parent for bone in bones[10:]] == [0, 10]  # by the joint
+    assert [body.bone for body in pmx.get_elements('rigid_bodies')] == [
+        10, 11, 3]
+    assert pmx.get_index_dict('bones')['body'] == 11
@@ -0,0 +1,61 @@
+import argparse
+import io
+import math
+
+import models
+import move_root
+from vmdutil import vmddef
+from vmdutil import vmdutil
+
+ROOT = '全ての親'.encode(vmddef.ENCODING).ljust(15, b'\0')
+
+
+def load_bytes(buf):
+    vmd = vmdutil.Vmdio()
+    vmd.load_fd(io.BytesIO(buf))
+    return vmd
+
+
+def run(buf, pos, angles):
+    out = io.BytesIO()
+    move_root.move_root(argparse.Namespace(
+        infile=io.BytesIO(buf), outfile=out, pos=pos, angles=angles))
+    return load_bytes(out.getvalue())
+
+
+def test_move_root():
+    vmd = load_bytes(models.make_vmd_bytes())
+    bones = vmd.get_frames('bones')
+    bones[2] = bones[2]._replace(name=ROOT)
+    bones[40] = bones[40]._replace(name=ROOT, frame=bones[2].frame)
+    bones[70] = bones[70]._replace(name=ROOT)
+    rotation = vmdutil.euler_to_quaternion(
+        [math.radians(r) for r in (10, -20, -30)])
+    expected = [frame._replace(
+        position=tuple(vmdutil.add_v(frame.position, (1, 2, 3))),
+        rotation=tuple(vmdutil.multiply_quaternion(
+            frame.rotation, rotation)))
+        if frame.name == ROOT else frame for frame in bones]
+    result = run(bytes(vmd.to_bytes()), [1, 2, 3], [10, 20, 30])
+    vmd.set_frames('bones', expected)
+    # no key is added, and others are copied as they are
+    assert bytes(result.to_bytes()) == bytes(vmd.to_bytes())
+
+
+def test_add_root():
+    buf = models.make_vmd_bytes()
+    result = run(buf, [1, 2, 3], None)
+    bones = load_bytes(buf).get_frames('bones')
+    assert result.get_frames('bones') == bones + [vmddef.BONE_SAMPLE._replace(
+        name=ROOT, position=(1.0, 2.0, 3.0))]
+
+
+def test_bone_section_only():
+    vmd = models.make_vmd()
+    buf = bytes(vmd.to_bytes())
+    buf = buf[:vmddef.header_def.size + vmddef.count_def.size +
+              vmd.section_size('bones')]
+    result = run(buf, [1, 2, 3], None)
+    assert result.counts['bones'].count == vmd.counts['bones'].count + 1
+    for element in vmddef.VMD_ELEMENTS[1:]:
+        assert result.counts[element].count == 0
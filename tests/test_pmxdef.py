@@ -0,0 +1,23 @@
+import io
+
+import models
+from vmdutil import pmxdef
+from vmdutil import pmxutil
+
+
+def test_unpack_vertex_array():
+    for args in (
+            {}, {'weight_run': 5}, {'weight_run': 100}, {'n_exuvs': 2},
+            {'n_vertexes': 1}, {'n_vertexes': 2000, 'n_bones': 100}):
+        pmx = pmxutil.Pmxio()
+        pmx.load_fd(io.BytesIO(models.make_pmx_bytes(**args)))
+        vertexes = pmx.get_elements('vertexes')
+        records = [pmxdef.pack_vertex(pmx.header, p) for p in vertexes]
+        buf = b'\0' * 7 + b''.join(records)
+        a, size = pmxdef.unpack_vertex_array(
+            pmx.header, buf, 7, len(vertexes))
+        assert size == len(buf) - 7
+        assert pmxdef.array_to_vertexes(a) == vertexes
+        assert pmxdef.vertex_array_to_bytes(pmx.header, a) == buf[7:]
+    a, size = pmxdef.unpack_vertex_array(pmx.header, b'', 0, 0)
+    assert len(a) == 0 and size == 0
@@ -0,0 +1,257 @@
+import io
+import os
+
+import pytest
+
+import models
+from vmdutil import pmxdef
+from vmdutil import pmxutil
+from vmdutil import sidecar
+
+
+def load_bytes(buf, **args):
+    pmx = pmxutil.Pmxio()
+    pmx.load_fd(io.BytesIO(buf), **args)
+    return pmx
+
+
+LOAD_ARGS = (
+    {}, {'arrays': True}, {'sections': []}, {'sections': ['vertexes']},
+    {'sections': ['bones', 'morphs']}, {'arrays': True, 'sections': []})
+
+
+def test_round_trip():
+    for model_args in ({}, {'n_exuvs': 2, 'weight_run': 7}):
+        buf = models.make_pmx_bytes(**model_args)
+        for args in LOAD_ARGS:
+            pmx = load_bytes(buf, **args)
+            assert bytes(pmx.to_bytes()) == buf
+            assert b''.join([
+                bytes(chunk) for chunk in pmx.iter_bytes(chunk_size=64)
+            ]) == buf
+            writer = io.BytesIO()
+            pmx.store_fd(writer)
+            assert writer.getvalue() == buf
+            for element in pmxdef.PMX_ELEMENTS[:-1]:
+                pmx.get_elements(element)
+            assert bytes(pmx.to_bytes()) == buf
+
+
+def test_store(tmp_path):
+    filename = str(tmp_path / 'model.pmx')
+    stored = str(tmp_path / 'stored.pmx')
+    buf = models.make_pmx_bytes()
+    with open(filename, 'wb') as f:
+        f.write(buf)
+    for args in LOAD_ARGS:
+        pmx = pmxutil.Pmxio()
+        pmx.load(filename, cache=False, **args)
+        pmx.store(stored)
+        with open(stored, 'rb') as f:
+            assert f.read() == buf
+
+
+def test_cache(tmp_path):
+    filename = str(tmp_path / 'model.pmx')
+    buf = models.make_pmx_bytes()
+    with open(filename, 'wb') as f:
+        f.write(buf)
+    for args in ({}, {'arrays': True}, {'sections': []}):
+        cache = sidecar.SidecarCache(str(tmp_path / 'cache'))
+        cache.clear()
+        for i in range(2):
+            pmx = pmxutil.Pmxio()
+            pmx.load(filename, cache=cache, **args)
+            assert bytes(pmx.to_bytes()) == buf
+        assert (cache.misses, cache.hits) == (1, 1)
+        assert pmx.get_elements('bones') == load_bytes(buf).get_elements(
+            'bones')
+    # sidecar file next to the model
+    for i in range(2):
+        pmx = pmxutil.Pmxio()
+        pmx.load(filename, cache=True)
+        assert bytes(pmx.to_bytes()) == buf
+    assert os.path.exists(filename + sidecar.SUFFIX)
+
+
+def test_index_size_change():
+    # sections not decoded are re-encoded when their index sizes change
+    buf = models.make_pmx_bytes(n_bones=100, n_vertexes=100)
+    for args in LOAD_ARGS:
+        pmx = load_bytes(buf, **args)
+        expected = load_bytes(buf)
+        for p in (pmx, expected):
+            bones = p.get_elements('bones')
+            p.append_elements('bones', [
+                bones[-1]._replace(name_jp='added{}'.format(i), parent=i)
+                for i in range(100)])
+        result = bytes(pmx.to_bytes())
+        assert pmx.header.bone_isize != pmx.buf_header.bone_isize
+        assert result == bytes(expected.to_bytes())
+        result = load_bytes(result)
+        assert len(result.get_elements('bones')) == 200
+        assert (result.get_elements('vertexes') ==
+                load_bytes(buf).get_elements('vertexes'))
+
+
+def test_edit_in_place():
+    buf = models.make_pmx_bytes()
+    for args in ({}, {'sections': ['bones']}, {'sections': []},
+                 {'arrays': True}):
+        pmx = load_bytes(buf, **args)
+        bones = pmx.get_elements('bones')
+        bones[1] = bones[1]._replace(name_jp='changed')
+        materials = pmx.get_elements('materials')
+        materials[0] = materials[0]._replace(edge_size=2.0)
+        pmx = load_bytes(bytes(pmx.to_bytes()))
+        assert pmx.get_elements('bones')[1].name_jp == 'changed'
+        assert pmx.get_elements('materials')[0].edge_size == 2.0
+
+
+def test_lazy_load(monkeypatch):
+    # sections are not decoded by load() nor by writing them back
+    buf = models.make_pmx_bytes()
+    expected = load_bytes(buf, sections=pmxdef.PMX_ELEMENTS)
+
+    def fail(*args):
+        raise AssertionError('decoded')
+    for element in list(pmxdef.PMX_IO_UTIL):
+        monkeypatch.setitem(pmxdef.PMX_IO_UTIL, element, (fail, fail))
+    pmx = load_bytes(buf)
+    assert bytes(pmx.to_bytes()) == buf
+    monkeypatch.undo()
+    for element in pmxdef.PMX_ELEMENTS[:-1]:
+        assert pmx.get_elements(element) == expected.get_elements(element)
+
+
+def test_edit_array_in_place():
+    buf = models.make_pmx_bytes()
+    for args in ({'arrays': True}, {'sections': []}):
+        pmx = load_bytes(buf, **args)
+        pmx.get_array('vertexes')['edge_mag'][1] = 0.5
+        pmx = load_bytes(bytes(pmx.to_bytes()))
+        assert pmx.get_elements('vertexes')[1].edge_mag == 0.5
+
+
+def test_store_error(tmp_path):
+    filename = str(tmp_path / 'model.pmx')
+    buf = models.make_pmx_bytes()
+    with open(filename, 'wb') as f:
+        f.write(buf)
+    pmx = load_bytes(buf)
+    bones = pmx.get_elements('bones')
+    bones[-1] = bones[-1]._replace(position=None)  # can not be packed
+    with pytest.raises(TypeError):
+        pmx.store(filename)
+    with open(filename, 'rb') as f:
+        assert f.read() == buf
+    assert os.listdir(str(tmp_path)) == ['model.pmx']
+
+
+def bone_names(pmx):  # module level, for map_models
+    return [bone.name_jp for bone in pmx.get_elements('bones')]
+
+
+def decoded_sections(pmx):
+    return [element for element in pmxdef.PMX_ELEMENTS[:-1]
+            if pmx.elements[element] is not None]
+
+
+def test_map_models(tmp_path):
+    filenames = []
+    for n_bones in (10, 300, 20, 6):
+        filename = str(tmp_path / 'model{}.pmx'.format(n_bones))
+        models.make_pmx(n_bones=n_bones).store(filename)
+        filenames.append(filename)
+    expected = []
+    for filename in filenames:
+        pmx = pmxutil.Pmxio()
+        pmx.load(filename)
+        expected.append(bone_names(pmx))
+    assert [len(names) for names in expected] == [10, 300, 20, 6]
+    for workers in (1, 2, None):
+        assert pmxutil.map_models(
+            bone_names, filenames, workers=workers) == expected
+    assert pmxutil.map_models(
+        decoded_sections, filenames[:2], workers=2,
+        sections=['bones']) == [['bones'], ['bones']]
+    with pytest.raises(FileNotFoundError):
+        pmxutil.map_models(
+            bone_names, filenames + [str(tmp_path / 'none.pmx')], workers=2)
+
+def test_widen_morph_offsets():
+    # offsets of vertex/UV morphs are arrays of 2 byte indexes here,
+    # and are packed as 4 byte ones when vertexes are over 65535
+    np = pytest.importorskip('numpy')
+    buf = models.make_pmx_bytes()
+    pmx = load_bytes(buf, sections=['morphs'])
+    expected = models.make_pmx()
+    morphs = pmx.get_elements('morphs')
+    offsets = morphs[0].offsets
+    assert isinstance(offsets, pmxdef.morph_offset_array)
+    assert offsets.indexes.dtype.itemsize == 2
+    with pytest.raises(ValueError):
+        offsets.indexes[0] = 1
+    with pytest.raises(AttributeError):
+        offsets.values = offsets.values * 2
+    assert offsets == expected.get_elements('morphs')[0].offsets
+    vertexes = pmx.get_array('vertexes')
+    vertexes = np.concatenate([vertexes] * (65536 // len(vertexes) + 1))
+    for p in (pmx, expected):
+        p.set_array('vertexes', vertexes)
+    result = bytes(pmx.to_bytes())
+    assert pmx.header.vertex_isize == 4
+    assert result == bytes(expected.to_bytes())
+    result = load_bytes(result, sections=['morphs'])
+    assert result.get_elements('morphs') == morphs
+
+
+def test_impulse_morphs():
+    # rigid body indexes of 2 bytes, material indexes of 1 byte
+    pmx = models.make_pmx()
+    bodies = pmx.get_elements('rigid_bodies')
+    pmx.append_elements('rigid_bodies', [
+        bodies[0]._replace(name_jp='body{}'.format(i))
+        for i in range(len(bodies), 200)])
+    pmx.append_elements('morphs', [pmxdef.morph(
+        'impulse', 'impulse', 4, 10, 2, (
+            pmxdef.morph_impulse(1, 0, (0.5, 0.0, 0.0), (0.0, 0.0, 0.0)),
+            pmxdef.morph_impulse(150, 1, (0.0, 1.0, 0.0),
+                                 (0.0, 0.0, 0.5))))])
+    buf = bytes(pmx.to_bytes())
+    assert pmx.header.rigid_body_isize == 2
+    assert pmx.header.material_isize == 1
+    for args in LOAD_ARGS:
+        result = load_bytes(buf, **args)
+        assert bytes(result.to_bytes()) == buf
+        assert result.get_elements('morphs') == pmx.get_elements('morphs')
+        assert (result.get_elements('rigid_bodies') ==
+                pmx.get_elements('rigid_bodies'))
+
+
+def test_widen_faces():
+    # face indexes are written in the vertex index size of update_header()
+    np = pytest.importorskip('numpy')
+    buf = models.make_pmx_bytes(n_vertexes=200, n_bones=10)
+    faces = load_bytes(buf, arrays=True).get_array('faces')
+    assert faces.shape == (200, 3)
+    assert faces.dtype == np.uint8
+    for args in ({'arrays': True}, {}, {'sections': ['faces']}):
+        # over 65535 vertexes once, they take a while to write
+        for copies, isize in ((1, 1), (2, 2), (350, 4))[
+                :3 if args.get('arrays') else 2]:
+            pmx = load_bytes(buf, **args)
+            vertexes = pmx.get_array('vertexes')
+            pmx.set_array('vertexes', np.concatenate([vertexes] * copies))
+            n = len(vertexes) * copies
+            expected = faces.tolist() + [[0, n // 2, n - 1]]
+            pmx.set_array('faces', np.concatenate([
+                pmx.get_array('faces'), [[0, n // 2, n - 1]]]))
+            result = bytes(pmx.to_bytes())
+            assert pmx.header.vertex_isize == isize
+            result = load_bytes(result, arrays=True)
+            assert result.get_array('faces').dtype == np.dtype(
+                pmxdef.FACE_DTYPES[isize])
+            assert result.get_array('faces').tolist() == expected
+            assert result.get_elements('faces') == [
+                tuple(face) for face in expected]
@@ -0,0 +1,38 @@
+import random
+
+import pytest
+
+from vmdutil import vmdbezier
+
+
+def random_curves(n):
+    rng = random.Random(0)
+    curves = [
+        [0.0, x1 / 127.0, x2 / 127.0, 1.0]
+        for x1 in (0, 1, 64, 126, 127) for x2 in (0, 1, 64, 126, 127)]
+    curves += [
+        [0.0, rng.randrange(128) / 127.0, rng.randrange(128) / 127.0, 1.0]
+        for i in range(n)]
+    return curves
+
+
+def test_x2t():
+    for cp in random_curves(200):
+        for x in [i / 20 for i in range(21)]:
+            t = vmdbezier.bezier3f_x2t(cp, x)
+            assert 0.0 <= t <= 1.0
+            assert abs(vmdbezier.bezier3f(cp, t) - x) < vmdbezier.EPS
+
+
+def test_x2t_array():
+    np = pytest.importorskip('numpy')
+    curves = random_curves(200)
+    xs = [i / 20 for i in range(21)]
+    cp = np.array(curves)[:, None]
+    t = vmdbezier.bezier3f_x2t_array(cp, np.array(xs))
+    assert t.shape == (len(curves), len(xs))
+    assert t.tolist() == [
+        [vmdbezier.bezier3f_x2t(c, x) for x in xs] for c in curves]
+    assert vmdbezier.bezier3f_array(cp, t).tolist() == [
+        [vmdbezier.bezier3f(c, ti) for ti in row]
+        for c, row in zip(curves, t.tolist())]
@@ -0,0 +1,94 @@
+from vmdutil import vmddef
+from vmdutil import vmdutil
+from vmdutil import vmdmotion
+
+
+def make_bone(frame_no, position, curve):
+    cp = [[curve[0]] * 4, [curve[1]] * 4, [curve[2]] * 4, [curve[3]] * 4]
+    return vmddef.bone(
+        'bone'.encode(vmddef.ENCODING), frame_no, position,
+        tuple(vmdutil.euler_to_quaternion(
+            [frame_no * 0.01, 0.2, frame_no * -0.03])),
+        vmddef.bone_controlpoints_to_vmdformat(cp))
+
+
+# MMD can save two keys on one frame, and the last one is used
+DUPLICATED = [
+    make_bone(0, (0.0, 0.0, 0.0), (20, 20, 107, 107)),
+    make_bone(10, (1.0, 2.0, 3.0), (100, 0, 27, 127)),
+    make_bone(10, (5.0, -4.0, 2.0), (0, 127, 127, 0)),
+    make_bone(30, (-1.0, 0.5, 8.0), (64, 10, 30, 90)),
+    make_bone(30, (0.0, 0.0, 0.0), (10, 90, 100, 30)),
+    make_bone(40, (2.0, 2.0, 2.0), (127, 127, 0, 0)),
+]
+
+
+def expected_transform(frames, frame_no):
+    # interpolation between the last keys of each frame
+    last = {frame.frame: frame for frame in frames}
+    keys = sorted(last)
+    if frame_no in last or frame_no > keys[-1]:
+        frame = last[min(frame_no, keys[-1])]
+        return frame.rotation, frame.position
+    begin = last[max([k for k in keys if k < frame_no])]
+    end = last[min([k for k in keys if k > frame_no])]
+    return (
+        vmdutil.interpolate_rotation(frame_no, begin, end, 'bones'),
+        vmdutil.interpolate_position(frame_no, begin, end, 'bones'))
+
+
+def test_duplicated_keys():
+    motion = vmdmotion.VmdMotion(DUPLICATED)
+    for frame_no in range(45):
+        rotation, position = motion.get_vmd_transform(frame_no, 'bone')
+        e_rotation, e_position = expected_transform(DUPLICATED, frame_no)
+        assert list(rotation) == list(e_rotation)
+        assert list(position) == list(e_position)
+
+
+def test_lazy_curves():
+    other = [frame._replace(name=b'other') for frame in DUPLICATED]
+    motion = vmdmotion.VmdMotion(DUPLICATED + other)
+    assert motion.track_curves == {}
+    motion.get_vmd_transform(5, 'bone')
+    assert list(motion.track_curves) == ['bone']
+    curves = motion.get_track_curves('bone')
+    assert len(curves) == 16 * len(DUPLICATED)
+    assert curves[16:32] == curves[32:48] == bytes([0, 127, 127, 0] * 4)
+
+
+def check_bake(frames, name, start, stop, step=1):
+    motion = vmdmotion.VmdMotion(frames)
+    exact = vmdutil.curve_cache.exact
+    vmdutil.curve_cache.exact = True  # bake solves curves exactly
+    try:
+        loop = [motion.get_vmd_transform(frame_no, name)
+                for frame_no in range(start, stop, step)]
+    finally:
+        vmdutil.curve_cache.exact = exact
+    baked = motion.bake(name, start, stop, step)
+    for i, values in enumerate(baked):
+        assert vmddef.np.allclose(
+            values, [transform[i] for transform in loop], 0, 1e-12)
+
+
+def test_bake():
+    frames = [make_bone(
+        frame_no, (frame_no * 0.1, 1.0, -frame_no * 0.2),
+        (frame_no % 128, 127 - frame_no % 128, 30, 100))
+        for frame_no in range(0, 200, 7)]
+    check_bake(frames, 'bone', -5, 210)
+    check_bake(frames, 'bone', 3, 150, 4)
+
+
+def test_bake_duplicated_keys():
+    check_bake(DUPLICATED, 'bone', -2, 45)
+
+
+def test_bake_camera():
+    interpolation = tuple([(i * 37) % 128 for i in range(24)])
+    frames = [vmddef.camera(
+        frame_no, -10.0 - i, (0.0, 10.0, i * 0.5), (i * 0.1, 0.3, 0.0),
+        interpolation[i:] + interpolation[:i], 30 + i, 0)
+        for i, frame_no in enumerate((0, 15, 15, 40, 41, 90))]
+    check_bake(frames, vmdmotion.NO_NAME, 0, 100)
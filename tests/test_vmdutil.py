@@ -0,0 +1,302 @@
+import io
+import math
+import random
+import struct
+
+import pytest
+
+import models
+from vmdutil import vmdbezier
+from vmdutil import vmddef
+from vmdutil import vmdutil
+
+
+def load_bytes(buf, **args):
+    vmd = vmdutil.Vmdio()
+    vmd.load_fd(io.BytesIO(buf), **args)
+    return vmd
+
+
+LOAD_ARGS = (
+    {}, {'arrays': True}, {'lazy': True}, {'elements': ['cameras']},
+    {'elements': []}, {'raw': True}, {'compact': True},
+    {'stream': True}, {'stream': True, 'raw': True},
+    {'stream': True, 'compact': True})
+
+
+def test_round_trip():
+    buf = models.make_vmd_bytes()
+    for args in LOAD_ARGS:
+        vmd = load_bytes(buf, **args)
+        assert bytes(vmd.to_bytes()) == buf
+        assert b''.join([
+            bytes(chunk) for chunk in vmd.iter_bytes(chunk_size=100)]) == buf
+        writer = io.BytesIO()
+        vmd.store_fd(writer)
+        assert writer.getvalue() == buf
+        for element in vmddef.VMD_ELEMENTS:
+            vmd.get_frames(element)
+        assert bytes(vmd.to_bytes()) == buf
+
+
+def test_load_file(tmp_path):
+    filename = str(tmp_path / 'motion.vmd')
+    stored = str(tmp_path / 'stored.vmd')
+    buf = models.make_vmd_bytes()
+    with open(filename, 'wb') as f:
+        f.write(buf)
+    for args in LOAD_ARGS:
+        if 'stream' in args:
+            continue
+        vmd = vmdutil.Vmdio()
+        vmd.load(filename, **args)
+        vmd.store(stored)
+        with open(stored, 'rb') as f:
+            assert f.read() == buf
+
+
+def test_stream_sections():
+    buf = models.make_vmd_bytes()
+    for args in ({}, {'raw': True}, {'compact': True}):
+        sections = vmdutil.iter_sections(
+            io.BytesIO(buf), chunk_size=100, **args)
+        result = vmddef.pack_header(next(sections))
+        for element, count, frames in sections:
+            for chunk in vmdutil.iter_section_bytes(
+                    element, count, frames, chunk_size=100):
+                result += bytes(chunk)
+        assert result == buf
+
+
+def test_name_table(monkeypatch):
+    buf = models.make_vmd_bytes()
+    b_to_str = vmdutil.b_to_str
+    decoded = []
+
+    def decode(name):
+        decoded.append(name)
+        return b_to_str(name)
+    monkeypatch.setattr(vmdutil, 'b_to_str', decode)
+    for args in LOAD_ARGS:
+        del decoded[:]
+        vmd = load_bytes(buf, **args)
+        frames = vmd.get_frames('bones') + vmd.get_frames('morphs')
+        table = vmd.name_table
+        names = list(dict.fromkeys([frame.name for frame in frames]))
+        assert table.names == names and len(table) == 30 + 10
+        assert decoded == names  # once for each name
+        ids = table.name_ids(frames)
+        assert [table.get_name(i) for i in ids] == [
+            frame.name for frame in frames]
+        assert [table.get_str(i) for i in ids] == [
+            b_to_str(frame.name) for frame in frames]
+        name_dict = vmdutil.make_name_dict(
+            vmdutil.frames_to_dict(frames), decode=True, name_table=table)
+        assert sorted(name_dict) == sorted(set(table.strs))
+        assert len(decoded) == len(names)
+    name = '新しい骨'.encode(vmddef.ENCODING)
+    assert table.to_str(name) == '新しい骨'
+    assert table.get_name(len(names)) == name
+    assert table.to_str(name + b'\0\xfd') == '新しい骨'
+    assert len(table) == len(names) + 2
+
+def test_motion_table():
+    np = pytest.importorskip('numpy')
+    buf = models.make_vmd_bytes()
+    expected = load_bytes(buf)
+    vmd = load_bytes(buf, arrays=True)
+    for element in vmddef.VMD_DTYPES:
+        frames = expected.get_frames(element)
+        table = vmd.get_table(element)
+        assert len(table) == len(frames)
+        assert table.to_frames() == frames
+        offset = vmd.sections[element]
+        section = buf[offset:offset + vmd.section_size(element)]
+        assert table.to_bytes() == section
+        assert np.shares_memory(
+            table.to_array(), np.frombuffer(vmd.buf, np.uint8))
+        assert not table['frame'].flags.writeable
+        table = vmdutil.MotionTable.from_frames(element, frames)
+        assert table.to_bytes() == section
+        assert table.to_frames() == frames
+    bones = vmd.get_table('bones')
+    frames = expected.get_frames('bones')
+    assert bones['position'].shape == (len(bones), 3)
+    assert bones['rotation'].shape == (len(bones), 4)
+    assert bones['interpolation'].shape == (len(bones), 64)
+    assert bones['interpolation'].dtype == np.uint8
+    names = bones.name_table.names
+    assert [names[i] for i in bones.name_ids] == [f.name for f in frames]
+    assert bones.sort().to_frames() == sorted(
+        frames, key=lambda f: (names.index(f.name), f.frame))
+    table = bones.copy()
+    table['position'][:, 1] += 1.0
+    table.set_name_ids(bones.name_ids[::-1])
+    vmd.set_table('bones', table)
+    result = load_bytes(bytes(vmd.to_bytes())).get_frames('bones')
+    assert result == [
+        f._replace(name=g.name, position=(
+            f.position[0], f.position[1] + 1.0, f.position[2]))
+        for f, g in zip(frames, frames[::-1])]
+
+def test_compact_records():
+    buf = models.make_vmd_bytes()
+    vmd = load_bytes(buf)
+    compact = load_bytes(buf, compact=True)
+    for element in ('bones', 'cameras'):
+        frames = vmd.get_frames(element)
+        records = compact.get_frames(element)
+        for frame, record in zip(frames, records):
+            assert record == frame and frame == record
+            assert hash(record) == hash(frame)
+            assert record == record._replace()
+            assert hash(record) == hash(record._replace())
+        assert set(frames) == set(records)
+        record = records[0]._replace(frame=records[0].frame + 1)
+        assert record != frames[0] and record not in set(frames)
+        assert record._replace(frame=frames[0].frame) in set(frames)
+
+def test_raw_replace():
+    buf = models.make_vmd_bytes()
+    vmd = load_bytes(buf, raw=True)
+    bones = vmd.get_frames('bones')
+    bones[0] = bones[0]._replace(name=b'short', frame=1000)
+    bones[1] = bones[1]._replace(name='十五バイトの名前'.encode(
+        vmddef.ENCODING)[:15])
+    morphs = vmd.get_frames('morphs')
+    morphs[0] = morphs[0]._replace(name=b'm', frame=7)
+    cameras = vmd.get_frames('cameras')
+    cameras[0] = cameras[0]._replace(frame=3)
+    decoded = [vmddef.decode_raw('bones', frame) for frame in bones[:2]]
+    result = load_bytes(bytes(vmd.to_bytes()))
+    expected = load_bytes(buf)
+    e_bones = expected.get_frames('bones')
+    e_bones[0] = e_bones[0]._replace(name=b'short', frame=1000)
+    e_bones[1] = e_bones[1]._replace(name=bones[1].name)
+    e_morphs = expected.get_frames('morphs')
+    e_morphs[0] = e_morphs[0]._replace(name=b'm', frame=7)
+    e_cameras = expected.get_frames('cameras')
+    e_cameras[0] = e_cameras[0]._replace(frame=3)
+    assert bytes(result.to_bytes()) == bytes(expected.to_bytes())
+    assert [frame.name.rstrip(b'\0') for frame in decoded] == [
+        b'short', bones[1].name]
+    assert decoded[0].frame == 1000
+
+
+def test_skip_sections(monkeypatch):
+    buf = models.make_vmd_bytes()
+    vmd = load_bytes(buf)
+
+    def fail(*args):
+        raise AssertionError('decoded')
+    for element in ('bones', 'morphs'):
+        monkeypatch.setitem(vmddef.VMD_FIXED, element, (
+            vmddef.VMD_FIXED[element][0], fail))
+    assert list(vmdutil.iter_frames(
+        io.BytesIO(buf), 'cameras', chunk_size=100)) == vmd.get_frames(
+            'cameras')
+    # frames left in a section
+    sections = vmdutil.iter_sections(
+        io.BytesIO(buf), raw=True, chunk_size=100)
+    next(sections)
+    element, count, frames = next(sections)
+    next(frames)
+    element, count, frames = next(sections)
+    assert element == 'morphs'
+    assert [vmddef.decode_raw(element, frame) for frame in frames] == (
+        vmd.get_frames('morphs'))
+    with pytest.raises(struct.error):
+        list(vmdutil.iter_frames(io.BytesIO(buf[:1000]), 'cameras'))
+
+
+def curve_ratio(cp, x):
+    # y at x of the curve, t is bisected to the precision of floats
+    xcp = [0.0, cp[0] / 127.0, cp[2] / 127.0, 1.0]
+    lo, hi = 0.0, 1.0
+    for i in range(60):
+        t = (lo + hi) / 2
+        if vmdbezier.bezier3f(xcp, t) < x:
+            lo = t
+        else:
+            hi = t
+    return vmdbezier.bezier3f([0.0, cp[1] / 127.0, cp[3] / 127.0, 1.0], t)
+
+
+def test_curve_cache():
+    cache = vmdutil.CurveCache(max_size=2)
+    curves = [(20, 100, 90, 30), (127, 0, 0, 127), (64, 0, 64, 127)]
+    xs = [i / 50 for i in range(51)]
+    for cp in curves:
+        for x in xs:
+            y = cache.ratio(cp, x)
+            assert abs(y - curve_ratio(cp, x)) < 2e-5
+            if cp != (127, 0, 0, 127):  # steep at x = 0.5
+                assert abs(y - vmdutil.interpolation_ratio(cp, x)) < 2e-5
+    assert (cache.misses, cache.hits) == (3, 3 * 50)
+    assert list(cache.tables) == curves[1:]
+    assert cache.ratio((10, 10, 90, 90), 0.3) == 0.3
+    assert cache.ratio(None, 0.3) == 0.3
+    assert cache.misses == 3
+    exact = vmdutil.CurveCache(exact=True)
+    assert exact.ratio(curves[0], 0.3) == vmdutil.interpolation_ratio(
+        curves[0], 0.3)
+    assert not exact.tables
+
+
+def test_curve_table_without_numpy(monkeypatch):
+    cp = (20, 100, 90, 30)
+    table = vmdutil.CurveCache().get_table(cp)
+    monkeypatch.setattr(vmdutil.vmdbezier, 'np', None)
+    assert vmdutil.CurveCache().get_table(cp) == table
+
+
+def random_quaternions(rng, n):
+    return [vmdutil.normalize_v([rng.uniform(-1, 1) for i in range(4)])
+            for j in range(n)]
+
+
+def test_quaternion_arrays():
+    np = pytest.importorskip('numpy')
+    rng = random.Random(0)
+    q1 = random_quaternions(rng, 50)
+    q2 = random_quaternions(rng, 50)
+    # dot < 0, dot >= 0.995 (lerp), the same, and 0.995 itself
+    q2[:4] = [
+        [-i for i in q1[0]], vmdutil.normalize_v([
+            i + 0.01 for i in q1[1]]), q1[2], [0.0, 0.0, 0.0, 1.0]]
+    q1[3] = [math.sqrt(1 - 0.995 ** 2), 0.0, 0.0, 0.995]
+    v = [[rng.uniform(-10, 10) for i in range(3)] for j in range(50)]
+    t = [rng.random() for i in range(50)]
+    t[:3] = [0.0, 1.0, 0.5]
+    a1, a2, av, at = [np.array(x) for x in (q1, q2, v, t)]
+    exact = [  # the same operations in the same order
+        (vmdutil.multiply_quaternion, vmdutil.multiply_quaternion_array,
+         (q1, q2)),
+        (vmdutil.diff_q, vmdutil.diff_q_array, (q1, q2)),
+        (vmdutil.inverse_q, vmdutil.inverse_q_array, (q1,)),
+        (vmdutil.conjugate_q, vmdutil.conjugate_q_array, (q1,)),
+        (vmdutil.rotate_v3q, vmdutil.rotate_v3q_array, (v, q1)),
+        (vmdutil.normalize_v, vmdutil.normalize_v_array,
+         ([[2 * i for i in q] for q in q1] + [[0.0] * 4],)),
+    ]
+    for scalar, array, args in exact:
+        expected = [scalar(*x) for x in zip(*args)]
+        assert array(*[np.array(x) for x in args]).tolist() == expected
+    # math.acos and np.arccos may differ by 1 ulp
+    for scalar, array, args, arrays in (
+            (vmdutil.slerp_q, vmdutil.slerp_q_array, (q1, q2, t),
+             (a1, a2, at)),
+            (vmdutil.scale_q, vmdutil.scale_q_array, (q1, t), (a1, at))):
+        expected = np.array([scalar(*x) for x in zip(*args)])
+        assert np.abs(array(*arrays) - expected).max() < 1e-15
+    slerp = vmdutil.slerp_q_array(a1, a2, at)
+    assert slerp[0].tolist() == q1[0]  # t = 0 on the short path
+    assert slerp[1].tolist() == vmdutil.lerp_v(q1[1], q2[1], 1.0)
+    assert slerp[2].tolist() == q1[2]
+    # broadcast over leading axes and a scalar t
+    q = vmdutil.slerp_q_array(a1.reshape(5, 10, 4), a2[:10], 0.25)
+    assert q.shape == (5, 10, 4)
+    assert np.abs(q[1] - vmdutil.slerp_q_array(
+        a1[10:20], a2[:10], 0.25)).max() == 0
+    r = vmdutil.multiply_quaternion_array(a1.reshape(5, 10, 4), a2[0])
+    assert r[2, 3].tolist() == vmdutil.multiply_quaternion(q1[23], q2[0])
@@ -2,6 +2,7 @@ import sys
 import math
 import argparse
 from collections import defaultdict
+import numpy as np
 
 import vmdutil
 from vmdutil import pmxutil
@@ -381,7 +382,9 @@ def offset_morphs(morphs, m_offset):
 def fill_bones(pmx):
     bones = pmx.get_elements('bones')
     joints = pmx.get_elements('joints')
-    bone_names = {bone.name_jp: index for index, bone in enumerate(bones)}
+    # a copy: bones appended below are not looked up by name,
+    # each body without a bone gets a new one
+    bone_names = dict(pmx.get_index_dict('bones'))
     rigid_bodies = pmx.get_elements('rigid_bodies')
     bone_index = len(bones)
     b_dict = defaultdict(list)
@@ -414,11 +417,11 @@ def fill_bones(pmx):
                         parents.append(a_body.bone)
                 parent = min(parents) if len(parents) > 0 else bone_names[
                     'センター']
-            bones.append(pmxdef.bone(
+            pmx.append_elements('bones', [pmxdef.bone(
                 name_jp=body.name_jp, name_en=body.name_en,
                 position=body.position, parent=parent, transform_hierarchy=0,
                 flag=6, disp_dir=(0.0, 0.0, 0.0), additional_transform=None,
-                fixed_axis=None, local_axises=None, ex_parent=None, ik=None))
+                fixed_axis=None, local_axises=None, ex_parent=None, ik=None)])
             target_index = bone_index
             bone_index += 1
         else:
@@ -431,7 +434,6 @@ def fill_bones(pmx):
         if -1 == body.bone:
             set_bone(index)
 
-    pmx.set_elements('bones', bones)
     pmx.set_elements('rigid_bodies', rigid_bodies)
     return pmx
 
@@ -468,7 +470,7 @@ def make_brj_pmx(pmx):
             morph_added[1] += 1
             new_materials.extend(pmx.get_elements('materials'))
             m_index += pmx.counts['materials'].count
-            new_faces.extend(pmx.get_elements('faces'))
+            new_faces.append(pmx.get_array('faces'))
         else:
             if 'rigid_bodies' == material_group:
                 a_vertexes, a_faces, a_materials, a_morphs = make_rigid_bodies(
@@ -482,13 +484,13 @@ def make_brj_pmx(pmx):
             v_index += len(a_vertexes)
             m_index += len(a_materials)
             new_vertexes.extend(a_vertexes)
-            new_faces.extend(a_faces)
+            new_faces.append(pmxdef.pack_face_array(pmx.header, a_faces))
             new_materials.extend(a_materials)
             new_morphs.extend(a_morphs)
             morph_added[1] += len(a_morphs)
 
     pmx.set_elements('vertexes', new_vertexes)
-    pmx.set_elements('faces', new_faces)
+    pmx.set_array('faces', np.concatenate(new_faces))
     pmx.set_elements('materials', new_materials)
     pmx.set_elements('morphs', original_morphs + new_morphs)
 
@@ -522,6 +524,6 @@ if __name__ == '__main__':
     parser = make_argumentparser()
     args = parser.parse_args()
     pmx = pmxutil.Pmxio()
-    pmx.load_fd(args.infile)
+    pmx.load_fd(args.infile, arrays=True)
     pmx = make_brj_pmx(pmx)
     pmx.store_fd(args.outfile)
@@ -146,7 +146,7 @@ def camlight_fd(infile, outfile, against=None, rx=0.0, ry=0.0,
                 rgb=RGB, y_only=False, add_frames=None,
                 auto_add_frames=False):
     vmdin = vmdutil.Vmdio()
-    vmdin.load_fd(infile)
+    vmdin.load_fd(infile, elements=['cameras'])
     vmdout = camlight(
         vmdin, against, rx, ry, rgb, y_only, add_frames, auto_add_frames)
     vmdout.store_fd(outfile)
@@ -156,7 +156,7 @@ def camlight_fname(infile, outfile, against=None, rx=0.0, ry=0.0,
                    rgb=RGB, y_only=False, add_frames=None,
                    auto_add_frames=False):
     vmdin = vmdutil.Vmdio()
-    vmdin.load(infile)
+    vmdin.load(infile, elements=['cameras'])
     vmdout = camlight(
         vmdin, against, rx, ry, rgb, y_only, add_frames, auto_add_frames)
     vmdout.store(outfile)
@@ -16,9 +16,9 @@ if '__main__' == __name__:
 
     if args.pmx is not None:
         pmx = pmxutil.Pmxio()
-        pmx.load(args.pmx)
+        pmx.load(args.pmx, sections=['bones', 'morphs'])
     vmd = vmdutil.Vmdio()
-    vmd.load(args.vmd)
+    vmd.load(args.vmd, lazy=True)
     bone_motions = vmd.get_frames('bones')
     morph_motions = vmd.get_frames('morphs')
 
@@ -27,7 +27,7 @@ if '__main__' == __name__:
     print('========')
     for motion_type in ['bones', 'morphs']:
         if args.pmx is not None:
-            pmx_dict = pmxutil.make_index_dict(pmx.get_elements(motion_type))
+            pmx_dict = pmx.get_index_dict(motion_type)
         else:
             pmx_dict = None
         vmd_dict = vmdutil.make_name_dict(
@@ -86,6 +86,7 @@ if __name__ == '__main__':
     parser = make_argumentparser()
     args = parser.parse_args()
     pmx = pmxutil.Pmxio()
-    pmx.load_fd(args.infile)
+    pmx.load_fd(
+        args.infile, sections=['joints', 'rigid_bodies', 'bones'])
     nodes, edges = make_graph(pmx)
     print_dot(nodes, edges, args.outfile)
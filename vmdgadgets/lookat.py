@@ -208,15 +208,15 @@ class LookAt():
 
     def load(self):
         self.watcher_pmx = pmxutil.Pmxio()
-        self.watcher_pmx.load(self.watcher_pmx_name)
+        self.watcher_pmx.load(self.watcher_pmx_name, sections=['bones'])
         self.watcher_vmd = vmdutil.Vmdio()
-        self.watcher_vmd.load(self.watcher_vmd_name)
+        self.watcher_vmd.load(self.watcher_vmd_name, lazy=True)
         self.bone_defs[self.WATCHER] = self.watcher_pmx.get_elements('bones')
         self.watcher_motions = self.watcher_vmd.get_frames('bones')
 
         if self.target_vmd_name:
             self.target_vmd = vmdutil.Vmdio()
-            self.target_vmd.load(self.target_vmd_name)
+            self.target_vmd.load(self.target_vmd_name, lazy=True)
             if vmdutil.is_camera_header(self.target_vmd.header):
                 self.target_mode = 'CAMERA'
                 self.target_motions = self.target_vmd.get_frames('cameras')
@@ -225,7 +225,8 @@ class LookAt():
                     raise Exception('pmx not setted')
                 else:
                     self.target_pmx = pmxutil.Pmxio()
-                    self.target_pmx.load(self.target_pmx_name)
+                    self.target_pmx.load(
+                        self.target_pmx_name, sections=['bones'])
                     self.target_mode = 'MODEL'
                     self.target_motions = self.target_vmd.get_frames('bones')
                     self.bone_defs[self.TARGET] = self.target_pmx.get_elements(
@@ -233,9 +234,10 @@ class LookAt():
 
         if self.watcher_extlink is not None:
             self.watcher_extlink_pmx = pmxutil.Pmxio()
-            self.watcher_extlink_pmx.load(self.watcher_extlink[1])
+            self.watcher_extlink_pmx.load(
+                self.watcher_extlink[1], sections=['bones'])
             self.watcher_extlink_vmd = vmdutil.Vmdio()
-            self.watcher_extlink_vmd.load(self.watcher_extlink[2])
+            self.watcher_extlink_vmd.load(self.watcher_extlink[2], lazy=True)
             self.bone_defs[self.WATCHER_EX] = (
                 self.watcher_extlink_pmx.get_elements('bones'))
 
@@ -278,13 +280,13 @@ class LookAt():
     def setup_watcher_extlink(self, queue):
         bone_defs = self.bone_defs[self.WATCHER_EX]
         ext_bone = self.watcher_extlink[0]
-        self.bone_dict[self.WATCHER_EX] = bone_dict = pmxutil.make_index_dict(
-            bone_defs)
+        self.bone_dict[self.WATCHER_EX] = bone_dict = (
+            self.watcher_extlink_pmx.get_index_dict('bones'))
         if not self.check_bones([ext_bone], bone_dict):
             raise Exception('external link bone is not in pmx')
         self.watcher_extlink_transform = extt = vmdmotion.BoneTransformation(
             bone_defs, self.watcher_extlink_vmd.get_frames('bones'),
-            [ext_bone], True)
+            [ext_bone], True, self.watcher_extlink_vmd.name_table, bone_dict)
         for bone_index in extt.transform_bone_indexes:
             bone_name = bone_defs[bone_index].name_jp
             for motion in extt.motion_name_dict[bone_name]:
@@ -294,8 +296,8 @@ class LookAt():
 
     def setup_watcher(self, queue):
         bone_defs = self.bone_defs[self.WATCHER]
-        self.bone_dict[self.WATCHER] = bone_dict = pmxutil.make_index_dict(
-            bone_defs)
+        self.bone_dict[self.WATCHER] = bone_dict = (
+            self.watcher_pmx.get_index_dict('bones'))
         if '両目' in self.overwrite_bones:
             bone_defs[bone_dict['両目']] = replace_bonedef_position(
                 bone_defs[bone_dict['両目']],
@@ -310,7 +312,8 @@ class LookAt():
 
         # bone_graph
         self.watcher_transform = vmdmotion.BoneTransformation(
-            bone_defs, self.watcher_motions, self.overwrite_bones, True)
+            bone_defs, self.watcher_motions, self.overwrite_bones, True,
+            self.watcher_vmd.name_table, bone_dict)
 
         self.overwrite_indexes = [
             self.watcher_transform.bone_name_to_index[bone_name]
@@ -368,7 +371,7 @@ class LookAt():
         elif 'MODEL' == self.target_mode:
             bone_defs = self.bone_defs[self.TARGET]
             self.bone_dict[self.TARGET] = d = (
-                pmxutil.make_index_dict(bone_defs))
+                self.target_pmx.get_index_dict('bones'))
             if self.target_bone not in d:
                 raise Exception('target bone is not in pmx.')
             if self.target_bone == '両目':
@@ -377,7 +380,8 @@ class LookAt():
                     bone_defs[d['右目']], [1, 2])
             # pmx
             self.target_transform = vmdmotion.BoneTransformation(
-                bone_defs, self.target_motions, [self.target_bone], True)
+                bone_defs, self.target_motions, [self.target_bone], True,
+                self.target_vmd.name_table, d)
 
             for bone_index in self.target_transform.transform_bone_indexes:
                 bone_def = bone_defs[bone_index]
@@ -660,9 +664,11 @@ class LookAt():
 
     def blend_vmd(self, frame_no, frame_type, overwrite_frames,
                   watcher_v, target_v, target_pos):
+        to_str = self.watcher_transform.name_table.to_str
+
         def find_frame(bone_name):
             for index, frame in enumerate(overwrite_frames):
-                if vmdutil.b_to_str(frame.name) == bone_name:
+                if to_str(frame.name) == bone_name:
                     return overwrite_frames.pop(index)
 
         bone_defs = self.watcher_transform.bone_defs
@@ -719,14 +725,15 @@ class LookAt():
             return overwrite_frames
 
         if 'c' in frame_type:
+            to_str = self.watcher_transform.name_table.to_str
             maxrot = max(
                 [2 * math.acos(vmdutil.clamp(vmdutil.dot_v(
                     motion.rotation,
-                    prev['frames'][vmdutil.b_to_str(motion.name)].rotation),
+                    prev['frames'][to_str(motion.name)].rotation),
                     -1, 1))
                     for motion in overwrite_frames if
                     prev['frames'].get(
-                        vmdutil.b_to_str(motion.name)) is not None])
+                        to_str(motion.name)) is not None])
 
             omega = maxrot / (frame_no - prev['frame_no'])
             if omega > self.omega_limit:
@@ -787,6 +794,7 @@ class LookAt():
         self.add_frames(queue)
         new_frames = dict()
         bone_defs = self.watcher_transform.bone_defs
+        name_table = self.watcher_transform.name_table
         queue_backup = queue.queue
 
         if self.ignore_zone2 is not None:
@@ -846,7 +854,7 @@ class LookAt():
                     if len(overwrite_frames) > 0:
                         prev_overwrites['frame_no'] = frame_no
                         prev_overwrites['frames'] = {
-                            vmdutil.b_to_str(frame.name):
+                            name_table.to_str(frame.name):
                             frame for frame in overwrite_frames}
                 new_frames[bone_index].extend(overwrite_frames)
             self.watcher_transform.replace_vmd_frames(new_frames[bone_index])
@@ -861,6 +869,7 @@ class LookAt():
         self.setup_target(queue)
         self.add_frames(queue)
         new_frames = list()
+        name_table = self.watcher_transform.name_table
         prev_overwrites = {'frame_no': -1, 'frames': []}
         o_frame_pattern = re.compile('^o*$')
         vmd_blend = self.need_vmd_blend()
@@ -909,7 +918,7 @@ class LookAt():
             if len(overwrite_frames) > 0:
                 prev_overwrites['frame_no'] = frame_no
                 prev_overwrites['frames'] = {
-                    vmdutil.b_to_str(frame.name):
+                    name_table.to_str(frame.name):
                     frame for frame in overwrite_frames}
             new_frames.extend(overwrite_frames)
             self.watcher_transform.delete(frame_no)
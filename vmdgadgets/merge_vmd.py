@@ -26,7 +26,7 @@ def merge(args):
         nonlocal vmd_header
         vmdin = vmdutil.Vmdio()
         try:
-            vmdin.load_fd(infile)
+            vmdin.load_fd(infile, raw=True)
         except:
             sys.stderr.write('cannot load {0}\n'.format(infile.name))
             return
@@ -27,6 +27,27 @@ def make_argumentparser():
     return parser
 
 
+def move_bones(frames, count, position, rotation):
+    # the count of bones is written before them, so the bone section is
+    # held in bytes to know whether 全ての親 has keys. Return the section
+    # with those keys moved, and whether it has them.
+    size = vmddef.bone_def.size
+    buf = bytearray(count * size)
+    name_table = vmdutil.NameTable()
+    moved = False
+    for index, frame in enumerate(frames):
+        if name_table.to_str(frame.name) == '全ての親':
+            frame = vmddef.decode_raw('bones', frame)
+            vmddef.pack_bone_into(buf, index * size, frame._replace(
+                position=tuple(vmdutil.add_v(frame.position, position)),
+                rotation=tuple(vmdutil.multiply_quaternion(
+                    frame.rotation, rotation))))
+            moved = True
+        else:
+            vmddef.pack_raw_into(buf, index * size, frame)
+    return buf, moved
+
+
 def move_root(args):
     if args.pos:
         position = tuple(args.pos)
@@ -39,32 +60,24 @@ def move_root(args):
     if angles == (0, 0, 0) and position == (0, 0, 0):
         sys.stderr.write('do nothing.')
         return
-    vmdin = vmdutil.Vmdio()
-    vmdin.load_fd(args.infile)
-    bones = vmdin.get_frames('bones')
-    frame_dict = vmdutil.frames_to_dict(bones)
-    name_dict = vmdutil.make_name_dict(frame_dict, True)
-    parent_frames = name_dict.get('全ての親')
-    new_frames = []
-    if parent_frames:
-        for frame in parent_frames:
-            rotation = vmdutil.euler_to_quaternion(
-                tuple([math.radians(r) for r in angles]))
-            rotation = vmdutil.multiply_quaternion(frame.rotation, rotation)
-            frame = frame._replace(
-                position=tuple(vmdutil.add_v(frame.position, position)),
-                rotation=tuple(rotation))
-            new_frames.append(frame)
-    else:
-        rotation = vmdutil.euler_to_quaternion(
-            tuple([math.radians(r) for r in angles]))
-        new_frames.append(vmddef.BONE_SAMPLE._replace(
-            position=position, rotation=rotation))
-    for key in name_dict:
-        if key != '全ての親':
-            new_frames.extend(name_dict[key])
-    vmdin.set_frames('bones', new_frames)
-    vmdin.store_fd(args.outfile)
+    rotation = vmdutil.euler_to_quaternion(
+        tuple([math.radians(r) for r in angles]))
+    # frames are copied as they are read, only bones are held
+    sections = vmdutil.iter_sections(args.infile, raw=True)
+    args.outfile.write(vmddef.pack_header(next(sections)))
+    for element in vmddef.VMD_ELEMENTS:
+        _, count, frames = next(sections, (element, 0, ()))
+        if element == 'bones':
+            buf, moved = move_bones(frames, count, position, rotation)
+            if not moved:
+                count += 1
+                buf += vmddef.pack_bone(vmddef.BONE_SAMPLE._replace(
+                    position=position, rotation=rotation))
+            args.outfile.write(vmddef.pack_count(vmddef.count(count)))
+            args.outfile.write(buf)
+            continue
+        for chunk in vmdutil.iter_section_bytes(element, count, frames):
+            args.outfile.write(chunk)
 
 
 if __name__ == '__main__':
@@ -45,7 +45,7 @@ def remove_frames_by_name(frames, names, inverse=False):
 
 def remove_motion(args):
     vmd = vmdutil.Vmdio()
-    vmd.load_fd(args.infile)
+    vmd.load_fd(args.infile, raw=True)
     args.infile.close()
     t = [args.bone, args.morph, [], [], [], []]
     for i, n in enumerate(t):
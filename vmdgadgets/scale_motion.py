@@ -94,7 +94,7 @@ def scale_camera(vmdin, args):
 
 def scale_motion(args):
     vmdin = vmdutil.Vmdio()
-    vmdin.load_fd(args.infile)
+    vmdin.load_fd(args.infile, elements=['bones', 'cameras'])
     is_camera = vmdutil.is_camera_header(vmdin.header)
     vmdo = vmdutil.Vmdio()
     if is_camera:
@@ -102,7 +102,7 @@ def read_instruction(instruction):
     return instructions
 
 
-def load_vmds(file_list):
+def load_vmds(file_list, raw=False):
     camera_motion = True
     first_file = True
     vmds = dict()
@@ -111,7 +111,7 @@ def load_vmds(file_list):
             sys.stderr.write('no file_name')
             continue
         vmd_in = vmdutil.Vmdio()
-        vmd_in.load(file_name)
+        vmd_in.load(file_name, raw=raw)
         if vmdutil.is_vmd_header(vmd_in.header):
             is_camera = vmdutil.is_camera_header(vmd_in.header)
             if first_file:
@@ -227,7 +227,11 @@ def copy_motion(instructions, frame_dict):
 
 def do_concat(inst_file):
     instructions = read_instruction(inst_file)
-    header, vmd_ins = load_vmds(instructions.keys())
+    # without translate/mirror, frames are copied as raw records
+    raw = all([
+        len(instruction) < 4 for recipe in instructions.values()
+        for instruction in recipe])
+    header, vmd_ins = load_vmds(instructions.keys(), raw)
     # load srcs
     frame_dict = dict()
     for vmd_name in vmd_ins.keys():
@@ -48,7 +48,7 @@ def reformat_bone_interpolation(interpolation):
 
 
 # not care about floating point rounding
-def compare_vmd_frame(frame_a, frame_b):
+def compare_vmd_frame(frame_a, frame_b, name_table=None):
     def compare_camera(frame_a, frame_b):
         # distance, position, rotation, angle_of_view, perspective,
         # interpolation
@@ -74,7 +74,9 @@ def compare_vmd_frame(frame_a, frame_b):
             abs(angle_a - angle_b) < vmdutil.NEJIRI_THRESHOLD)
 
     def compare_bone(frame_a, frame_b):
-        name = vmdutil.b_to_str(frame_a.name)
+        name = (
+            vmdutil.b_to_str(frame_a.name) if name_table is None else
+            name_table.to_str(frame_a.name))
         if '捩' not in name:
             # position, rotation, interpolation
             # do b_to_str() if compare name
@@ -96,7 +98,9 @@ def compare_vmd_frame(frame_a, frame_b):
         vmddef.bone: compare_bone,
         vmddef.morph: compare_morph,
         vmddef.camera: compare_camera,
-        vmddef.light: compare_light
+        vmddef.light: compare_light,
+        vmddef.compact_bone: compare_bone,
+        vmddef.compact_camera: compare_camera,
     }
 
     return switch_case[type(frame_a)](frame_a, frame_b)
@@ -130,7 +134,8 @@ def diff_noname_frames(frame_dict_a, frame_dict_b, buf=None):
 
 def diff_named_frames(
         names,
-        frames_a, index_dict_a, frames_b, index_dict_b, buf=None):
+        frames_a, index_dict_a, frames_b, index_dict_b, buf=None,
+        name_table=None):
     # index_dict: {name : {frame: index}}
     def insert_result(f, v, d):
         r = d.setdefault(name, dict())
@@ -153,7 +158,7 @@ def diff_named_frames(
                 insert_result(frame, DiffResult.A_ONLY, buf)
             elif a is None and b is not None:
                 insert_result(frame, DiffResult.B_ONLY, buf)
-            elif compare_vmd_frame(frames_a[a], frames_b[b]):
+            elif compare_vmd_frame(frames_a[a], frames_b[b], name_table):
                 insert_result(frame, DiffResult.EQUAL, buf)
             else:
                 insert_result(frame, DiffResult.NOT_EQUAL, buf)
@@ -191,7 +196,8 @@ def print_summary(key_type, diff_info, args):
 def write_motion_diff(vmd_b, bone_diff, morph_diff, args):
     def collect_diff_frames(key_type, motions_b, diff_info, args):
         result = list()
-        index_dict_b = vmdutil.make_index_dict(motions_b, True)
+        index_dict_b = vmdutil.make_index_dict(
+            motions_b, True, vmd_b.name_table)
         for name, frame_dict in diff_info.items():
             for frame_no, diff_data in frame_dict.items():
                 if (diff_data == DiffResult.B_ONLY or
@@ -245,7 +251,7 @@ def diff_noname(key_type, vmd_a, vmd_b):
     return diff_noname_frames(frame_dict_a, frame_dict_b)
 
 
-def omit_unnecessary_frames(frames_a, frames_b, key_type):
+def omit_unnecessary_frames(frames_a, frames_b, key_type, name_table=None):
     def keys_used(nd, key_type):
         keys_to_omit = vmdutil.enum_unnecessary_keys(nd, key_type)
         return set(nd).difference(keys_to_omit)
@@ -257,8 +263,12 @@ def omit_unnecessary_frames(frames_a, frames_b, key_type):
                 result.extend(value)
         return result
 
-    nd_a = vmdutil.make_name_dict(vmdutil.frames_to_dict(frames_a), True)
-    nd_b = vmdutil.make_name_dict(vmdutil.frames_to_dict(frames_b), True)
+    if name_table is None:
+        name_table = vmdutil.NameTable()
+    nd_a = vmdutil.make_name_dict(
+        vmdutil.frames_to_dict(frames_a), True, name_table)
+    nd_b = vmdutil.make_name_dict(
+        vmdutil.frames_to_dict(frames_b), True, name_table)
     keys_a = keys_used(nd_a, key_type)
     keys_b = keys_used(nd_b, key_type)
     need_keys = keys_a.union(keys_b)
@@ -270,15 +280,18 @@ def omit_unnecessary_frames(frames_a, frames_b, key_type):
 def diff_named(key_type, vmd_a, vmd_b, args, names=None):
     frames_a = vmd_a.get_frames(key_type)
     frames_b = vmd_b.get_frames(key_type)
+    # names of both files are decoded once
+    name_table = vmd_a.name_table
     if args.short is True:
         frames_a, frames_b = (
-            omit_unnecessary_frames(frames_a, frames_b, key_type))
-    index_dict_a = vmdutil.make_index_dict(frames_a, True)
-    index_dict_b = vmdutil.make_index_dict(frames_b, True)
+            omit_unnecessary_frames(frames_a, frames_b, key_type, name_table))
+    index_dict_a = vmdutil.make_index_dict(frames_a, True, name_table)
+    index_dict_b = vmdutil.make_index_dict(frames_b, True, name_table)
     if names is None:
         names = set(index_dict_a).union(index_dict_b)
     return diff_named_frames(
-        names, frames_a, index_dict_a, frames_b, index_dict_b)
+        names, frames_a, index_dict_a, frames_b, index_dict_b,
+        name_table=name_table)
 
 
 # {key_type: name: {frame: result}}
@@ -287,8 +300,9 @@ if __name__ == '__main__':
     args = parser.parse_args()
     vmd_a = vmdutil.Vmdio()
     vmd_b = vmdutil.Vmdio()
-    vmd_a.load(args.vmd_a)
-    vmd_b.load(args.vmd_b)
+    # decode only the elements to be compared
+    vmd_a.load(args.vmd_a, lazy=True)
+    vmd_b.load(args.vmd_b, lazy=True)
     is_camera = vmdutil.is_camera_header(vmd_b.header)
     print_file_info(args, vmd_a, vmd_b)
     if is_camera is True:
@@ -4,7 +4,12 @@
 from collections import namedtuple
 from collections import Iterable
 from itertools import chain
+from functools import lru_cache
 import struct
+try:
+    import numpy as np
+except ImportError:  # numpy is optional
+    np = None
 
 PMX_HEADER = b'PMX '
 # utf-16: little endian, without BOM
@@ -51,12 +56,10 @@ def b_to_str(b, encoding=PMX_ENCODING[0]):
 
 
 def unpack_string(buf, offset=0, encoding=PMX_ENCODING[0]):
-    length = struct.unpack_from('<i', buf, offset)[0]
-    size = struct.calcsize('<i')
-    pack_format = '<{0}s'.format(length)
-    s = struct.unpack_from(pack_format, buf, offset + size)[0]
-    size += struct.calcsize(pack_format)
-    return s.decode(encoding), size
+    length = count_def.unpack_from(buf, offset)[0]
+    start = offset + count_def.size
+    s = bytes(buf[start:start + length])
+    return s.decode(encoding), count_def.size + length
 
 
 def pack_string(s, encoding=PMX_ENCODING[0]):
@@ -86,6 +89,7 @@ def pack_name(header, p):
 
 count_def = struct.Struct('<1i')
 count = namedtuple('count', 'count')
+byte_def = struct.Struct('<1B')
 
 
 def unpack_count(buf, offset=0):
@@ -125,6 +129,80 @@ def get_encoding(header):
     return PMX_ENCODING[header.encoding]
 
 
+# ############
+# codec: prebuilt structs for index sizes of a header
+# ############
+class GroupStruct():
+    '''struct.Struct, which also groups unpacked values as group_tuple()
+    '''
+    def __init__(self, pack_format):
+        s = struct.Struct(pack_format)
+        self.size = s.size
+        self.pack = s.pack
+        self.unpack_from = s.unpack_from
+        index = 0
+        slices = list()
+        for i in pack_format:  # same as group_tuple()
+            if i.isdigit():
+                n = int(i)
+                slices.append((index, n))
+                index += n
+        self.slices = tuple(slices)
+
+    def unpack_group(self, buf, offset=0):
+        p = self.unpack_from(buf, offset)
+        return tuple([
+            p[index] if n == 1 else p[index:index + n]
+            for index, n in self.slices])
+
+
+class PmxCodec():
+    '''structs of a header, see get_codec()
+    '''
+    def __init__(self, header):
+        vertex_index = INDEX_FORMAT_VERTEX[header.vertex_isize]
+        texture_index = INDEX_FORMAT[header.texture_isize]
+        material_index = INDEX_FORMAT[header.material_isize]
+        bone_index = INDEX_FORMAT[header.bone_isize]
+        morph_index = INDEX_FORMAT[header.morph_isize]
+        rigid_body_index = INDEX_FORMAT[header.rigid_body_isize]
+        self.encoding = PMX_ENCODING[header.encoding]
+        self.weights = weight_structs(header.bone_isize)
+        self.face = struct.Struct(FACE_FORMAT.format(vertex_index))
+        self.texture_index = struct.Struct('<1' + texture_index)
+        self.bone_index = struct.Struct('<1' + bone_index)
+        self.morph_index = struct.Struct('<1' + morph_index)
+        self.bone_head = GroupStruct(BONE_HEAD_FORMAT.format(bone_index))
+        self.bone_additional_transform = struct.Struct(
+            BONE_ADDITIONAL_TRANSFORM_FORMAT.format(bone_index))
+        isizes = {
+            'vertex_isize': vertex_index, 'bone_isize': bone_index,
+            'material_isize': material_index, 'morph_isize': morph_index,
+            'rigid_body_isize': rigid_body_index}
+        self.morph_offsets = tuple([
+            GroupStruct(pack_format.format(isizes[isize]))
+            for pack_format, isize in MORPH_OFFSET_FORMATS])
+        self.disp_node_items = {
+            DISP_NODE_ITEM_BONE: self.bone_index,
+            DISP_NODE_ITEM_MORPH: self.morph_index}
+        self.rigid_body = GroupStruct(BODY_FORMAT.format(bone_index))
+        self.joint = GroupStruct(JOINT_FORMAT.format(rigid_body_index))
+
+
+@lru_cache(maxsize=None)
+def weight_structs(bone_isize):
+    return tuple([
+        GroupStruct(pack_format.format(INDEX_FORMAT[bone_isize]))
+        for pack_format in WEIGHT_FORMAT])
+
+
+@lru_cache(maxsize=None)
+def get_codec(header):
+    '''Return PmxCodec of the header, built once per header.
+    '''
+    return PmxCodec(header)
+
+
 # ############
 # model information
 # ############
@@ -156,6 +234,10 @@ def pack_model_info(header, p):
 # vertexes
 # ############
 vertex_fixed = struct.Struct('<3f3f2f')
+vertex_fixed_group = GroupStruct('<3f3f2f')
+ex_uv_def = struct.Struct('<4f')
+weight_type_def = struct.Struct('<1B')
+edge_mag_def = struct.Struct('<1f')
 vertex = namedtuple(
     'vertex',
     'position normal uv ex_uvs weight_type weight edge_mag')
@@ -180,6 +262,10 @@ vertex_qdef = namedtuple(
 WEIGHT_TUPLE = (
     vertex_bdef1, vertex_bdef2, vertex_bdef4, vertex_sdef, vertex_qdef
 )
+for weight_tuple, name in zip(WEIGHT_TUPLE, (
+        'vertex_bdef1', 'vertex_bdef2', 'vertex_bdef4', 'vertex_sdef',
+        'vertex_qdef')):
+    weight_tuple.__qualname__ = name  # to be found by pickle
 
 
 def flatten_composite(*p):
@@ -207,40 +293,37 @@ def group_tuple(pack_format, p):
 
 
 def unpack_vertexweight(weight_type, bone_isize, buf, offset):
-    pack_format = WEIGHT_FORMAT[weight_type].format(
-        INDEX_FORMAT[bone_isize])
-    p = struct.unpack_from(pack_format, buf, offset)
+    weight_def = weight_structs(bone_isize)[weight_type]
     return WEIGHT_TUPLE[weight_type]._make(
-            group_tuple(pack_format, p)), struct.calcsize(pack_format)
+            weight_def.unpack_group(buf, offset)), weight_def.size
 
 
 def pack_vertexweight(weight_type, bone_isize, p):
-    pack_format = WEIGHT_FORMAT[weight_type].format(
-        INDEX_FORMAT[bone_isize])
-    return struct.pack(pack_format, *flatten_composite(*p))
+    return weight_structs(bone_isize)[weight_type].pack(
+        *flatten_composite(*p))
 
 
 def unpack_vertex(header, buf, offset=0):
+    codec = get_codec(header)
     size = 0
-    p = vertex_fixed.unpack_from(buf, offset)
-    position, normal, uv = group_tuple(vertex_fixed.format.decode(), p)
+    position, normal, uv = vertex_fixed_group.unpack_group(buf, offset)
     size += vertex_fixed.size
 
     ex_uvs = list()
     for i in range(header.n_exuvs):
-        ex_uvs.append(
-            struct.unpack_from('<4f', buf, offset + size))
-        size += struct.calcsize('<4f')
+        ex_uvs.append(ex_uv_def.unpack_from(buf, offset + size))
+        size += ex_uv_def.size
     ex_uvs = tuple(ex_uvs)
 
-    weight_type = struct.unpack_from('<1B', buf, offset + size)[0]
-    size += struct.calcsize('<1B')
+    weight_type = buf[offset + size]
+    size += weight_type_def.size
 
-    weight, weight_size = unpack_vertexweight(
-        weight_type, header.bone_isize, buf, offset + size)
-    size += weight_size
-    edge_mag = struct.unpack_from('<1f', buf, offset + size)[0]
-    size += struct.calcsize('<1f')
+    weight_def = codec.weights[weight_type]
+    weight = WEIGHT_TUPLE[weight_type]._make(
+        weight_def.unpack_group(buf, offset + size))
+    size += weight_def.size
+    edge_mag = edge_mag_def.unpack_from(buf, offset + size)[0]
+    size += edge_mag_def.size
     return (
         vertex(
             position, normal, uv, ex_uvs, weight_type,
@@ -253,13 +336,193 @@ def pack_vertex(header, p):
     leading_part = p.position + p.normal + p.uv
     result += vertex_fixed.pack(*leading_part)
     for uv in p.ex_uvs:
-        result += struct.pack('<4f', *uv)
-    result += struct.pack('<1B', p.weight_type)
-    result += pack_vertexweight(p.weight_type, header.bone_isize, p.weight)
-    result += struct.pack('<1f', p.edge_mag)
+        result += ex_uv_def.pack(*uv)
+    result += weight_type_def.pack(p.weight_type)
+    result += get_codec(header).weights[p.weight_type].pack(
+        *flatten_composite(*p.weight))
+    result += edge_mag_def.pack(p.edge_mag)
+    return result
+
+
+# vertex arrays: all vertexes in a numpy structured array.
+# unused bones are -1 and their weights are 0.
+# weights of BDEF1 is (1, 0, 0, 0), BDEF2 and SDEF (w, 1 - w, 0, 0).
+# c, r0, r1 are 0 except SDEF.
+def vertex_array_dtype(n_exuvs):
+    return np.dtype([
+        ('position', '<f4', (3,)), ('normal', '<f4', (3,)),
+        ('uv', '<f4', (2,)), ('ex_uvs', '<f4', (n_exuvs, 4)),
+        ('weight_type', 'u1'), ('bones', '<i4', (4,)),
+        ('weights', '<f4', (4,)), ('c', '<f4', (3,)),
+        ('r0', '<f4', (3,)), ('r1', '<f4', (3,)), ('edge_mag', '<f4')])
+
+
+def vertex_record_dtype(header, weight_type):
+    '''packed record of the weight type, the layout is equal to
+    unpack_vertex()
+    '''
+    bone = '<' + INDEX_FORMAT[header.bone_isize]
+    n_bones = (1, 2, 4, 2, 4)[weight_type]
+    fields = [
+        ('position', '<f4', (3,)), ('normal', '<f4', (3,)),
+        ('uv', '<f4', (2,)), ('ex_uvs', '<f4', (header.n_exuvs, 4)),
+        ('weight_type', 'u1'), ('bones', bone, (n_bones,))]
+    if weight_type in (1, 3):  # BDEF2, SDEF
+        fields.append(('weights', '<f4', (1,)))
+    elif weight_type in (2, 4):  # BDEF4, QDEF
+        fields.append(('weights', '<f4', (4,)))
+    if weight_type == 3:
+        fields.extend([
+            ('c', '<f4', (3,)), ('r0', '<f4', (3,)), ('r1', '<f4', (3,))])
+    fields.append(('edge_mag', '<f4'))
+    return np.dtype(fields)
+
+
+def find_vertex_runs(header, buf, offset, count):
+    '''Return (starts, positions, weight_types, lengths) of runs of
+    vertexes of the same weight type, which are packed with a fixed
+    stride. Long runs are measured by numpy rather than vertex by vertex.
+    '''
+    record_sizes = [
+        vertex_record_dtype(header, weight_type).itemsize
+        for weight_type in range(len(WEIGHT_TUPLE))]
+    weight_type_offset = vertex_fixed.size + 16 * header.n_exuvs
+    b = np.frombuffer(buf, np.uint8, len(buf) - offset, offset)
+    starts, positions, weight_types, lengths = [], [], [], []
+    index = 0
+    pos = offset
+    while index < count:
+        weight_type = buf[pos + weight_type_offset]
+        size = record_sizes[weight_type]
+        n = 1
+        while (n < 8 and index + n < count and
+               buf[pos + n * size + weight_type_offset] == weight_type):
+            n += 1
+        window = 64
+        while n >= 8 and index + n < count:
+            k = min(window, count - index - n)
+            begin = pos - offset + n * size + weight_type_offset
+            other = np.flatnonzero(
+                b[begin:begin + k * size:size] != weight_type)
+            if len(other) > 0:
+                n += int(other[0])
+                break
+            n += k
+            window *= 2
+        starts.append(index)
+        positions.append(pos)
+        weight_types.append(weight_type)
+        lengths.append(n)
+        index += n
+        pos += n * size
+    return starts, positions, weight_types, lengths
+
+
+def unpack_vertex_array(header, buf, offset=0, count=0):
+    '''count vertexes in buf -> (structured array, size)
+
+    Records are grouped by weight type, and each group is copied out of
+    buf at once, through a strided view of buf.
+    '''
+    record_dtypes = [
+        vertex_record_dtype(header, weight_type)
+        for weight_type in range(len(WEIGHT_TUPLE))]
+    record_sizes = np.array([dtype.itemsize for dtype in record_dtypes])
+    starts, positions, weight_types, lengths = find_vertex_runs(
+        header, buf, offset, count)
+    # offset and weight type of each vertex
+    runs = np.repeat(np.arange(len(lengths)), lengths)
+    weight_types = np.array(weight_types, np.uint8)[runs]
+    strides = record_sizes[weight_types]
+    offsets = (
+        np.array(positions, np.int64)[runs] - offset +
+        (np.arange(count) - np.array(starts, np.int64)[runs]) * strides)
+    size = int(offsets[-1] + strides[-1]) if count > 0 else 0
+    b = np.frombuffer(buf, np.uint8, size, offset)
+    result = np.zeros(count, vertex_array_dtype(header.n_exuvs))
+    for weight_type, dtype in enumerate(record_dtypes):
+        indexes = np.flatnonzero(weight_types == weight_type)
+        if len(indexes) <= 0:
+            continue
+        n = len(indexes)
+        first = int(indexes[0])
+        if indexes[-1] - first + 1 == n:  # one run, no copy
+            indexes = slice(first, first + n)
+            records = np.frombuffer(
+                buf, dtype, n, offset + int(offsets[first]))
+        else:
+            # rows of the view are records starting at each byte of b
+            records = np.lib.stride_tricks.as_strided(
+                b, (size - dtype.itemsize + 1, dtype.itemsize), (1, 1),
+                writeable=False)[offsets[indexes]].view(dtype)[:, 0]
+        for name in ('position', 'normal', 'uv', 'ex_uvs', 'edge_mag'):
+            result[name][indexes] = records[name]
+        result['weight_type'][indexes] = weight_type
+        n_bones = dtype['bones'].shape[0]
+        bones = np.full((n, 4), -1, np.int32)
+        bones[:, :n_bones] = records['bones']
+        result['bones'][indexes] = bones
+        if weight_type == 0:
+            result['weights'][indexes] = (1.0, 0.0, 0.0, 0.0)
+        elif weight_type in (1, 3):
+            weights = np.zeros((n, 4), np.float32)
+            weights[:, 0] = records['weights'][:, 0]
+            weights[:, 1] = 1.0 - records['weights'][:, 0]
+            result['weights'][indexes] = weights
+        else:
+            result['weights'][indexes] = records['weights']
+        if weight_type == 3:
+            for name in ('c', 'r0', 'r1'):
+                result[name][indexes] = records[name]
+    return result, size
+
+
+def array_to_vertexes(a):
+    '''structured array -> [vertex]
+    '''
+    positions = a['position'].tolist()
+    normals = a['normal'].tolist()
+    uvs = a['uv'].tolist()
+    ex_uvs = a['ex_uvs'].tolist()
+    weight_types = a['weight_type'].tolist()
+    bones = a['bones'].tolist()
+    weights = a['weights'].tolist()
+    c = a['c'].tolist()
+    r0 = a['r0'].tolist()
+    r1 = a['r1'].tolist()
+    edge_mags = a['edge_mag'].tolist()
+    result = []
+    for index, weight_type in enumerate(weight_types):
+        b = bones[index]
+        w = weights[index]
+        if weight_type == 0:
+            weight = vertex_bdef1(b[0])
+        elif weight_type == 1:
+            weight = vertex_bdef2(b[0], b[1], w[0])
+        elif weight_type == 3:
+            weight = vertex_sdef(
+                b[0], b[1], w[0],
+                tuple(c[index]), tuple(r0[index]), tuple(r1[index]))
+        else:
+            weight = WEIGHT_TUPLE[weight_type](*b, *w)
+        result.append(vertex(
+            tuple(positions[index]), tuple(normals[index]),
+            tuple(uvs[index]), tuple([tuple(uv) for uv in ex_uvs[index]]),
+            weight_type, weight, edge_mags[index]))
     return result
 
 
+def pack_vertex_array(header, vertexes):
+    '''[vertex] -> structured array
+    '''
+    buf = b''.join([pack_vertex(header, p) for p in vertexes])
+    return unpack_vertex_array(header, buf, 0, len(vertexes))[0]
+
+
+def vertex_array_to_bytes(header, a):
+    return b''.join([pack_vertex(header, p) for p in array_to_vertexes(a)])
+
+
 # ############
 # faces
 # ############
@@ -268,16 +531,47 @@ FACE_FORMAT = '<3{0}'  # 1 // 3
 
 
 def unpack_face(header, buf, offset=0):
-    pack_format = FACE_FORMAT.format(
-        INDEX_FORMAT_VERTEX[header.vertex_isize])
-    return (struct.unpack_from(pack_format, buf, offset),
-            struct.calcsize(pack_format))
+    face_def = get_codec(header).face
+    return face_def.unpack_from(buf, offset), face_def.size
 
 
 def pack_face(header, p):
-    pack_format = FACE_FORMAT.format(
-        INDEX_FORMAT_VERTEX[header.vertex_isize])
-    return struct.pack(pack_format, *p)
+    return get_codec(header).face.pack(*p)
+
+
+# face arrays: (N, 3) index arrays, dtype follows vertex_isize
+FACE_DTYPES = {
+    1: '<u1',
+    2: '<u2',
+    4: '<i4',
+}
+
+
+def unpack_face_array(header, buf, offset=0, count=0):
+    '''count faces in buf -> ((count, 3) array, size) (no copy)
+    '''
+    dtype = np.dtype(FACE_DTYPES[header.vertex_isize])
+    a = np.frombuffer(buf, dtype, count * 3, offset).reshape(count, 3)
+    return a, a.nbytes
+
+
+def pack_face_array(header, faces):
+    '''[face] -> (N, 3) array
+    '''
+    return np.array(faces, FACE_DTYPES[4]).reshape(-1, 3)
+
+
+def face_array_to_bytes(header, a):
+    '''(N, 3) array -> bytes, indexes are converted to vertex_isize
+    '''
+    return np.ascontiguousarray(
+        a, FACE_DTYPES[header.vertex_isize]).tobytes()
+
+
+def array_to_faces(a):
+    '''(N, 3) array -> [face]
+    '''
+    return [tuple(face) for face in a.tolist()]
 
 
 # ############
@@ -306,13 +600,13 @@ material = namedtuple(
     'toon_flag toon_texture memo n_face_vertexes')
 
 material_fixed1 = struct.Struct('<4f3f1f3f1B4f1f')
+material_fixed1_group = GroupStruct('<4f3f1f3f1B4f1f')
 material_fixed2 = struct.Struct('<2B')
 
 
 def unpack_material_fixed1(buf, offset):
-    p = material_fixed1.unpack_from(buf, offset)
-    return group_tuple(
-        material_fixed1.format.decode(), p), material_fixed1.size
+    return material_fixed1_group.unpack_group(
+        buf, offset), material_fixed1.size
 
 
 def unpack_material(header, buf, offset=0):
@@ -324,26 +618,25 @@ def unpack_material(header, buf, offset=0):
         buf, offset + size)
     size += fixed1_size
 
-    index_format = '<1{0}'.format(INDEX_FORMAT[header.texture_isize])
-    texture = struct.unpack_from(index_format, buf, offset + size)[0]
-    size += struct.calcsize(index_format)
-    sphere_texture = struct.unpack_from(index_format, buf, offset + size)[0]
-    size += struct.calcsize(index_format)
+    index_def = get_codec(header).texture_index
+    texture = index_def.unpack_from(buf, offset + size)[0]
+    size += index_def.size
+    sphere_texture = index_def.unpack_from(buf, offset + size)[0]
+    size += index_def.size
 
     sphere_mode, toon_flag = material_fixed2.unpack_from(buf, offset + size)
     size += material_fixed2.size
     if 0 == toon_flag:
-        toon_texture = struct.unpack_from(
-            index_format, buf, offset + size)[0]
-        size += struct.calcsize(index_format)
+        toon_texture = index_def.unpack_from(buf, offset + size)[0]
+        size += index_def.size
     else:  # 1
-        toon_texture = struct.unpack_from('<1B', buf, offset + size)[0]
-        size += struct.calcsize('<1B')
+        toon_texture = buf[offset + size]
+        size += 1
     memo, tex_len = unpack_string(
         buf, offset + size, PMX_ENCODING[header.encoding])
     size += tex_len
-    n_face_vertexes = struct.unpack_from('<1i', buf, offset + size)[0]
-    size += struct.calcsize('<1i')
+    n_face_vertexes = count_def.unpack_from(buf, offset + size)[0]
+    size += count_def.size
     return material._make(
         (name_jp, name_en) + fixed1 +
         (texture, sphere_texture, sphere_mode, toon_flag, toon_texture) +
@@ -356,16 +649,16 @@ def pack_material(header, p):
     result += material_fixed1.pack(
         *p.diffuse, *p.specular, p.specular_coef, *p.ambient, p.draw_flag,
         *p.edge_color, p.edge_size)
-    index_format = '<1{0}'.format(INDEX_FORMAT[header.texture_isize])
-    result += struct.pack(index_format, p.texture)
-    result += struct.pack(index_format, p.sphere_texture)
+    index_def = get_codec(header).texture_index
+    result += index_def.pack(p.texture)
+    result += index_def.pack(p.sphere_texture)
     result += material_fixed2.pack(p.sphere_mode, p.toon_flag)
     if 0 == p.toon_flag:
-        result += struct.pack(index_format, p.toon_texture)
+        result += index_def.pack(p.toon_texture)
     else:
         result += struct.pack('<1B', p.toon_texture)
     result += pack_string(p.memo, PMX_ENCODING[header.encoding])
-    result += struct.pack('<1i', p.n_face_vertexes)
+    result += count_def.pack(p.n_face_vertexes)
     return result
 
 
@@ -403,110 +696,111 @@ BONE_AXIS_IS_FIXED = 0x0400
 BONE_ASSIGN_LOCAL_AXIES = 0x0800
 BONE_TRANSFORM_AFTER_PHYSICS = 0x1000
 BONE_EXTERNAL_PARENT = 0x2000
+BONE_HEAD_FORMAT = '<3f1{0}1i1H'
+BONE_ADDITIONAL_TRANSFORM_FORMAT = '<1{0}1f'
+bone_coordinates_def = struct.Struct('<3f')
+bone_local_axises_def = GroupStruct('<3f3f')
+bone_ik_def = struct.Struct('<1i1f1i')
+bone_ex_parent_def = struct.Struct('<1i')
+bone_flag_def = struct.Struct('<1H')
 
 
 def unpack_bone_disp_dir(header, flag, buf, offset=0):
     if flag & BONE_DISP_DIR == BONE_DISP_DIR:  # bone index
-        pack_format = '<1{0}'.format(INDEX_FORMAT[header.bone_isize])
-        return struct.unpack_from(
-            pack_format, buf, offset)[0], struct.calcsize(pack_format)
+        index_def = get_codec(header).bone_index
+        return index_def.unpack_from(buf, offset)[0], index_def.size
     else:  # coordinates
-        return struct.unpack_from(
-            '<3f', buf, offset), struct.calcsize('<3f')
+        return bone_coordinates_def.unpack_from(
+            buf, offset), bone_coordinates_def.size
 
 
 def pack_bone_disp_dir(header, flag, p):
     if flag & BONE_DISP_DIR == BONE_DISP_DIR:  # bone index
-        pack_format = '<1{0}'.format(INDEX_FORMAT[header.bone_isize])
-        return struct.pack(pack_format, p)
+        return get_codec(header).bone_index.pack(p)
     else:
-        return struct.pack('<3f', *p)
+        return bone_coordinates_def.pack(*p)
 
 
 def unpack_bone_additional_transform(header, flag, buf, offset=0):
     if flag & (BONE_ADD_ROTATE | BONE_ADD_TRANSLATE) > 0:
-        pack_format = '<1{0}1f'.format(INDEX_FORMAT[header.bone_isize])
+        transform_def = get_codec(header).bone_additional_transform
         return bone_additional_transform._make(
-            struct.unpack_from(
-                pack_format, buf, offset)), struct.calcsize(pack_format)
+            transform_def.unpack_from(buf, offset)), transform_def.size
     else:
         return None, 0
 
 
 def pack_bone_additional_transform(header, flag, p):
     if flag & (BONE_ADD_ROTATE | BONE_ADD_TRANSLATE) > 0:
-        pack_format = '<1{0}1f'.format(INDEX_FORMAT[header.bone_isize])
-        return struct.pack(pack_format, *p)
+        return get_codec(header).bone_additional_transform.pack(*p)
     else:
         return bytes()
 
 
 def unpack_bone_fixed_axis(header, flag, buf, offset=0):
     if flag & BONE_AXIS_IS_FIXED == BONE_AXIS_IS_FIXED:
-        return struct.unpack_from(
-            '<3f', buf, offset), struct.calcsize('<3f')
+        return bone_coordinates_def.unpack_from(
+            buf, offset), bone_coordinates_def.size
     else:
         return None, 0
 
 
 def pack_bone_fixed_axis(header, flag, p):
     if flag & BONE_AXIS_IS_FIXED == BONE_AXIS_IS_FIXED:
-        return struct.pack('<3f', *p)
+        return bone_coordinates_def.pack(*p)
     else:
         return bytes()
 
 
 def unpack_bone_local_axises(header, flag, buf, offset=0):
-    pack_format = '<3f3f'
     if flag & BONE_ASSIGN_LOCAL_AXIES == BONE_ASSIGN_LOCAL_AXIES:
-        p = struct.unpack_from(pack_format, buf, offset)
-        return group_tuple(pack_format, p), struct.calcsize(pack_format)
+        return bone_local_axises_def.unpack_group(
+            buf, offset), bone_local_axises_def.size
     else:
         return None, 0
 
 
 def pack_bone_local_axies(header, flag, p):
     if flag & BONE_ASSIGN_LOCAL_AXIES == BONE_ASSIGN_LOCAL_AXIES:
-        return struct.pack('<3f3f', *chain.from_iterable(p))
+        return bone_local_axises_def.pack(*chain.from_iterable(p))
     else:
         return bytes()
 
 
 def unpack_bone_ex_parent(header, flag, buf, offset=0):
     if flag & BONE_EXTERNAL_PARENT == BONE_EXTERNAL_PARENT:
-        return struct.unpack_from(
-            '<1i', buf, offset), struct.calcsize('<1i')
+        return bone_ex_parent_def.unpack_from(
+            buf, offset), bone_ex_parent_def.size
     else:
         return None, 0
 
 
 def pack_bone_ex_parent(header, flag, p):
     if flag & BONE_EXTERNAL_PARENT == BONE_EXTERNAL_PARENT:
-        return struct.pack('<1i', *p)
+        return bone_ex_parent_def.pack(*p)
     else:
         return bytes()
 
 
 def unpack_bone_ik(header, flag, buf, offset=0):
-    index_format = '<1{0}'.format(INDEX_FORMAT[header.bone_isize])
+    index_def = get_codec(header).bone_index
     size = 0
     if flag & BONE_IS_IK == BONE_IS_IK:
-        target = struct.unpack_from(index_format, buf, offset + size)[0]
-        size += struct.calcsize(index_format)
-        loop, angle_per_loop, n_links = struct.unpack_from(
-            '<1i1f1i', buf, offset + size)
-        size += struct.calcsize('<1i1f1i')
+        target = index_def.unpack_from(buf, offset + size)[0]
+        size += index_def.size
+        loop, angle_per_loop, n_links = bone_ik_def.unpack_from(
+            buf, offset + size)
+        size += bone_ik_def.size
         links = list()
         for i in range(n_links):
-            link_bone = struct.unpack_from(
-                index_format, buf, offset + size)[0]
-            size += struct.calcsize(index_format)
-            angle_is_limited = struct.unpack_from(
-                '<1B', buf, offset + size)[0]
-            size += struct.calcsize('<1B')
+            link_bone = index_def.unpack_from(buf, offset + size)[0]
+            size += index_def.size
+            angle_is_limited = buf[offset + size]
+            size += 1
             if angle_is_limited > 0:
-                limit_angle = struct.unpack_from('<3f3f', buf, offset + size)
-                size += struct.calcsize('<3f3f')
+                limit_angle = bone_local_axises_def.unpack_from(
+                    buf, offset + size)
+                size += bone_local_axises_def.size
                 lower = limit_angle[0:3]
                 upper = limit_angle[3:6]
             else:
@@ -522,17 +816,17 @@ def unpack_bone_ik(header, flag, buf, offset=0):
 
 
 def pack_bone_ik(header, flag, p):
-    index_format = '<1{0}'.format(INDEX_FORMAT[header.bone_isize])
+    index_def = get_codec(header).bone_index
     if flag & BONE_IS_IK == BONE_IS_IK:
         result = bytearray()
-        result += struct.pack(index_format, p.target)
-        result += struct.pack(
-            '<1i1f1i', p.loop, p.angle_per_loop, p.n_links)
+        result += index_def.pack(p.target)
+        result += bone_ik_def.pack(p.loop, p.angle_per_loop, p.n_links)
         for link in p.links:
-            result += struct.pack(index_format, link.link_bone)
-            result += struct.pack('<1B', link.angle_is_limited)
+            result += index_def.pack(link.link_bone)
+            result += byte_def.pack(link.angle_is_limited)
             if link.angle_is_limited > 0:
-                result += struct.pack('<3f3f', *link.lower, *link.upper)
+                result += bone_local_axises_def.pack(
+                    *link.lower, *link.upper)
         return result
     else:
         return bytes()
@@ -542,11 +836,10 @@ def unpack_bone(header, buf, offset=0):
     size = 0
     name_jp, name_en, s = unpack_name(header, buf, offset)
     size += s
-    pack_format = '<3f1{0}1i1H'.format(INDEX_FORMAT[header.bone_isize])
-    p = struct.unpack_from(pack_format, buf, offset + size)
-    size += struct.calcsize(pack_format)
-    position, parent, transform_hierarchy, flag = group_tuple(
-        pack_format, p)
+    head_def = get_codec(header).bone_head
+    position, parent, transform_hierarchy, flag = head_def.unpack_group(
+        buf, offset + size)
+    size += head_def.size
 
     disp_dir, s = unpack_bone_disp_dir(header, flag, buf, offset + size)
     size += s
@@ -572,11 +865,8 @@ def unpack_bone(header, buf, offset=0):
 def pack_bone(header, p):
     result = bytearray()
     result += pack_name(header, p)
-    result += struct.pack('<3f', *p.position)
-    index_format = '<1{0}'.format(INDEX_FORMAT[header.bone_isize])
-    result += struct.pack(index_format, p.parent)
-    result += struct.pack('<1i', p.transform_hierarchy)
-    result += struct.pack('<1H', p.flag)
+    result += get_codec(header).bone_head.pack(
+        *p.position, p.parent, p.transform_hierarchy, p.flag)
     result += pack_bone_disp_dir(header, p.flag, p.disp_dir)
     result += pack_bone_additional_transform(
         header, p.flag, p.additional_transform)
@@ -617,105 +907,91 @@ MORPH_UV_PACK = '<1{0}4f'
 MORPH_MATERIAL_PACK = '<1{0}1B4f3f1f3f4f1f4f4f4f'
 MORPH_FLIP_PACK = '<1{0}1f'
 MORPH_IMPULSE_PACK = '<1{0}1B3f3f'
+morph_fixed_def = struct.Struct(MORPH_FIXED_PACK)
 
 
 def unpack_group_morph(header, buf, offset=0):
-    pack_format = MORPH_GROUP_PACK.format(INDEX_FORMAT[header.morph_isize])
+    offset_def = get_codec(header).morph_offsets[0]
     return (
-        morph_group._make(struct.unpack_from(pack_format, buf, offset)),
-        struct.calcsize(pack_format))
+        morph_group._make(offset_def.unpack_group(buf, offset)),
+        offset_def.size)
 
 
 def pack_group_morph(header, p):
-    pack_format = MORPH_GROUP_PACK.format(INDEX_FORMAT[header.morph_isize])
-    return struct.pack(pack_format, *p)
+    return get_codec(header).morph_offsets[0].pack(
+        *flatten_composite(*p))
 
 
 def unpack_vertex_morph(header, buf, offset=0):
-    pack_format = MORPH_VERTEX_PACK.format(
-        INDEX_FORMAT_VERTEX[header.vertex_isize])
-    p = struct.unpack_from(pack_format, buf, offset)
+    offset_def = get_codec(header).morph_offsets[1]
     return (
-        morph_vertex._make(group_tuple(pack_format, p)),
-        struct.calcsize(pack_format))
+        morph_vertex._make(offset_def.unpack_group(buf, offset)),
+        offset_def.size)
 
 
 def pack_vertex_morph(header, p):
-    pack_format = MORPH_VERTEX_PACK.format(
-        INDEX_FORMAT_VERTEX[header.vertex_isize])
-    return struct.pack(pack_format, *flatten_composite(*p))
+    return get_codec(header).morph_offsets[1].pack(
+        *flatten_composite(*p))
 
 
 def unpack_bone_morph(header, buf, offset=0):
-    pack_format = MORPH_BONE_PACK.format(
-        INDEX_FORMAT[header.bone_isize])
-    p = struct.unpack_from(pack_format, buf, offset)
+    offset_def = get_codec(header).morph_offsets[2]
     return (
-        morph_bone._make(group_tuple(pack_format, p)),
-        struct.calcsize(pack_format))
+        morph_bone._make(offset_def.unpack_group(buf, offset)),
+        offset_def.size)
 
 
 def pack_bone_morph(header, p):
-    pack_format = MORPH_BONE_PACK.format(
-        INDEX_FORMAT[header.bone_isize])
-    return struct.pack(pack_format, *flatten_composite(*p))
+    return get_codec(header).morph_offsets[2].pack(
+        *flatten_composite(*p))
 
 
 def unpack_uv_morph(header, buf, offset=0):
-    pack_format = MORPH_UV_PACK.format(
-        INDEX_FORMAT_VERTEX[header.vertex_isize])
-    p = struct.unpack_from(pack_format, buf, offset)
+    offset_def = get_codec(header).morph_offsets[3]
     return (
-        morph_uv._make(group_tuple(pack_format, p)),
-        struct.calcsize(pack_format))
+        morph_uv._make(offset_def.unpack_group(buf, offset)),
+        offset_def.size)
 
 
 def pack_uv_morph(header, p):
-    pack_format = MORPH_UV_PACK.format(
-        INDEX_FORMAT_VERTEX[header.vertex_isize])
-    return struct.pack(pack_format, *flatten_composite(*p))
+    return get_codec(header).morph_offsets[3].pack(
+        *flatten_composite(*p))
 
 
 def unpack_material_morph(header, buf, offset=0):
-    pack_format = MORPH_MATERIAL_PACK.format(
-        INDEX_FORMAT[header.material_isize])
-    p = struct.unpack_from(pack_format, buf, offset)
+    offset_def = get_codec(header).morph_offsets[8]
     return (
-        morph_material._make(group_tuple(pack_format, p)),
-        struct.calcsize(pack_format))
+        morph_material._make(offset_def.unpack_group(buf, offset)),
+        offset_def.size)
 
 
 def pack_material_morph(header, p):
-    pack_format = MORPH_MATERIAL_PACK.format(
-        INDEX_FORMAT[header.material_isize])
-    return struct.pack(pack_format, *flatten_composite(*p))
+    return get_codec(header).morph_offsets[8].pack(
+        *flatten_composite(*p))
 
 
 def unpack_flip_morph(header, buf, offset=0):
-    pack_format = MORPH_FLIP_PACK.format(INDEX_FORMAT[header.morph_isize])
+    offset_def = get_codec(header).morph_offsets[9]
     return (
-        morph_flip._make(struct.unpack_from(pack_format, buf, offset)),
-        struct.calcsize(pack_format))
+        morph_flip._make(offset_def.unpack_group(buf, offset)),
+        offset_def.size)
 
 
 def pack_flip_morph(header, p):
-    pack_format = MORPH_FLIP_PACK.format(INDEX_FORMAT[header.morph_isize])
-    return struct.pack(pack_format, *p)
+    return get_codec(header).morph_offsets[9].pack(
+        *flatten_composite(*p))
 
 
 def unpack_impulse_morph(header, buf, offset=0):
-    pack_format = MORPH_IMPULSE_PACK.format(
-        INDEX_FORMAT[header.rigid_body_isize])
-    p = struct.unpack_from(pack_format, buf, offset)
+    offset_def = get_codec(header).morph_offsets[10]
     return (
-        morph_impulse._make(group_tuple(pack_format, p)),
-        struct.calcsize(pack_format))
+        morph_impulse._make(offset_def.unpack_group(buf, offset)),
+        offset_def.size)
 
 
 def pack_impulse_morph(header, p):
-    pack_format = MORPH_IMPULSE_PACK.format(
-        INDEX_FORMAT[header.material_isize])
-    return struct.pack(pack_format, *flatten_composite(*p))
+    return get_codec(header).morph_offsets[10].pack(
+        *flatten_composite(*p))
 
 
 MORPH_FUNCTIONS = (
@@ -744,16 +1020,132 @@ MORPH_FUNCTIONS = (
 )
 
 
+# vertex and UV morphs: width of offset
+MORPH_ARRAY_WIDTH = {1: 3, 3: 4, 4: 4, 5: 4, 6: 4, 7: 4}
+
+
+def morph_array_dtype(header, morph_type):
+    return np.dtype([
+        ('vertex', FACE_DTYPES[header.vertex_isize]),
+        ('offset', '<f4', (MORPH_ARRAY_WIDTH[morph_type],))])
+
+
+def read_only(a):
+    '''a read-only view of the array a
+    '''
+    a = a.view()
+    a.flags.writeable = False
+    return a
+
+
+class morph_offset_array():
+    '''offsets of a vertex or UV morph as (index array, offset array).
+    Works as a tuple of morph_vertex/morph_uv, which are made on demand.
+    Immutable as the tuple is, the arrays are read-only views; to edit,
+    make a new one from copies of them.
+    '''
+    __slots__ = ('_morph_type', '_indexes', '_values', '_offsets')
+
+    def __init__(self, morph_type, indexes, values):
+        self._morph_type = morph_type
+        self._indexes = read_only(indexes)  # (N,) vertex indexes
+        self._values = read_only(values)  # (N, 3) or (N, 4) offsets
+        self._offsets = None
+
+    @property
+    def morph_type(self):
+        return self._morph_type
+
+    @property
+    def indexes(self):
+        return self._indexes
+
+    @property
+    def values(self):
+        return self._values
+
+    @classmethod
+    def from_offsets(cls, morph_type, offsets):
+        width = MORPH_ARRAY_WIDTH[morph_type]
+        return cls(
+            morph_type,
+            np.array([o[0] for o in offsets], FACE_DTYPES[4]),
+            np.array([o[1] for o in offsets], '<f4').reshape(-1, width))
+
+    def to_tuple(self):
+        if self._offsets is None:
+            make = morph_vertex if self.morph_type == 1 else morph_uv
+            self._offsets = tuple([
+                make(index, tuple(value)) for index, value in zip(
+                    self.indexes.tolist(), self.values.tolist())])
+        return self._offsets
+
+    def to_bytes(self, header):
+        a = np.empty(len(self.indexes), morph_array_dtype(
+            header, self.morph_type))
+        a['vertex'] = self.indexes
+        a['offset'] = self.values
+        return a.tobytes()
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __iter__(self):
+        return iter(self.to_tuple())
+
+    def __getitem__(self, index):
+        return self.to_tuple()[index]
+
+    def __eq__(self, other):
+        if isinstance(other, morph_offset_array):
+            return (
+                self.morph_type == other.morph_type and
+                np.array_equal(self.indexes, other.indexes) and
+                np.array_equal(self.values, other.values))
+        return self.to_tuple() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.to_tuple())
+
+    def __add__(self, other):
+        return self.to_tuple() + tuple(other)
+
+    def __radd__(self, other):
+        return tuple(other) + self.to_tuple()
+
+    def __repr__(self):
+        return repr(self.to_tuple())
+
+
+def unpack_morph_offset_array(header, morph_type, buf, offset, count):
+    '''count offsets of the vertex/UV morph in buf ->
+    (morph_offset_array, size) (no copy)
+    '''
+    a = np.frombuffer(
+        buf, morph_array_dtype(header, morph_type), count, offset)
+    return morph_offset_array(morph_type, a['vertex'], a['offset']), a.nbytes
+
+
 def unpack_morph(header, buf, offset=0):
     size = 0
     name_jp, name_en, s = unpack_name(header, buf, offset)
     size += s
-    category, morph_type, n_offsets = struct.unpack_from(
-        MORPH_FIXED_PACK, buf, offset + size)
-    size += struct.calcsize(MORPH_FIXED_PACK)
+    category, morph_type, n_offsets = morph_fixed_def.unpack_from(
+        buf, offset + size)
+    size += morph_fixed_def.size
+    if np is not None and morph_type in MORPH_ARRAY_WIDTH:
+        offsets, s = unpack_morph_offset_array(
+            header, morph_type, buf, offset + size, n_offsets)
+        size += s
+        return morph(
+            name_jp, name_en, category, morph_type, n_offsets, offsets), size
     offsets = list()
+    unpack = MORPH_FUNCTIONS[morph_type][0]
     for i in range(n_offsets):
-        m, s = MORPH_FUNCTIONS[morph_type][0](header, buf, offset + size)
+        m, s = unpack(header, buf, offset + size)
         offsets.append(m)
         size += s
     offsets = tuple(offsets)
@@ -764,10 +1156,13 @@ def unpack_morph(header, buf, offset=0):
 def pack_morph(header, p):
     result = bytearray()
     result += pack_name(header, p)
-    result += struct.pack(
-        MORPH_FIXED_PACK, p.category, p.morph_type, p.n_offsets)
+    result += morph_fixed_def.pack(p.category, p.morph_type, p.n_offsets)
+    if isinstance(p.offsets, morph_offset_array):
+        result += p.offsets.to_bytes(header)
+        return result
+    pack = MORPH_FUNCTIONS[p.morph_type][1]
     for offset in p.offsets:
-        result += MORPH_FUNCTIONS[p.morph_type][1](header, offset)
+        result += pack(header, offset)
     return result
 
 
@@ -781,6 +1176,7 @@ disp_node = namedtuple(
 disp_node_item = namedtuple(
     'disp_node_item', 'item_type index')
 DISP_NODE_FORMAT = '<1B1i'
+disp_node_def = struct.Struct(DISP_NODE_FORMAT)
 DISP_NODE_SPECIAL = 1
 DISP_NODE_NORMAL = 0
 DISP_NODE_ITEM_BONE = 0
@@ -797,19 +1193,17 @@ def unpack_disp_node(header, buf, offset=0):
     name_jp, name_en, s = unpack_name(header, buf, offset)
     size += s
 
-    is_special, n_disp_node_items = struct.unpack_from(
-        DISP_NODE_FORMAT, buf, offset + size)
-    size += struct.calcsize(DISP_NODE_FORMAT)
+    is_special, n_disp_node_items = disp_node_def.unpack_from(
+        buf, offset + size)
+    size += disp_node_def.size
+    index_defs = get_codec(header).disp_node_items
     disp_node_items = list()
     for i in range(n_disp_node_items):
-        item_type = struct.unpack_from('<1B', buf, offset + size)[0]
-        size += struct.calcsize('<1B')
-        if item_type == DISP_NODE_ITEM_BONE:
-            index_format = '<1{0}'.format(INDEX_FORMAT[header.bone_isize])
-        else:
-            index_format = '<1{0}'.format(INDEX_FORMAT[header.morph_isize])
-        index = struct.unpack_from(index_format, buf, offset + size)[0]
-        size += struct.calcsize(index_format)
+        item_type = buf[offset + size]
+        size += byte_def.size
+        index_def = index_defs.get(item_type, index_defs[DISP_NODE_ITEM_MORPH])
+        index = index_def.unpack_from(buf, offset + size)[0]
+        size += index_def.size
         disp_node_items.append(disp_node_item(item_type, index))
     return disp_node(
         name_jp, name_en, is_special, n_disp_node_items,
@@ -819,17 +1213,13 @@ def unpack_disp_node(header, buf, offset=0):
 def pack_disp_node(header, p):
     result = bytearray()
     result += pack_name(header, p)
-    result += struct.pack(DISP_NODE_FORMAT, p.is_special, p.n_disp_node_items)
-    pack_format = '<1B1{0}'
+    result += disp_node_def.pack(p.is_special, p.n_disp_node_items)
+    index_defs = get_codec(header).disp_node_items
     for item in p.disp_node_items:
-        if item.item_type == DISP_NODE_ITEM_BONE:
-            result += struct.pack(
-                pack_format.format(INDEX_FORMAT[header.bone_isize]),
-                *item)
-        else:
-            result += struct.pack(
-                pack_format.format(INDEX_FORMAT[header.morph_isize]),
-                *item)
+        index_def = index_defs.get(
+            item.item_type, index_defs[DISP_NODE_ITEM_MORPH])
+        result += byte_def.pack(item.item_type)
+        result += index_def.pack(item.index)
     return result
 
 
@@ -849,18 +1239,17 @@ def unpack_rigid_body(header, buf, offset=0):
     name_jp, name_en, s = unpack_name(header, buf, offset)
     size += s
 
-    pack_format = BODY_FORMAT.format(INDEX_FORMAT[header.bone_isize])
-    body_val = group_tuple(
-        pack_format, struct.unpack_from(pack_format, buf, offset + size))
-    size += struct.calcsize(pack_format)
+    body_def = get_codec(header).rigid_body
+    body_val = body_def.unpack_group(buf, offset + size)
+    size += body_def.size
     return rigid_body._make((name_jp, name_en) + body_val), size
 
 
 def pack_rigid_body(header, p):
     result = bytearray()
     result += pack_name(header, p)
-    pack_format = BODY_FORMAT.format(INDEX_FORMAT[header.bone_isize])
-    result += struct.pack(pack_format, *flatten_composite(*p[2:]))
+    result += get_codec(header).rigid_body.pack(
+        *flatten_composite(*p[2:]))
     return result
 
 
@@ -890,14 +1279,12 @@ def unpack_joint(header, buf, offset=0):
     name_jp, name_en, s = unpack_name(header, buf, offset)
     size += s
 
-    joint_type = struct.unpack_from('<1B', buf, offset + size)[0]
-    size += struct.calcsize('<1B')
+    joint_type = buf[offset + size]
+    size += byte_def.size
     if JOINT_6DOF_SPRING == joint_type:
-        pack_format = JOINT_FORMAT.format(
-            INDEX_FORMAT[header.rigid_body_isize])
-        joint_val = group_tuple(
-            pack_format, struct.unpack_from(pack_format, buf, offset + size))
-        size += struct.calcsize(pack_format)
+        joint_def = get_codec(header).joint
+        joint_val = joint_def.unpack_group(buf, offset + size)
+        size += joint_def.size
     else:
         joint_val = (None,) * 10
     return joint._make((name_jp, name_en, joint_type) + joint_val), size
@@ -906,11 +1293,9 @@ def unpack_joint(header, buf, offset=0):
 def pack_joint(header, p):
     result = bytearray()
     result += pack_name(header, p)
-    result += struct.pack('<1B', p.joint_type)
+    result += byte_def.pack(p.joint_type)
     if JOINT_6DOF_SPRING == p.joint_type:
-        pack_format = JOINT_FORMAT.format(
-            INDEX_FORMAT[header.rigid_body_isize])
-        result += struct.pack(pack_format, *flatten_composite(*p[3:]))
+        result += get_codec(header).joint.pack(*flatten_composite(*p[3:]))
     return result
 
 
@@ -1055,3 +1440,186 @@ PMX_IO_UTIL = {
     PMX_ELEMENTS[9]: (
         pack_soft_body, unpack_soft_body),  # 2.1
 }
+
+# elements which can be numpy arrays:
+# (elements -> array, unpack array, array -> elements, array -> bytes)
+PMX_ARRAY_UTIL = {
+    PMX_ELEMENTS[0]: (
+        pack_vertex_array, unpack_vertex_array, array_to_vertexes,
+        vertex_array_to_bytes),
+    PMX_ELEMENTS[1]: (
+        pack_face_array, unpack_face_array, array_to_faces,
+        face_array_to_bytes),
+}
+
+# header fields which the encoding of each element depends on
+PMX_LAYOUT = {
+    PMX_ELEMENTS[0]: ('n_exuvs', 'bone_isize'),
+    PMX_ELEMENTS[1]: ('vertex_isize',),
+    PMX_ELEMENTS[2]: ('encoding',),
+    PMX_ELEMENTS[3]: ('encoding', 'texture_isize'),
+    PMX_ELEMENTS[4]: ('encoding', 'bone_isize'),
+    PMX_ELEMENTS[5]: (
+        'encoding', 'vertex_isize', 'material_isize', 'bone_isize',
+        'morph_isize', 'rigid_body_isize'),
+    PMX_ELEMENTS[6]: ('encoding', 'bone_isize', 'morph_isize'),
+    PMX_ELEMENTS[7]: ('encoding', 'bone_isize'),
+    PMX_ELEMENTS[8]: ('encoding', 'rigid_body_isize'),
+    PMX_ELEMENTS[9]: (
+        'encoding', 'vertex_isize', 'material_isize', 'rigid_body_isize'),
+}
+
+
+def same_layout(element, header_a, header_b):
+    '''True if records of the element are encoded the same way in both
+    headers.
+    '''
+    for field in PMX_LAYOUT[element]:
+        if getattr(header_a, field) != getattr(header_b, field):
+            return False
+    return True
+
+
+# length-only walk of sections, without decoding records.
+# (header, buf, offset) -> size of the record
+def skip_string(buf, offset=0):
+    return count_def.size + count_def.unpack_from(buf, offset)[0]
+
+
+def skip_name(header, buf, offset=0):
+    size = skip_string(buf, offset)
+    return size + skip_string(buf, offset + size)
+
+
+def skip_vertex(header, buf, offset=0):
+    size = vertex_fixed.size + 16 * header.n_exuvs
+    weight_type = buf[offset + size]
+    return (size + weight_type_def.size +
+            get_codec(header).weights[weight_type].size + edge_mag_def.size)
+
+
+def skip_texture(header, buf, offset=0):
+    return skip_string(buf, offset)
+
+
+def skip_material(header, buf, offset=0):
+    size = skip_name(header, buf, offset)
+    size += material_fixed1.size + 2 * header.texture_isize
+    toon_flag = buf[offset + size + 1]
+    size += material_fixed2.size
+    size += header.texture_isize if 0 == toon_flag else 1
+    size += skip_string(buf, offset + size)
+    return size + 4
+
+
+MORPH_OFFSET_FORMATS = (
+    (MORPH_GROUP_PACK, 'morph_isize'),
+    (MORPH_VERTEX_PACK, 'vertex_isize'),
+    (MORPH_BONE_PACK, 'bone_isize'),
+    (MORPH_UV_PACK, 'vertex_isize'),
+    (MORPH_UV_PACK, 'vertex_isize'),
+    (MORPH_UV_PACK, 'vertex_isize'),
+    (MORPH_UV_PACK, 'vertex_isize'),
+    (MORPH_UV_PACK, 'vertex_isize'),
+    (MORPH_MATERIAL_PACK, 'material_isize'),
+    (MORPH_FLIP_PACK, 'morph_isize'),
+    (MORPH_IMPULSE_PACK, 'rigid_body_isize'),
+)
+
+
+def skip_morph(header, buf, offset=0):
+    size = skip_name(header, buf, offset)
+    category, morph_type, n_offsets = morph_fixed_def.unpack_from(
+        buf, offset + size)
+    size += morph_fixed_def.size
+    return size + n_offsets * get_codec(header).morph_offsets[morph_type].size
+
+
+def skip_bone(header, buf, offset=0):
+    codec = get_codec(header)
+    size = skip_name(header, buf, offset) + codec.bone_head.size
+    flag = bone_flag_def.unpack_from(buf, offset + size - 2)[0]
+    if flag & BONE_DISP_DIR == BONE_DISP_DIR:
+        size += codec.bone_index.size
+    else:
+        size += bone_coordinates_def.size
+    if flag & (BONE_ADD_ROTATE | BONE_ADD_TRANSLATE) > 0:
+        size += codec.bone_additional_transform.size
+    if flag & BONE_AXIS_IS_FIXED == BONE_AXIS_IS_FIXED:
+        size += bone_coordinates_def.size
+    if flag & BONE_ASSIGN_LOCAL_AXIES == BONE_ASSIGN_LOCAL_AXIES:
+        size += bone_local_axises_def.size
+    if flag & BONE_EXTERNAL_PARENT == BONE_EXTERNAL_PARENT:
+        size += bone_ex_parent_def.size
+    if flag & BONE_IS_IK == BONE_IS_IK:
+        size += codec.bone_index.size
+        n_links = bone_ik_def.unpack_from(buf, offset + size)[2]
+        size += bone_ik_def.size
+        for i in range(n_links):
+            size += codec.bone_index.size
+            angle_is_limited = buf[offset + size]
+            size += 1
+            if angle_is_limited > 0:
+                size += bone_local_axises_def.size
+    return size
+
+
+def skip_disp_node(header, buf, offset=0):
+    size = skip_name(header, buf, offset)
+    n_disp_node_items = disp_node_def.unpack_from(buf, offset + size)[1]
+    size += disp_node_def.size
+    index_defs = get_codec(header).disp_node_items
+    for i in range(n_disp_node_items):
+        item_type = buf[offset + size]
+        size += byte_def.size
+        size += index_defs.get(
+            item_type, index_defs[DISP_NODE_ITEM_MORPH]).size
+    return size
+
+
+def skip_rigid_body(header, buf, offset=0):
+    return skip_name(header, buf, offset) + get_codec(header).rigid_body.size
+
+
+def skip_joint(header, buf, offset=0):
+    size = skip_name(header, buf, offset)
+    joint_type = buf[offset + size]
+    size += byte_def.size
+    if JOINT_6DOF_SPRING == joint_type:
+        size += get_codec(header).joint.size
+    return size
+
+
+PMX_SKIP = {
+    PMX_ELEMENTS[0]: skip_vertex,
+    PMX_ELEMENTS[2]: skip_texture,
+    PMX_ELEMENTS[3]: skip_material,
+    PMX_ELEMENTS[4]: skip_bone,
+    PMX_ELEMENTS[5]: skip_morph,
+    PMX_ELEMENTS[6]: skip_disp_node,
+    PMX_ELEMENTS[7]: skip_rigid_body,
+    PMX_ELEMENTS[8]: skip_joint,
+}
+
+
+def skip_section(header, element, buf, offset, count):
+    '''Return the size of count records of the element in buf.
+    Records without PMX_SKIP are decoded and thrown away.
+    '''
+    if element == 'faces':
+        return count * 3 * header.vertex_isize
+    if element == 'vertexes' and np is not None and count > 0:
+        starts, positions, weight_types, lengths = find_vertex_runs(
+            header, buf, offset, count)
+        record_size = vertex_record_dtype(header, weight_types[-1]).itemsize
+        return positions[-1] + lengths[-1] * record_size - offset
+    skip = PMX_SKIP.get(element)
+    if skip is None:
+        unpack = PMX_IO_UTIL[element][1]
+
+        def skip(header, buf, offset):
+            return unpack(header, buf, offset)[1]
+    size = 0
+    for index in range(count):
+        size += skip(header, buf, offset + size)
+    return size
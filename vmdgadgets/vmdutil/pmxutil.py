@@ -1,5 +1,11 @@
+import os
 import heapq
+import multiprocessing
 from .import pmxdef
+from . import sidecar
+
+CHUNK_SIZE = 1 << 20  # for streaming output
+BLOCK_ROWS = 1 << 12  # rows of an array encoded at once
 
 
 class Bonegraph():
@@ -124,23 +130,102 @@ class Pmxio():
             pmxdef.PMX_HEADER, 2.0, 8, 0, 0,
             vindex, index, index, index, index, index)
         self.counts = {}
-        self.elements = {}
+        self.elements = {}  # None: not decoded yet
+        self.arrays = {}  # numpy arrays, see pmxdef.PMX_ARRAY_UTIL
+        self.spans = {}  # (start, end) in self.buf of sections not set
+        self.index_dicts = {}  # {name_jp: index}, built on demand
         for element in pmxdef.PMX_ELEMENTS:
             self.counts[element] = pmxdef.count(0)
             self.elements[element] = []
 
     def get_elements(self, element):
-        return self.elements[element]
+        elements = self.elements[element]
+        if elements is None:
+            if element in self.arrays:
+                elements = pmxdef.PMX_ARRAY_UTIL[element][2](
+                    self.arrays[element])
+            else:
+                elements = self.decode_section(element)
+            self.elements[element] = elements
+        return elements
 
     def set_elements(self, element, o):
         self.counts[element] = pmxdef.count(len(o))
         self.elements[element] = o
+        self.arrays.pop(element, None)
+        self.spans.pop(element, None)
+        self.index_dicts.pop(element, None)
+
+    def append_elements(self, element, o):
+        '''Append o to the elements, keeping the index dict up to date.
+        '''
+        elements = self.get_elements(element)
+        index_dict = self.index_dicts.get(element)
+        if index_dict is not None:
+            for index, obj in enumerate(o, len(elements)):
+                index_dict[obj.name_jp] = index
+        elements.extend(o)
+        self.counts[element] = pmxdef.count(len(elements))
+        self.arrays.pop(element, None)
+        self.spans.pop(element, None)
+
+    def get_index_dict(self, element):
+        '''Return {name_jp: index} of bones, morphs, materials etc.
+        The dict is shared, do not modify it.
+        '''
+        index_dict = self.index_dicts.get(element)
+        if index_dict is None:
+            index_dict = make_index_dict(self.get_elements(element))
+            self.index_dicts[element] = index_dict
+        return index_dict
+
+    def get_array(self, element):
+        '''Return vertexes as a numpy structured array
+        (see pmxdef.vertex_array_dtype), or faces as a (N, 3) array.
+        '''
+        self.spans.pop(element, None)  # may be modified in place
+        a = self.arrays.get(element)
+        if a is None:
+            pack, unpack = pmxdef.PMX_ARRAY_UTIL[element][:2]
+            if self.elements[element] is None:  # not decoded
+                a = unpack(
+                    self.buf_header, self.buf, self.sections[element],
+                    self.counts[element].count)[0]
+            else:
+                a = pack(self.header, self.get_elements(element))
+            self.arrays[element] = a
+        return a
+
+    def set_array(self, element, a):
+        self.counts[element] = pmxdef.count(len(a))
+        self.elements[element] = None
+        self.arrays[element] = a
+        self.spans.pop(element, None)
+        self.index_dicts.pop(element, None)
+
+    def decode_section(self, element):
+        elements = []
+        offset = self.sections.get(element)
+        if offset is None:
+            return elements
+        unpack = pmxdef.PMX_IO_UTIL[element][1]
+        for index in range(self.counts[element].count):
+            obj, size = unpack(self.buf_header, self.buf, offset)
+            offset += size
+            elements.append(obj)
+        return elements
 
-    def read_bytes(self):
+    def read_bytes(self, arrays=False, sections=None):
+        if arrays and pmxdef.np is None:
+            raise ImportError('numpy is required to read as arrays')
         offset = 0
         filesize = len(self.buf)
+        self.sections = {}  # offset of the first record
+        self.spans = {}
+        self.index_dicts = {}
         # header
         self.header, size = pmxdef.unpack_header(self.buf, offset)
+        self.buf_header = self.header
         offset += size
         # model info
         self.model_info, size = pmxdef.unpack_model_info(
@@ -156,26 +241,118 @@ class Pmxio():
             if element == 'faces':
                 c = c._replace(count=c.count // 3)
             self.counts[element] = c
-            for index in range(self.counts[element].count):
-                obj, size = pmxdef.PMX_IO_UTIL[element][1](
-                    self.header, self.buf, offset)
+            self.sections[element] = offset
+            decode = sections is not None and element in sections
+            if (arrays and element in pmxdef.PMX_ARRAY_UTIL and
+                    (sections is None or decode)):
+                # namedtuples are made on demand in get_elements()
+                unpack = pmxdef.PMX_ARRAY_UTIL[element][1]
+                self.arrays[element], size = unpack(
+                    self.header, self.buf, offset, c.count)
                 offset += size
-                self.elements[element].append(obj)
-
-    def load(self, filename):
+                self.elements[element] = None
+            elif decode:
+                for index in range(c.count):
+                    obj, size = pmxdef.PMX_IO_UTIL[element][1](
+                        self.header, self.buf, offset)
+                    offset += size
+                    self.elements[element].append(obj)
+            else:
+                # walked through, decoded on demand in get_elements()
+                offset += pmxdef.skip_section(
+                    self.header, element, self.buf, offset, c.count)
+                self.elements[element] = None
+            self.spans[element] = (self.sections[element], offset)
+
+    def load(self, filename, arrays=False, sections=None, cache=None):
+        '''Load pmx file.
+
+        Sections are walked through by their length, and each of them
+        is decoded when get_elements() asks for it first. If sections
+        is given, those elements are decoded at once.
+        If arrays is True, vertexes and faces are read into numpy
+        arrays, see get_array(). If sections is given too, only those
+        in sections are.
+        Sections never decoded by get_elements() nor given by
+        get_array() are written back by copying their bytes, unless
+        index sizes they use are changed.
+        cache is a sidecar.SidecarCache, True for the sidecar file next to
+        the pmx file or False. By default the cache directory given by
+        VMDUTIL_CACHE_DIR is used if it is set. On a hit, the file and
+        its vertex and face arrays are read from the cache, and sections
+        are decoded on demand.
+        '''
         if len(self.counts) > 0:
             self.__init__()
+        if cache is None:
+            cache = sidecar.default_cache()
+        elif cache is True:
+            cache = sidecar.SidecarCache()
+        if cache:
+            cached = cache.get(filename)
+            if cached is not None:
+                self.restore_sections(cached)
+                return
         f = open(filename, 'rb')
         self.buf = f.read()
         f.close()
         del f
-        self.read_bytes()
+        self.read_bytes(arrays, sections)
+        if cache:
+            cache.put(filename, self.dump_sections())
 
-    def load_fd(self, reader):
+    def load_fd(self, reader, arrays=False, sections=None):
         if len(self.counts) > 0:
             self.__init__()
         self.buf = reader.read()
-        self.read_bytes()
+        self.read_bytes(arrays, sections)
+
+    def dump_sections(self):
+        '''Return self.buf, section offsets and vertex and face arrays
+        as {name: array} for sidecar.SidecarCache.
+        '''
+        np = pmxdef.np
+        result = {
+            'buf': np.frombuffer(self.buf, np.uint8),
+            'counts': np.array([
+                self.counts[element].count
+                for element in pmxdef.PMX_ELEMENTS], np.int64),
+            'spans': np.array([
+                self.spans.get(element, (-1, -1))
+                for element in pmxdef.PMX_ELEMENTS], np.int64),
+        }
+        for element, (to_array, unpack, to_elements, to_bytes) in (
+                pmxdef.PMX_ARRAY_UTIL.items()):
+            offset = self.sections.get(element)
+            if offset is not None:
+                result[element] = unpack(
+                    self.buf_header, self.buf, offset,
+                    self.counts[element].count)[0]
+        return result
+
+    def restore_sections(self, sections):
+        '''Restore sections returned by dump_sections().
+        '''
+        self.buf = sections['buf'].tobytes()
+        self.header, size = pmxdef.unpack_header(self.buf, 0)
+        self.buf_header = self.header
+        self.model_info, size = pmxdef.unpack_model_info(
+            self.header, self.buf, size)
+        self.sections = {}
+        self.spans = {}
+        self.index_dicts = {}
+        counts = sections['counts'].tolist()
+        spans = sections['spans'].tolist()
+        for index, element in enumerate(pmxdef.PMX_ELEMENTS):
+            self.counts[element] = pmxdef.count(counts[index])
+            start, end = spans[index]
+            if start < 0:
+                continue
+            self.sections[element] = start
+            self.spans[element] = (start, end)
+            self.elements[element] = None
+            if element in sections:
+                self.arrays[element] = sections[element]
 
     def update_header(self):
         def isize(o):
@@ -191,31 +368,101 @@ class Pmxio():
 
     def to_bytes(self):
         buf = bytearray()
+        for chunk in self.iter_bytes():
+            buf += chunk
+        return buf
+
+    def iter_bytes(self, chunk_size=CHUNK_SIZE):
+        '''Yield the pmx file in chunks of about chunk_size bytes,
+        encoding each section as it goes.
+        '''
         self.update_header()
         # header
-        buf += pmxdef.pack_header(self.header)
+        buf = bytearray(pmxdef.pack_header(self.header))
         # model info
         buf += pmxdef.pack_model_info(self.header, self.model_info)
         # others
         for element in pmxdef.PMX_ELEMENTS[:-1]:
-            count = len(self.elements[element])
+            span = self.spans.get(element)
+            if (span is not None and self.elements[element] is None and
+                    pmxdef.same_layout(
+                        element, self.buf_header, self.header)):
+                # never decoded, copy as it is
+                count = self.counts[element].count
+                if 'faces' == element:
+                    count *= 3
+                buf += pmxdef.pack_count(pmxdef.count(count))
+                yield buf
+                buf = bytearray()
+                view = memoryview(self.buf)
+                for begin in range(span[0], span[1], chunk_size):
+                    yield view[begin:min(begin + chunk_size, span[1])]
+                continue
+            if self.elements[element] is None and element in self.arrays:
+                # write the array by blocks of rows
+                objs = self.arrays[element]
+                to_bytes = pmxdef.PMX_ARRAY_UTIL[element][3]
+            else:
+                objs = self.get_elements(element)
+                to_bytes = None
+            count = len(objs)
             if 'faces' == element:
                 count *= 3
-            count = pmxdef.count(count)
-            buf += pmxdef.pack_count(count)
-            for obj in self.elements[element]:
-                buf += pmxdef.PMX_IO_UTIL[element][0](self.header, obj)
-        return buf
+            buf += pmxdef.pack_count(pmxdef.count(count))
+            if to_bytes is not None:
+                for begin in range(0, len(objs), BLOCK_ROWS):
+                    buf += to_bytes(
+                        self.header, objs[begin:begin + BLOCK_ROWS])
+                    if len(buf) >= chunk_size:
+                        yield buf
+                        buf = bytearray()
+                continue
+            pack = pmxdef.PMX_IO_UTIL[element][0]
+            for obj in objs:
+                buf += pack(self.header, obj)
+                if len(buf) >= chunk_size:
+                    yield buf
+                    buf = bytearray()
+        if buf:
+            yield buf
 
     def store(self, filename):
-        buf = self.to_bytes()
-        f = open(filename, 'wb')
-        f.write(buf)
-        f.close()
+        # write to a temporary file first, not to leave a broken file
+        # on an error while encoding
+        tmp = '{}.{}.tmp'.format(filename, os.getpid())
+        try:
+            with open(tmp, 'wb') as f:
+                self.store_fd(f)
+            os.replace(tmp, filename)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
 
     def store_fd(self, writer):
-        buf = self.to_bytes()
-        writer.write(buf)
+        for chunk in self.iter_bytes():
+            writer.write(chunk)
+
+
+def _map_model(args):
+    func, filename, load_args = args
+    pmx = Pmxio()
+    pmx.load(filename, **load_args)
+    return func(pmx)
+
+
+def map_models(func, filenames, workers=None, **load_args):
+    '''Load each pmx file and return [func(pmx)] in the order of
+    filenames, in workers processes (all cores if None).
+    func should be a module level function, and its results are sent
+    back by pickle, so return what is needed rather than pmx itself.
+    load_args are passed to Pmxio.load().
+    '''
+    tasks = [(func, filename, load_args) for filename in filenames]
+    if workers == 1:
+        return [_map_model(task) for task in tasks]
+    with multiprocessing.Pool(workers) as pool:
+        return pool.map(_map_model, tasks, chunksize=1)
 
 
 def make_index_dict(elements):
@@ -0,0 +1,137 @@
+'''on-disk cache of parsed pmx files
+
+Parsed sections are stored as .npz files, keyed by path, size and mtime
+of the source file (and its content hash if use_hash is True).
+Set the environment variable VMDUTIL_CACHE_DIR to enable the cache
+directory for all loads, and VMDUTIL_CACHE_SIZE to limit its total size
+in bytes. Least recently used files are removed first.
+'''
+import os
+import hashlib
+import zipfile
+from . import vmddef
+
+np = vmddef.np
+CACHE_DIR_ENV = 'VMDUTIL_CACHE_DIR'
+CACHE_SIZE_ENV = 'VMDUTIL_CACHE_SIZE'
+CACHE_SIZE = 1 << 30
+SUFFIX = '.npz'
+KEY = '__key__'
+
+
+class SidecarCache:
+    '''Cache of parsed files.
+
+    If cache_dir is None, the cache is a sidecar file next to the source
+    file (foo.pmx -> foo.pmx.npz), and is not evicted.
+    '''
+    def __init__(self, cache_dir=None, max_size=CACHE_SIZE, use_hash=False):
+        if np is None:
+            raise ImportError('numpy is required for SidecarCache')
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.use_hash = use_hash
+        self.hits = 0
+        self.misses = 0
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def make_key(self, filename):
+        st = os.stat(filename)
+        key = '{}\0{}\0{}'.format(
+            os.path.abspath(filename), st.st_size, st.st_mtime_ns)
+        if self.use_hash:
+            h = hashlib.sha1()
+            with open(filename, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    h.update(chunk)
+            key += '\0' + h.hexdigest()
+        return key
+
+    def cache_path(self, filename, key):
+        if self.cache_dir is None:
+            return filename + SUFFIX
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, name + SUFFIX)
+
+    def get(self, filename):
+        '''Return {name: array} stored for the file, or None.
+        '''
+        key = self.make_key(filename)
+        path = self.cache_path(filename, key)
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                if npz[KEY].tobytes().decode('utf-8') != key:
+                    raise KeyError(key)  # stale sidecar
+                arrays = {name: npz[name] for name in npz.files}
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            self.misses += 1
+            return None
+        os.utime(path)  # recently used
+        self.hits += 1
+        del arrays[KEY]
+        return arrays
+
+    def put(self, filename, arrays):
+        '''Store {name: array} for the file.
+        '''
+        key = self.make_key(filename)
+        path = self.cache_path(filename, key)
+        tmp = '{}.{}.tmp'.format(path, os.getpid())
+        try:
+            with open(tmp, 'wb') as f:
+                np.savez(f, **arrays, **{
+                    KEY: np.frombuffer(key.encode('utf-8'), np.uint8)})
+            os.replace(tmp, path)
+        except OSError:  # read-only place etc.
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self.evict()
+
+    def entries(self):
+        '''Return [(mtime, size, path)] of cache files, oldest first.
+        '''
+        if self.cache_dir is None:
+            return []
+        result = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(SUFFIX):
+                st = entry.stat()
+                result.append((st.st_mtime, st.st_size, entry.path))
+        return sorted(result)
+
+    def total_size(self):
+        return sum([size for mtime, size, path in self.entries()])
+
+    def evict(self):
+        entries = self.entries()
+        total = sum([size for mtime, size, path in entries])
+        for mtime, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        for mtime, size, path in self.entries():
+            os.remove(path)
+
+
+_default_cache = None
+
+
+def default_cache():
+    '''Return the cache set by VMDUTIL_CACHE_DIR, or None.
+    '''
+    global _default_cache
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if not cache_dir or np is None:
+        return None
+    if _default_cache is None or _default_cache.cache_dir != cache_dir:
+        max_size = int(os.environ.get(CACHE_SIZE_ENV, CACHE_SIZE))
+        _default_cache = SidecarCache(cache_dir, max_size)
+    return _default_cache
@@ -1,5 +1,11 @@
 import math
+try:
+    import numpy as np
+except ImportError:  # numpy is optional
+    np = None
+
 EPS = 0.000001
+MAX_ITERATIONS = 64
 
 # Cubic bezier curves
 BEZIER3 = [[-1, 3, -3, 1], [3, -6, 3, 0], [-3, 3, 0, 0], [1, 0, 0, 0]]
@@ -25,6 +31,17 @@ def bezier3f(control_points, t):
     return t3 * _A(x) + t2 * _B(x) + t * _C(x) + _D(x)
 
 
+def bezier3f_samples(control_points, ts):
+    '''[bezier3f(control_points, t) for t in ts],
+    ts may be a numpy array to get the same values as an array.
+    '''
+    x = control_points
+    a, b, c, d = _A(x), _B(x), _C(x), _D(x)
+    if np is not None and isinstance(ts, np.ndarray):
+        return ts * ts * ts * a + ts * ts * b + ts * c + d
+    return [t * t * t * a + t * t * b + t * c + d for t in ts]
+
+
 def bezier3f_dt(control_points, t):
     t2 = t * t
     x = control_points
@@ -32,14 +49,28 @@ def bezier3f_dt(control_points, t):
 
 
 def _n(f, fd, t):
-    x = f(t)
-    if abs(x) < EPS:
-        return t
-    else:
-        return _n(f, fd, t - (x / fd(t)))
+    # Newton's method, falls back to bisection when a step leaves
+    # [lo, hi] where f changes its sign. f should be increasing on [0, 1].
+    lo, hi = 0.0, 1.0
+    for i in range(MAX_ITERATIONS):
+        x = f(t)
+        if abs(x) < EPS:
+            break
+        if x < 0:
+            lo = t
+        else:
+            hi = t
+        d = fd(t)
+        next_t = t - x / d if d != 0 else lo
+        t = next_t if lo < next_t < hi else (lo + hi) / 2
+    return t
 
 
 def bezier3f_x2t(control_points, x):
+    '''Return t where the x of the curve is x, by the same steps as
+    bezier3f_x2t_array, which is not called here: numpy is optional,
+    and one x through numpy is about four times slower.
+    '''
     if x > .5:
         init = 0.7
     else:
@@ -54,6 +85,68 @@ def bezier3f_x2t(control_points, x):
     return _n(f, fd, init)
 
 
+def _coefficients(control_points):
+    # (..., 4) -> A, B, C, D of (...)
+    p = np.asarray(control_points, np.float64)
+    p0, p1, p2, p3 = p[..., 0], p[..., 1], p[..., 2], p[..., 3]
+    return (-p0 + 3 * p1 - 3 * p2 + p3, 3 * p0 - 6 * p1 + 3 * p2,
+            -3 * p0 + 3 * p1, p0)
+
+
+def bezier3f_array(control_points, t):
+    '''bezier3f for arrays, control_points: (..., 4), t: (...)
+    '''
+    a, b, c, d = _coefficients(control_points)
+    t = np.asarray(t, np.float64)
+    t2 = t * t
+    return t2 * t * a + t2 * b + t * c + d
+
+
+def bezier3f_x2t_array(control_points, x):
+    '''bezier3f_x2t for arrays, control_points: (..., 4), x: (...)
+
+    Every x is solved by the same steps as bezier3f_x2t, at once.
+    '''
+    a, b, c, d = _coefficients(control_points)
+    x = np.asarray(x, np.float64)
+    shape = np.broadcast(a, x).shape
+    # rows of a, b, c, d and x, columns of x not solved yet
+    curves = np.stack([
+        v.ravel() for v in np.broadcast_arrays(a, b, c, d, x)])
+    result = np.empty(curves.shape[1])
+    index = np.arange(curves.shape[1])
+    t = np.where(curves[4] > .5, 0.7, 0.3)
+    lo = np.zeros_like(t)
+    hi = np.ones_like(t)
+    # lo <= t <= hi holds, so the bracket is updated by min/max
+    # rather than by masks, which are slow for random patterns.
+    for i in range(MAX_ITERATIONS):
+        a, b, c, d, x = curves
+        t2 = t * t
+        f = t2 * t * a + t2 * b + t * c + d - x
+        solved = np.abs(f) < EPS
+        if solved.any():
+            done = np.flatnonzero(solved)
+            result[index.take(done)] = t.take(done)
+            active = np.flatnonzero(~solved)
+            if len(active) == 0:
+                return result.reshape(shape)
+            index = index[active]
+            curves = curves.take(active, 1)
+            a, b, c, d, x = curves
+            t, t2, f, lo, hi = [v.take(active) for v in (t, t2, f, lo, hi)]
+        neg = f < 0
+        lo = np.maximum(lo, t * neg)  # t if f < 0
+        hi = np.minimum(hi, t + 2.0 * neg)  # t if f >= 0
+        fd = 3 * t2 * a + 2 * t * b + c
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = t - f / fd
+        out = np.flatnonzero(~((lo < t) & (t < hi)))  # and nan
+        t[out] = (lo[out] + hi[out]) / 2
+    result[index] = t
+    return result.reshape(shape)
+
+
 def mirror_cp(cp):
     def m(p):
         return (cp[3][0] - p[0], cp[3][1] - p[1])
@@ -3,6 +3,10 @@
 from collections import namedtuple
 import struct
 import codecs
+try:
+    import numpy as np
+except ImportError:  # numpy is optional
+    np = None
 
 ENCODING = 'shift-jis'
 LEFT = '左'
@@ -29,6 +33,10 @@ def pack_header(p):
     return header_def.pack(*p)
 
 
+def pack_header_into(buf, offset, p):
+    header_def.pack_into(buf, offset, *p)
+
+
 #
 # typedef struct VmdCount_t {
 #     uint32_t count;
@@ -47,6 +55,10 @@ def pack_count(p):
     return count_def.pack(*p)
 
 
+def pack_count_into(buf, offset, p):
+    count_def.pack_into(buf, offset, *p)
+
+
 # typedef struct VmdBoneFrame_t {
 #     char name[15];
 #     uint32_t frame;
@@ -61,15 +73,24 @@ bone = namedtuple(
     'name frame position rotation interpolation')
 
 
-def unpack_bone(buf, offset=0):
-    bf = bone_def.unpack_from(buf, offset)
+def make_bone(bf):
     return bone._make(
         (bf[0], bf[1], bf[2:5], bf[5:9], bf[9:]))
 
 
+def unpack_bone(buf, offset=0):
+    return make_bone(bone_def.unpack_from(buf, offset))
+
+
 def pack_bone(p):
-    expanded = (p.name, p.frame) + p.position + p.rotation + p.interpolation
-    return bone_def.pack(*expanded)
+    return bone_def.pack(
+        p.name, p.frame, *p.position, *p.rotation, *p.interpolation)
+
+
+def pack_bone_into(buf, offset, p):
+    bone_def.pack_into(
+        buf, offset, p.name, p.frame,
+        *p.position, *p.rotation, *p.interpolation)
 
 
 def bone_vmdformat_to_controlpoints(interpolation):
@@ -158,6 +179,10 @@ def pack_morph(p):
     return morph_def.pack(*p)
 
 
+def pack_morph_into(buf, offset, p):
+    morph_def.pack_into(buf, offset, *p)
+
+
 # typedef struct VmdCameraFrame {
 #     uint32_t frame;
 #     float distance;
@@ -173,17 +198,26 @@ camera = namedtuple(
     'frame distance position rotation interpolation angle_of_view perspective')
 
 
-def unpack_camera(buf, offset=0):
-    cf = camera_def.unpack_from(buf, offset)
+def make_camera(cf):
     return camera._make(
         (cf[0], cf[1], cf[2:5], cf[5:8], cf[8:32], cf[32], cf[33]))
 
 
+def unpack_camera(buf, offset=0):
+    return make_camera(camera_def.unpack_from(buf, offset))
+
+
 def pack_camera(p):
-    expanded = (p.frame, p.distance)\
-        + p.position + p.rotation + p.interpolation\
-        + (p.angle_of_view, p.perspective)
-    return camera_def.pack(*expanded)
+    return camera_def.pack(
+        p.frame, p.distance, *p.position, *p.rotation, *p.interpolation,
+        p.angle_of_view, p.perspective)
+
+
+def pack_camera_into(buf, offset, p):
+    camera_def.pack_into(
+        buf, offset, p.frame, p.distance,
+        *p.position, *p.rotation, *p.interpolation,
+        p.angle_of_view, p.perspective)
 
 
 def camera_vmdformat_to_controlpoints(interpolation):
@@ -236,17 +270,24 @@ light_def = struct.Struct('<1I3f3f')
 light = namedtuple('light', 'frame rgb direction')
 
 
-def unpack_light(buf, offset=0):
-    lf = light_def.unpack_from(buf, offset)
+def make_light(lf):
     return light._make(
         (lf[0], lf[1:4], lf[4:7]))
 
 
+def unpack_light(buf, offset=0):
+    return make_light(light_def.unpack_from(buf, offset))
+
+
 def pack_light(p):
     expanded = (p.frame,) + p.rgb + p.direction
     return light_def.pack(*expanded)
 
 
+def pack_light_into(buf, offset, p):
+    light_def.pack_into(buf, offset, p.frame, *p.rgb, *p.direction)
+
+
 LIGHT_SAMPLE = light(
     frame=0, rgb=(0.6019999980926514, 0.6019999980926514, 0.6019999980926514),
     direction=(-0.5, -1.0, 0.5))
@@ -271,6 +312,10 @@ def pack_selfshadow(p):
     return selfshadow_def.pack(*p)
 
 
+def pack_selfshadow_into(buf, offset, p):
+    selfshadow_def.pack_into(buf, offset, *p)
+
+
 # typedef struct VmdIKInfo_t {
 #     char name[20];
 #     uint8_t on_off;
@@ -288,6 +333,10 @@ def pack_ikinfo(p):
     return ikinfo_def.pack(*p)
 
 
+def pack_ikinfo_into(buf, offset, p):
+    ikinfo_def.pack_into(buf, offset, *p)
+
+
 # typedef struct VmdShowIKFrame_t {
 #     uint32_t frame;
 #     uint8_t show;
@@ -319,6 +368,14 @@ def pack_showik(p):
     return buf
 
 
+def pack_showik_into(buf, offset, p):
+    showik_def.pack_into(buf, offset, *p[:-1])
+    offset += showik_def.size
+    for ik in p[-1]:
+        pack_ikinfo_into(buf, offset, ik)
+        offset += ikinfo_def.size
+
+
 dummy_struct = struct.Struct('')
 
 
@@ -334,25 +391,349 @@ VMD_ELEMENTS = (
     'bones', 'morphs', 'cameras', 'lights',
     'selfshadows', 'showiks')
 
-# (size, pack, unpack)
+# (size, pack, unpack, pack_into)
 VMD_IO_UTIL = {
     VMD_ELEMENTS[0]: (
         lambda f: bone_def.size,
-        pack_bone, unpack_bone),
+        pack_bone, unpack_bone, pack_bone_into),
     VMD_ELEMENTS[1]: (
         lambda f: morph_def.size,
-        pack_morph, unpack_morph),
+        pack_morph, unpack_morph, pack_morph_into),
     VMD_ELEMENTS[2]: (
         lambda f: camera_def.size,
-        pack_camera, unpack_camera),
+        pack_camera, unpack_camera, pack_camera_into),
     VMD_ELEMENTS[3]: (
         lambda f: light_def.size,
-        pack_light, unpack_light),
+        pack_light, unpack_light, pack_light_into),
     VMD_ELEMENTS[4]: (
         lambda f: selfshadow_def.size,
-        pack_selfshadow, unpack_selfshadow),
+        pack_selfshadow, unpack_selfshadow, pack_selfshadow_into),
     VMD_ELEMENTS[5]: (
         lambda f: showik_def.size +
         f.ik_count * ikinfo_def.size,
-        pack_showik, unpack_showik),
+        pack_showik, unpack_showik, pack_showik_into),
+}
+
+# namedtuple of each element
+VMD_RECORDS = {
+    VMD_ELEMENTS[0]: bone,
+    VMD_ELEMENTS[1]: morph,
+    VMD_ELEMENTS[2]: camera,
+    VMD_ELEMENTS[3]: light,
+    VMD_ELEMENTS[4]: selfshadow,
+    VMD_ELEMENTS[5]: showik,
+}
+
+# fixed size elements: (struct, make namedtuple from unpacked values)
+VMD_FIXED = {
+    VMD_ELEMENTS[0]: (bone_def, make_bone),
+    VMD_ELEMENTS[1]: (morph_def, morph._make),
+    VMD_ELEMENTS[2]: (camera_def, make_camera),
+    VMD_ELEMENTS[3]: (light_def, make_light),
+    VMD_ELEMENTS[4]: (selfshadow_def, selfshadow._make),
 }
+
+# numpy structured types of fixed size elements.
+# they are packed, so the layout is equal to *_def.
+if np is not None:
+    bone_dtype = np.dtype([
+        ('name', 'V15'), ('frame', '<u4'), ('position', '<f4', (3,)),
+        ('rotation', '<f4', (4,)), ('interpolation', 'u1', (64,))])
+    morph_dtype = np.dtype([
+        ('name', 'V15'), ('frame', '<u4'), ('weight', '<f4')])
+    camera_dtype = np.dtype([
+        ('frame', '<u4'), ('distance', '<f4'), ('position', '<f4', (3,)),
+        ('rotation', '<f4', (3,)), ('interpolation', 'u1', (24,)),
+        ('angle_of_view', '<u4'), ('perspective', 'u1')])
+    light_dtype = np.dtype([
+        ('frame', '<u4'), ('rgb', '<f4', (3,)), ('direction', '<f4', (3,))])
+    selfshadow_dtype = np.dtype([
+        ('frame', '<u4'), ('type', 'u1'), ('distance', '<f4')])
+    VMD_DTYPES = {
+        VMD_ELEMENTS[0]: bone_dtype,
+        VMD_ELEMENTS[1]: morph_dtype,
+        VMD_ELEMENTS[2]: camera_dtype,
+        VMD_ELEMENTS[3]: light_dtype,
+        VMD_ELEMENTS[4]: selfshadow_dtype,
+    }
+else:
+    VMD_DTYPES = {}
+
+
+def unpack_array(element, buf, offset=0, count=-1):
+    '''frames of the element -> structured array (no copy)
+    '''
+    return np.frombuffer(buf, VMD_DTYPES[element], count, offset)
+
+
+def pack_array(element, frames):
+    '''frames(namedtuples) of the element -> structured array
+    '''
+    pack = VMD_IO_UTIL[element][1]
+    return np.frombuffer(
+        b''.join([pack(frame) for frame in frames]), VMD_DTYPES[element])
+
+
+def array_to_frames(element, a):
+    '''structured array -> frames(namedtuples)
+    '''
+    struct_def, make = VMD_FIXED[element]
+    a = np.ascontiguousarray(a)
+    return [make(p) for p in struct_def.iter_unpack(a)]
+
+
+# raw records: undecoded frames, data is a memoryview of the record.
+# only name(bones, morphs) and frame are read, name of others is None.
+# name and frame are patched into the copy of data on output.
+raw_record = namedtuple('raw_record', 'name frame data')
+raw_name_def = struct.Struct('<15s1I')
+frame_def = struct.Struct('<1I')
+
+
+def unpack_raw_section(element, buf, offset, count):
+    '''count frames of the element in buf -> [raw_record]
+    '''
+    view = memoryview(buf)
+    named = element in ('bones', 'morphs')
+    fixed = VMD_FIXED.get(element)
+    frames = []
+    for index in range(count):
+        if named:
+            name, frame = raw_name_def.unpack_from(view, offset)
+        else:
+            name = None
+            frame = frame_def.unpack_from(view, offset)[0]
+        if fixed is not None:
+            size = fixed[0].size
+        else:  # showiks
+            ik_count = showik_def.unpack_from(view, offset)[2]
+            size = showik_def.size + ik_count * ikinfo_def.size
+        frames.append(raw_record(name, frame, view[offset:offset + size]))
+        offset += size
+    return frames
+
+
+def pack_raw(p):
+    buf = bytearray(p.data)
+    pack_raw_into(buf, 0, p)
+    return buf
+
+
+def pack_raw_into(buf, offset, p):
+    size = len(p.data)
+    buf[offset:offset + size] = p.data
+    if p.name is not None:
+        raw_name_def.pack_into(buf, offset, p.name, p.frame)
+    else:
+        frame_def.pack_into(buf, offset, p.frame)
+
+
+def decode_raw(element, p):
+    '''raw_record -> frame(namedtuple) of the element
+    '''
+    frame = VMD_IO_UTIL[element][2](p.data)
+    if p.name is not None:
+        return frame._replace(name=p.name, frame=p.frame)
+    return frame._replace(frame=p.frame)
+
+
+# compact records: __slots__ classes with the namedtuple like API
+# (_fields, _make, _replace, _asdict), position and rotation are
+# packed floats, interpolation is bytes.
+class compact_record:
+    __slots__ = ()
+    _fields = ()
+
+    @classmethod
+    def _make(cls, iterable):
+        return cls(*iterable)
+
+    def _replace(self, **kwargs):
+        result = object.__new__(type(self))
+        for slot in self.__slots__:
+            setattr(result, slot, getattr(self, slot))
+        for field, value in kwargs.items():
+            setattr(result, field, value)
+        return result
+
+    def _asdict(self):
+        return {field: getattr(self, field) for field in self._fields}
+
+    def __iter__(self):
+        return (getattr(self, field) for field in self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __getitem__(self, index):
+        return tuple(self)[index]
+
+    def __eq__(self, other):
+        if type(other) is type(self):
+            return all([
+                getattr(self, slot) == getattr(other, slot)
+                for slot in self.__slots__])
+        if len(other) != len(self):
+            return False
+        return all([  # with namedtuple, interpolation is a tuple
+            tuple(a) == tuple(b) if isinstance(a, bytes) and
+            not isinstance(b, bytes) else a == b
+            for a, b in zip(self, other)])
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):  # that of the equal namedtuple
+        return hash(tuple([
+            tuple(value) if field == 'interpolation' else value
+            for field, value in zip(self._fields, self)]))
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, ', '.join([
+            '{}={!r}'.format(field, getattr(self, field))
+            for field in self._fields]))
+
+
+bone_values_def = struct.Struct('<3f4f')
+
+
+class compact_bone(compact_record):
+    __slots__ = ('name', 'frame', '_values', '_interpolation')
+    _fields = bone._fields
+
+    def __init__(self, name, frame, position, rotation, interpolation):
+        self.name = name
+        self.frame = frame
+        self._values = bone_values_def.pack(*position, *rotation)
+        self.interpolation = interpolation
+
+    @property
+    def position(self):
+        return bone_values_def.unpack(self._values)[:3]
+
+    @position.setter
+    def position(self, value):
+        self._values = bone_values_def.pack(*value, *self.rotation)
+
+    @property
+    def rotation(self):
+        return bone_values_def.unpack(self._values)[3:]
+
+    @rotation.setter
+    def rotation(self, value):
+        self._values = bone_values_def.pack(*self.position, *value)
+
+    @property
+    def interpolation(self):
+        return self._interpolation
+
+    @interpolation.setter
+    def interpolation(self, value):
+        self._interpolation = bytes(value)
+
+    def pack_into(self, buf, offset):
+        raw_name_def.pack_into(buf, offset, self.name, self.frame)
+        offset += raw_name_def.size
+        buf[offset:offset + bone_values_def.size] = self._values
+        offset += bone_values_def.size
+        buf[offset:offset + 64] = self._interpolation
+
+
+def unpack_compact_bone(buf, offset=0):
+    p = object.__new__(compact_bone)
+    p.name, p.frame = raw_name_def.unpack_from(buf, offset)
+    offset += raw_name_def.size
+    p._values = bytes(buf[offset:offset + bone_values_def.size])
+    offset += bone_values_def.size
+    p._interpolation = bytes(buf[offset:offset + 64])
+    return p
+
+
+camera_values_def = struct.Struct('<3f3f')
+camera_head_def = struct.Struct('<1I1f')
+camera_tail_def = struct.Struct('<1I1B')
+
+
+class compact_camera(compact_record):
+    __slots__ = (
+        'frame', 'distance', '_values', '_interpolation',
+        'angle_of_view', 'perspective')
+    _fields = camera._fields
+
+    def __init__(self, frame, distance, position, rotation, interpolation,
+                 angle_of_view, perspective):
+        self.frame = frame
+        self.distance = distance
+        self._values = camera_values_def.pack(*position, *rotation)
+        self.interpolation = interpolation
+        self.angle_of_view = angle_of_view
+        self.perspective = perspective
+
+    @property
+    def position(self):
+        return camera_values_def.unpack(self._values)[:3]
+
+    @position.setter
+    def position(self, value):
+        self._values = camera_values_def.pack(*value, *self.rotation)
+
+    @property
+    def rotation(self):
+        return camera_values_def.unpack(self._values)[3:]
+
+    @rotation.setter
+    def rotation(self, value):
+        self._values = camera_values_def.pack(*self.position, *value)
+
+    @property
+    def interpolation(self):
+        return self._interpolation
+
+    @interpolation.setter
+    def interpolation(self, value):
+        self._interpolation = bytes(value)
+
+    def pack_into(self, buf, offset):
+        camera_head_def.pack_into(buf, offset, self.frame, self.distance)
+        offset += camera_head_def.size
+        buf[offset:offset + camera_values_def.size] = self._values
+        offset += camera_values_def.size
+        buf[offset:offset + 24] = self._interpolation
+        offset += 24
+        camera_tail_def.pack_into(
+            buf, offset, self.angle_of_view, self.perspective)
+
+
+def unpack_compact_camera(buf, offset=0):
+    p = object.__new__(compact_camera)
+    p.frame, p.distance = camera_head_def.unpack_from(buf, offset)
+    offset += camera_head_def.size
+    p._values = bytes(buf[offset:offset + camera_values_def.size])
+    offset += camera_values_def.size
+    p._interpolation = bytes(buf[offset:offset + 24])
+    offset += 24
+    p.angle_of_view, p.perspective = camera_tail_def.unpack_from(
+        buf, offset)
+    return p
+
+
+# elements which have compact records: (class, unpack)
+VMD_COMPACT = {
+    VMD_ELEMENTS[0]: (compact_bone, unpack_compact_bone),
+    VMD_ELEMENTS[2]: (compact_camera, unpack_compact_camera),
+}
+
+
+def to_compact(element, p):
+    '''frame(namedtuple) -> compact record
+    '''
+    return VMD_COMPACT[element][0]._make(p)
+
+
+def pack_frame_into(buf, offset, p):
+    '''pack raw_record or compact record
+    '''
+    if type(p) is raw_record:
+        pack_raw_into(buf, offset, p)
+    else:
+        p.pack_into(buf, offset)
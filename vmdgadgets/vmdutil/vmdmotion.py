@@ -51,34 +51,49 @@ CAMERA_FIELD = ['rotation', 'position', 'distance', 'angle_of_view']
 MORPH_FIELD = ['weight']
 LIGHT_FIELD = ['rgb', 'direction']
 NO_NAME = '12345678901234567890'  # motoin name must <= 15 bytes
+CURVE_ELEMENTS = {  # kinds of frames which have interpolation curves
+    vmddef.bone: 'bones', vmddef.compact_bone: 'bones',
+    vmddef.camera: 'cameras', vmddef.compact_camera: 'cameras'}
+CURVE_CHANNELS = {  # field: channels of its curves
+    'rotation': 3, 'position': [0, 1, 2], 'distance': 4, 'angle_of_view': 5}
 
 
 class VmdMotion():
-    def interpolate_morph(self, frame_no, begin, end):
+    def interpolate_morph(self, frame_no, begin, end, curves=None):
         t = (frame_no - begin.frame) / (end.frame - begin.frame)
         return vmdutil.lerp_v([begin.weight], [end.weight], t)[0]
 
-    def interpolate_light(self, frame_no, begin, end):
+    def interpolate_light(self, frame_no, begin, end, curves=None):
         t = (frame_no - begin.frame) / (end.frame - begin.frame)
         rgb = vmdutil.lerp_v(begin.rgb, end.rgb, t)
         direction = vmdutil.lerp_v(begin.direction, end.direction, t)
         return rgb, direction
 
-    def interpolate_bone(self, frame_no, begin, end):
+    def interpolate_bone(self, frame_no, begin, end, curves=None):
+        if curves is None:
+            curves = vmdutil.decode_curves(end, 'bones')
         return (  # rotation position
-            vmdutil.interpolate_rotation(frame_no, begin, end, 'bones'),
-            vmdutil.interpolate_position(frame_no, begin, end, 'bones'),
+            vmdutil.interpolate_rotation(
+                frame_no, begin, end, 'bones', curves),
+            vmdutil.interpolate_position(
+                frame_no, begin, end, 'bones', curves),
         )
 
-    def interpolate_camera(self, frame_no, begin, end):
+    def interpolate_camera(self, frame_no, begin, end, curves=None):
+        if curves is None:
+            curves = vmdutil.decode_curves(end, 'cameras')
         return (  # rotation, position, distance, angle of view
-            vmdutil.interpolate_rotation(frame_no, begin, end, 'cameras'),
-            vmdutil.interpolate_position(frame_no, begin, end, 'cameras'),
-            vmdutil.interpolate_camera_distance(frame_no, begin, end),
-            vmdutil.interpolate_camera_angle_of_view(frame_no, begin, end),
+            vmdutil.interpolate_rotation(
+                frame_no, begin, end, 'cameras', curves),
+            vmdutil.interpolate_position(
+                frame_no, begin, end, 'cameras', curves),
+            vmdutil.interpolate_camera_distance(
+                frame_no, begin, end, curves),
+            vmdutil.interpolate_camera_angle_of_view(
+                frame_no, begin, end, curves),
         )
 
-    def __init__(self, motion_defs):
+    def __init__(self, motion_defs, name_table=None):
         self.switchcase = {
             # (field_names, interpolation, default)
             vmddef.morph: (
@@ -96,8 +111,16 @@ class VmdMotion():
                 (vmddef.LIGHT_SAMPLE.rgb, vmddef.LIGHT_SAMPLE.direction)),
             None: (None, None, None)
         }
+        self.switchcase[vmddef.compact_bone] = self.switchcase[vmddef.bone]
+        self.switchcase[vmddef.compact_camera] = (
+            self.switchcase[vmddef.camera])
 
         self.motion_defs = motion_defs
+        self.track_curves = {}  # {name: curves}, see get_track_curves()
+        self.track_arrays = {}  # {name: arrays}, see get_track_arrays()
+        if name_table is None:
+            name_table = vmdutil.NameTable()
+        self.name_table = name_table
         if len(motion_defs) <= 0:
             self.motion_name_dict = {}
             self.motion_frame_dict = {}
@@ -107,7 +130,7 @@ class VmdMotion():
             self.kind = motion_defs[0].__class__
             if 'name' in motion_defs[0]._fields:
                 self.motion_name_dict = vmdutil.make_name_dict(
-                    vmdutil.frames_to_dict(motion_defs), True)
+                    vmdutil.frames_to_dict(motion_defs), True, name_table)
             else:
                 self.sorted_motions = sorted(
                     motion_defs, key=lambda e: e.frame)
@@ -138,6 +161,108 @@ class VmdMotion():
         else:
             return index - 1, False
 
+    def get_track_curves(self, name):
+        '''Return curves of keyframes in sorted_keyframes[name] as bytes,
+        (x1, y1, x2, y2) of each channel for each keyframe
+        (see vmdutil.pack_curves), or None if the motion has no curves.
+
+        Curves of a name are decoded when it is interpolated first.
+        Of keyframes on the same frame, the last one gives the curves.
+        '''
+        curves = self.track_curves.get(name)
+        if curves is None:
+            element = CURVE_ELEMENTS.get(self.kind)
+            if element is None:
+                return None
+            frame_dict = self.motion_frame_dict[name]
+            curves = vmdutil.pack_curves([
+                frame_dict[frame_no]
+                for frame_no in self.sorted_keyframes[name]], element)
+            self.track_curves[name] = curves
+        return curves
+
+    def get_track_arrays(self, name):
+        '''Return (keyframes (K,), curves (K, channels, 4), [values])
+        of the motion as numpy arrays, for bake().
+
+        Of keyframes on the same frame, the last one is used as in
+        get_vmd_transform().
+        '''
+        arrays = self.track_arrays.get(name)
+        if arrays is not None:
+            return arrays
+        np = vmddef.np
+        frame_dict = self.motion_frame_dict[name]
+        all_keys = np.array(self.sorted_keyframes[name])
+        keys = np.unique(all_keys)
+        motions = [frame_dict[frame_no] for frame_no in keys.tolist()]
+        curves = np.frombuffer(
+            self.get_track_curves(name), np.uint8).reshape(
+                len(all_keys), -1, 4)
+        arrays = (
+            keys,
+            curves[np.searchsorted(all_keys, keys)].astype(np.float64),
+            [np.array([getattr(motion, field) for motion in motions],
+                      np.float64)
+             for field in self.switchcase[self.kind][0]])
+        self.track_arrays[name] = arrays
+        return arrays
+
+    def bake(self, name=NO_NAME, start=0, stop=None, step=1):
+        '''Return transforms of frames in range(start, stop, step) as
+        numpy arrays, (rotations (N, 4), positions (N, 3)) for bones and
+        (rotations (N, 3), positions (N, 3), distances (N,),
+        angles_of_view (N,)) for cameras.
+
+        stop is the last keyframe + 1 by default. Values are those of
+        get_vmd_transform() with exact curves (see vmdutil.CurveCache).
+        '''
+        np = vmddef.np
+        if np is None:
+            raise ImportError('numpy is required to bake motions')
+        element = CURVE_ELEMENTS.get(self.kind)
+        if element is None:
+            raise ValueError('only bones and cameras can be baked')
+        fields = self.switchcase[self.kind][0]
+        keys = self.sorted_keyframes.get(name)
+        if stop is None:
+            stop = keys[-1] + 1 if keys else start + 1
+        frames = np.arange(start, stop, step)
+        if keys is None:
+            return tuple([
+                np.tile(np.asarray(default, np.float64), (len(frames), 1))
+                if isinstance(default, tuple) else
+                np.full(len(frames), default, np.float64)
+                for default in self.switchcase[self.kind][2]])
+
+        keys, curves, track = self.get_track_arrays(name)
+        begin = np.clip(
+            np.searchsorted(keys, frames, 'right') - 1, 0, len(keys) - 1)
+        end = np.minimum(begin + 1, len(keys) - 1)
+        span = keys[end] - keys[begin]
+        bx = (frames - keys[begin]) / np.where(span > 0, span, 1)
+        hold = np.flatnonzero((span <= 0) | (bx <= 0))  # not between keys
+        bx[hold] = 0.0
+        result = []
+        for field, values in zip(fields, track):
+            channel = CURVE_CHANNELS[field]
+            if isinstance(channel, list):  # a curve for each axis
+                by = vmdutil.interpolation_ratios(
+                    curves[:, channel][end], bx[:, None])
+            else:
+                by = vmdutil.interpolation_ratios(curves[end, channel], bx)
+            v1 = values[begin]
+            v2 = values[end]
+            if field == 'rotation' and element == 'bones':
+                v = vmdutil.slerp_q_array(v1, v2, by)
+            else:
+                if v1.ndim > by.ndim:
+                    by = by[:, None]
+                v = v1 + (v2 - v1) * by
+            v[hold] = v1.take(hold, 0)
+            result.append(v)
+        return tuple(result)
+
     def get_vmd_transform(self, frame_no, name=NO_NAME):
         def collect_fields(frame):
             d = frame._asdict()
@@ -161,8 +286,15 @@ class VmdMotion():
                 begin = frame_dict[key_frames[vmd_index]]
                 if vmd_index < len(key_frames) - 1:
                     end = frame_dict[key_frames[vmd_index + 1]]
+                    curves = self.get_track_curves(name)
+                    if curves is not None:  # (x1, y1, x2, y2) of channels
+                        size = len(curves) // len(key_frames)
+                        begin_curves = (vmd_index + 1) * size
+                        curves = [
+                            curves[i:i + 4] for i in range(
+                                begin_curves, begin_curves + size, 4)]
                     result = self.switchcase[self.kind][1](
-                        frame_no, begin, end)
+                        frame_no, begin, end, curves)
                 else:
                     result = collect_fields(begin)
         return result
@@ -176,7 +308,8 @@ class BoneTransformation():
     """
 
     def __init__(self, bone_defs, motion_defs,
-                 mandatory_bone_names=None, subgraph=False):
+                 mandatory_bone_names=None, subgraph=False,
+                 name_table=None, bone_name_to_index=None):
         """ Constructor
 
         If subgraph == False, bones to be transformed are
@@ -190,18 +323,25 @@ class BoneTransformation():
             mandatory_bone_names: [bone name],
                 by_default 'センター' is mandatory
             subgraph: boolean
+            name_table: vmdutil.NameTable, shared to decode names once
+            bone_name_to_index: {bone name: bone_index},
+                e.g. Pmxio.get_index_dict('bones'), built if None
         """
         self.bone_defs = bone_defs
         self.motion_defs = motion_defs
-        self.vmd_motion = VmdMotion(motion_defs)
+        self.vmd_motion = VmdMotion(motion_defs, name_table)
+        self.name_table = self.vmd_motion.name_table
         self.motion_name_dict = self.vmd_motion.motion_name_dict
-        self.motion_index_dict = vmdutil.make_index_dict(motion_defs, True)
+        self.motion_index_dict = vmdutil.make_index_dict(
+            motion_defs, True, self.name_table)
 
         self.mandatory_bone_names = (
             mandatory_bone_names[:]
             if mandatory_bone_names is not None else [])
 
-        self.bone_name_to_index = pmxutil.make_index_dict(self.bone_defs)
+        self.bone_name_to_index = (
+            bone_name_to_index if bone_name_to_index is not None else
+            pmxutil.make_index_dict(self.bone_defs))
         self.mandatory_bone_indexes = [
             self.bone_name_to_index[name]
             for name in self.mandatory_bone_names]
@@ -305,7 +445,7 @@ class BoneTransformation():
         rep = self.motion_defs[:]
         if len(frames) <= 0:
             return
-        bone_name = vmdutil.b_to_str(frames[0].name)
+        bone_name = self.name_table.to_str(frames[0].name)
         name_frames = self.motion_index_dict.get(bone_name)
         if name_frames:
             for frame in frames:
@@ -313,7 +453,7 @@ class BoneTransformation():
                 if index:
                     rep[index] = frame
         self.motion_defs = rep
-        self.vmd_motion = VmdMotion(self.motion_defs)
+        self.vmd_motion = VmdMotion(self.motion_defs, self.name_table)
         return
 
     def get_vmd_transform(self, frame_no, bone_index):
@@ -1,9 +1,15 @@
 '''utilites for handling vmd files and motions
 
 '''
+import os
 import math
+import mmap
 import bisect
+import struct
+import operator
+from itertools import chain
 from collections import defaultdict
+from collections import OrderedDict
 from collections import Iterable
 from functools import wraps
 from . import vmddef
@@ -12,6 +18,10 @@ from . import vmdbezier
 EPS = 1e-10
 NEJIRI_THRESHOLD = 1e-06
 QUATERNION_IDENTITY = (0, 0, 0, 1)
+CHUNK_SIZE = 1 << 20  # for streaming output
+CURVE_TABLE_SIZE = 1024
+CURVE_CACHE_SIZE = 1024
+EXACT_CURVES_ENV = 'VMDUTIL_EXACT_CURVES'  # set to solve curves every time
 
 
 def clamp(v, min_v, max_v):
@@ -26,25 +36,67 @@ class Vmdio:
         self.header = vmddef.header(
             vmddef.HEADER1, b'')
         self.counts = {}
-        self.frames = {}
+        self.frames = {}  # None: not decoded yet
+        self.arrays = {}  # structured arrays, see vmddef.VMD_DTYPES
+        self.name_table = NameTable()  # names of bones and morphs
+        self.compact = False  # decode to compact records
         for element in vmddef.VMD_ELEMENTS:
             self.counts[element] = vmddef.count(0)
             self.frames[element] = []
 
     def get_frames(self, element):
-        return self.frames[element]
+        frames = self.frames[element]
+        if frames is None:
+            if element in self.arrays:
+                frames = vmddef.array_to_frames(
+                    element, self.arrays[element])
+            else:
+                frames = self.decode_section(element)
+            self.frames[element] = frames
+            self.name_table.add_frames(frames)
+        return frames
 
     def set_frames(self, element, o):
         self.counts[element] = vmddef.count(len(o))
         self.frames[element] = o
-
-    def read_bytes(self):
+        self.arrays.pop(element, None)
+
+    def get_array(self, element):
+        '''Return frames of the fixed size element as a numpy
+        structured array. (see vmddef.VMD_DTYPES)
+        '''
+        a = self.arrays.get(element)
+        if a is None:
+            if self.frames[element] is None:  # not decoded, no copy
+                a = vmddef.unpack_array(
+                    element, self.buf, self.sections[element],
+                    self.counts[element].count)
+            else:
+                a = vmddef.pack_array(element, self.get_frames(element))
+            self.arrays[element] = a
+        return a
+
+    def get_table(self, element):
+        '''Return frames of the fixed size element as MotionTable.
+        '''
+        return MotionTable.from_vmd(self, element)
+
+    def set_table(self, element, table):
+        self.counts[element] = vmddef.count(len(table))
+        self.frames[element] = None
+        self.arrays[element] = table.to_array()
+
+    def index_sections(self):
+        '''Read the header and counts, and record the offset of
+        the first frame of each element in self.sections.
+        '''
         offset = 0
         filesize = len(self.buf)
+        self.sections = {}
         # header
         self.header = vmddef.unpack_header(self.buf, offset)
         offset += vmddef.header_def.size
-        # frames
+        # counts
         for element in vmddef.VMD_ELEMENTS:
             if filesize <= offset:
                 self.counts[element] = vmddef.count(0)
@@ -52,26 +104,115 @@ class Vmdio:
             self.counts[element] = vmddef.unpack_count(
                 self.buf, offset)
             offset += vmddef.count_def.size
-            io_util = vmddef.VMD_IO_UTIL[element]
-            for index in range(self.counts[element].count):
-                frame = io_util[2](self.buf, offset)
-                self.frames[element].append(frame)
-                offset += io_util[0](frame)
+            self.sections[element] = offset
+            if element in vmddef.VMD_FIXED:
+                offset += (self.counts[element].count *
+                           vmddef.VMD_FIXED[element][0].size)
+            # showiks(variable size) is the last element,
+            # no need to walk it.
+
+    def decode_section(self, element):
+        frames = []
+        offset = self.sections.get(element)
+        if offset is None:
+            return frames
+        frame_size, _, unpack, _ = vmddef.VMD_IO_UTIL[element]
+        if self.compact and element in vmddef.VMD_COMPACT:
+            unpack = vmddef.VMD_COMPACT[element][1]
+        for index in range(self.counts[element].count):
+            frame = unpack(self.buf, offset)
+            frames.append(frame)
+            offset += frame_size(frame)
+        return frames
 
-    def load(self, filename):
+    def read_bytes(
+            self, arrays=False, lazy=False, elements=None, raw=False,
+            compact=False):
+        if arrays and vmddef.np is None:
+            raise ImportError('numpy is required to read as arrays')
+        self.compact = compact
+        self.index_sections()
+        for element, offset in self.sections.items():
+            if elements is not None and element not in elements:
+                # skipped, kept as it is in self.buf
+                self.frames[element] = None
+            elif raw:
+                self.frames[element] = vmddef.unpack_raw_section(
+                    element, self.buf, offset, self.counts[element].count)
+            elif arrays and element in vmddef.VMD_DTYPES:
+                # namedtuples are made on demand in get_frames()
+                self.arrays[element] = vmddef.unpack_array(
+                    element, self.buf, offset, self.counts[element].count)
+                self.frames[element] = None
+            elif lazy:
+                self.frames[element] = None
+            else:
+                self.frames[element] = self.decode_section(element)
+            if self.frames[element] is not None:
+                self.name_table.add_frames(self.frames[element])
+
+    def load(
+            self, filename, arrays=False, lazy=False, elements=None,
+            raw=False, compact=False):
+        '''Load vmd file.
+
+        If arrays is True, fixed size elements are read into
+        numpy structured arrays, see get_array().
+        If lazy is True, the file is memory-mapped and each element is
+        decoded when get_frames() asks for it first. The file should not
+        be modified while frames are not decoded.
+        If elements is given, only those elements are decoded. Others
+        are decoded on demand, and written back as they are unless
+        get_frames() or set_frames() is called for them.
+        If raw is True, frames are vmddef.raw_record, which keeps
+        the record undecoded except for name and frame. They can be
+        selected, reordered or given new names or frame numbers by
+        _replace(), and are copied as they are otherwise on output.
+        (see vmddef.decode_raw)
+        If compact is True, bones and cameras are decoded to
+        vmddef.compact_bone/compact_camera, which take less memory than
+        namedtuples and have the same fields.
+        '''
         if len(self.counts.keys()) > 0:
             self.__init__()
         f = open(filename, 'rb')
-        self.buf = f.read()
+        if lazy:
+            self.buf = map_file(f)
+        else:
+            self.buf = f.read()
         f.close()
         del f
-        self.read_bytes()
-
-    def load_fd(self, reader):
+        self.read_bytes(arrays, lazy, elements, raw, compact)
+
+    def load_fd(
+            self, reader, arrays=False, lazy=False, elements=None,
+            raw=False, compact=False, stream=False):
+        '''Load vmd from reader.
+
+        If stream is True, frames are decoded while reading the stream
+        in chunks (see iter_sections), and the whole input is not held
+        at once, though all of its frames are. arrays, lazy and elements
+        are not used then. To keep memory bounded, take frames from
+        iter_sections() and write them by iter_section_bytes() instead.
+        '''
         if len(self.counts.keys()) > 0:
             self.__init__()
+        if stream:
+            self.read_stream(reader, raw, compact)
+            return
         self.buf = reader.read()
-        self.read_bytes()
+        self.read_bytes(arrays, lazy, elements, raw, compact)
+
+    def read_stream(self, reader, raw=False, compact=False):
+        self.buf = b''
+        self.sections = {}
+        self.compact = compact
+        sections = iter_sections(reader, raw=raw, compact=compact)
+        self.header = next(sections)
+        for element, count, frames in sections:
+            self.counts[element] = vmddef.count(count)
+            self.frames[element] = list(frames)
+            self.name_table.add_frames(self.frames[element])
 
     def copy(self):
         p = Vmdio()
@@ -80,22 +221,146 @@ class Vmdio:
         # frames
         for element in vmddef.VMD_ELEMENTS:
             p.counts[element] = self.counts[element]
-            p.frames[element] = self.frames[element].copy()
+            p.frames[element] = self.get_frames(element).copy()
+        p.name_table = self.name_table
         return p
 
+    def section_size(self, element):
+        '''Return byte size of frames of the element in self.buf.
+        '''
+        count = self.counts[element].count
+        if element in vmddef.VMD_FIXED:
+            return count * vmddef.VMD_FIXED[element][0].size
+        offset = self.sections[element]
+        size = 0
+        for index in range(count):  # showiks
+            ik_count = vmddef.showik_def.unpack_from(
+                self.buf, offset + size)[2]
+            size += (vmddef.showik_def.size +
+                     ik_count * vmddef.ikinfo_def.size)
+        return size
+
+    def get_raw_section(self, element):
+        '''Return frames of the element in self.buf (or self.arrays) as
+        memoryview, or None if they are decoded (may be modified).
+        '''
+        if self.frames[element] is not None:
+            return None
+        if element in self.arrays:
+            a = vmddef.np.ascontiguousarray(self.arrays[element])
+            return memoryview(a.view(vmddef.np.uint8).reshape(-1))
+        if element not in self.sections:
+            return None
+        offset = self.sections[element]
+        return memoryview(self.buf)[
+            offset:offset + self.section_size(element)]
+
+    def byte_size(self):
+        '''Return the exact size of the vmd file to be written.
+        '''
+        size = vmddef.header_def.size
+        for element in vmddef.VMD_ELEMENTS:
+            size += vmddef.count_def.size
+            frames = self.frames[element]
+            if frames is None:
+                size += self.section_size(element)
+            elif element in vmddef.VMD_FIXED:
+                size += len(frames) * vmddef.VMD_FIXED[element][0].size
+            else:
+                frame_size = vmddef.VMD_IO_UTIL[element][0]
+                size += sum([
+                    len(frame.data) if type(frame) is vmddef.raw_record
+                    else frame_size(frame) for frame in frames])
+        return size
+
     def to_bytes(self):
-        buf = bytearray()
+        buf = bytearray(self.byte_size())
+        offset = 0
         # header
-        buf += vmddef.pack_header(self.header)
+        vmddef.pack_header_into(buf, offset, self.header)
+        offset += vmddef.header_def.size
         # frames
         for element in vmddef.VMD_ELEMENTS:
-            io_util = vmddef.VMD_IO_UTIL[element]
-            count = vmddef.count(len(self.frames[element]))
-            buf += vmddef.pack_count(count)
-            for frame in self.frames[element]:
-                buf += io_util[1](frame)
+            raw = self.get_raw_section(element)
+            if raw is not None:  # not decoded, copy as it is
+                vmddef.pack_count_into(buf, offset, self.counts[element])
+                offset += vmddef.count_def.size
+                buf[offset:offset + len(raw)] = raw
+                offset += len(raw)
+                continue
+            frames = self.frames[element]
+            vmddef.pack_count_into(buf, offset, vmddef.count(len(frames)))
+            offset += vmddef.count_def.size
+            frame_size, _, _, pack_into = vmddef.VMD_IO_UTIL[element]
+            record = vmddef.VMD_RECORDS[element]
+            pack_frame_into = vmddef.pack_frame_into  # raw or compact
+            if element in vmddef.VMD_FIXED:
+                size = vmddef.VMD_FIXED[element][0].size
+                for frame in frames:
+                    if type(frame) is record:
+                        pack_into(buf, offset, frame)
+                    else:
+                        pack_frame_into(buf, offset, frame)
+                    offset += size
+            else:
+                for frame in frames:
+                    if type(frame) is record:
+                        pack_into(buf, offset, frame)
+                        offset += frame_size(frame)
+                    else:
+                        pack_frame_into(buf, offset, frame)
+                        offset += len(frame.data)
         return buf
 
+    def iter_bytes(self, chunk_size=CHUNK_SIZE):
+        '''Yield the vmd file in chunks of about chunk_size bytes.
+
+        Chunks may be views of one reused buffer, so consume each chunk
+        before taking the next one.
+        '''
+        chunk = bytearray(max(chunk_size, vmddef.header_def.size))
+        view = memoryview(chunk)
+        # header
+        vmddef.pack_header_into(chunk, 0, self.header)
+        offset = vmddef.header_def.size
+        # frames
+        for element in vmddef.VMD_ELEMENTS:
+            raw = self.get_raw_section(element)
+            frames = self.frames[element]
+            count = (
+                self.counts[element] if raw is not None else
+                vmddef.count(len(frames)))
+            if offset + vmddef.count_def.size > len(chunk):
+                yield view[:offset]
+                offset = 0
+            vmddef.pack_count_into(chunk, offset, count)
+            offset += vmddef.count_def.size
+            if raw is not None:  # not decoded, copy as it is
+                yield view[:offset]
+                offset = 0
+                for begin in range(0, len(raw), chunk_size):
+                    yield raw[begin:begin + chunk_size]
+                continue
+            frame_size, _, _, pack_into = vmddef.VMD_IO_UTIL[element]
+            record = vmddef.VMD_RECORDS[element]
+            for frame in frames:
+                size = (
+                    len(frame.data) if type(frame) is vmddef.raw_record
+                    else frame_size(frame))
+                if offset + size > len(chunk):
+                    yield view[:offset]
+                    offset = 0
+                    if size > len(chunk):
+                        chunk = bytearray(size)
+                        view = memoryview(chunk)
+                if type(frame) is record:
+                    pack_into(chunk, offset, frame)
+                else:  # raw or compact
+                    vmddef.pack_frame_into(chunk, offset, frame)
+                offset += size
+        if offset > 0:
+            yield view[:offset]
+
     def store(self, filename):
         buf = self.to_bytes()
         f = open(filename, 'wb')
@@ -103,15 +368,198 @@ class Vmdio:
         f.close()
 
     def store_fd(self, writer):
-        buf = self.to_bytes()
-        writer.write(buf)
+        for chunk in self.iter_bytes():
+            writer.write(chunk)
 
     def normalize(self):
         motion_dict = make_motion_dict(self)
         for element in vmddef.VMD_ELEMENTS:
             new_frames = normalize_frames(motion_dict[element])
-            self.counts[element] = vmddef.count(len(new_frames))
-            self.frames[element] = new_frames
+            self.set_frames(element, new_frames)
+
+
+def map_file(f):
+    '''read-only memory map of the whole file
+    '''
+    if os.fstat(f.fileno()).st_size <= 0:
+        return b''  # empty file can not be mapped
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class StreamBuffer:
+    '''Read a stream(file, pipe) in chunks and take bytes from it.
+    '''
+    def __init__(self, reader, chunk_size=CHUNK_SIZE):
+        # read1() returns what has arrived, without waiting for chunk_size
+        self.read_chunk = getattr(reader, 'read1', reader.read)
+        self.chunk_size = chunk_size
+        self.buf = bytearray()
+        self.pos = 0
+        self.offset = 0  # bytes taken from the stream
+
+    def available(self):
+        return len(self.buf) - self.pos
+
+    def fill(self, size):
+        '''Read until size bytes are available or the end of stream.
+        '''
+        while self.available() < size:
+            data = self.read_chunk(max(self.chunk_size, size))
+            if not data:
+                break
+            if self.pos > 0:
+                del self.buf[:self.pos]
+                self.pos = 0
+            self.buf += data
+        return self.available()
+
+    def read(self, size):
+        '''Return size bytes, or less at the end of stream.
+        '''
+        self.fill(size)
+        data = bytes(self.buf[self.pos:self.pos + size])
+        self.pos += len(data)
+        self.offset += len(data)
+        return data
+
+    def skip(self, size):
+        '''Skip size bytes, without holding them.
+        '''
+        n = min(self.available(), size)
+        self.pos += n
+        self.offset += n
+        size -= n
+        if size > 0:
+            self.buf = bytearray()
+            self.pos = 0
+        while size > 0:
+            data = self.read_chunk(min(self.chunk_size, size))
+            if not data:
+                raise struct.error('unexpected end of vmd stream')
+            self.offset += len(data)
+            size -= len(data)
+
+    def read_records(self, size, count):
+        '''Return (bytes, n) of 1 <= n <= count records, as many as
+        available.
+        '''
+        if self.fill(size) < size:
+            raise struct.error('unexpected end of vmd stream')
+        n = min(self.available() // size, count)
+        return self.read(n * size), n
+
+
+def iter_sections(
+        reader, elements=None, raw=False, compact=False,
+        chunk_size=CHUNK_SIZE):
+    '''Parse vmd from reader(e.g. sys.stdin.buffer) incrementally.
+
+    Yield the header first, then (element, count, frames) of each
+    section, where frames is an iterator which decodes frames as bytes
+    arrive. Consume frames before the next section, or the rest of them
+    are skipped. Sections of elements not in elements, and frames left
+    in a section, are skipped without decoding them. Reading stops
+    after the last of elements.
+    raw and compact are same as Vmdio.load().
+    '''
+    stream = StreamBuffer(reader, chunk_size)
+    yield vmddef.unpack_header(stream.read(vmddef.header_def.size))
+    remaining = set(vmddef.VMD_ELEMENTS if elements is None else elements)
+    for element in vmddef.VMD_ELEMENTS:
+        if len(remaining) <= 0:
+            return
+        b = stream.read(vmddef.count_def.size)
+        if len(b) < vmddef.count_def.size:  # end of file
+            return
+        count = vmddef.unpack_count(b).count
+        start = stream.offset
+        frames = iter_section_frames(stream, element, count, raw, compact)
+        if element in remaining:
+            remaining.discard(element)
+            yield element, count, frames
+        if element not in vmddef.VMD_FIXED:
+            return  # showiks, the last section
+        frames.close()  # skip the rest by its size
+        size = vmddef.VMD_FIXED[element][0].size
+        stream.skip(start + count * size - stream.offset)
+
+
+def iter_section_frames(stream, element, count, raw=False, compact=False):
+    if element not in vmddef.VMD_FIXED:  # showiks
+        for index in range(count):
+            head = stream.read(vmddef.showik_def.size)
+            ik_count = vmddef.showik_def.unpack(head)[2]
+            data = head + stream.read(ik_count * vmddef.ikinfo_def.size)
+            if raw:
+                yield vmddef.unpack_raw_section(element, data, 0, 1)[0]
+            else:
+                yield vmddef.unpack_showik(data)
+        return
+    struct_def, make = vmddef.VMD_FIXED[element]
+    size = struct_def.size
+    if compact and element in vmddef.VMD_COMPACT:
+        unpack = vmddef.VMD_COMPACT[element][1]
+    else:
+        unpack = None
+    while count > 0:
+        data, n = stream.read_records(size, count)
+        count -= n
+        if raw:
+            yield from vmddef.unpack_raw_section(element, data, 0, n)
+        elif unpack is not None:
+            for index in range(n):
+                yield unpack(data, index * size)
+        else:
+            for p in struct_def.iter_unpack(data):
+                yield make(p)
+
+
+def iter_frames(reader, element, raw=False, compact=False,
+                chunk_size=CHUNK_SIZE):
+    '''Yield frames of the element in the vmd stream as they are read.
+    '''
+    sections = iter_sections(reader, (element,), raw, compact, chunk_size)
+    next(sections)  # header
+    for element, count, frames in sections:
+        yield from frames
+
+
+def iter_section_bytes(element, count, frames, chunk_size=CHUNK_SIZE):
+    '''Yield count and frames of the element in vmd format, in chunks
+    of about chunk_size bytes, packing frames as they are taken from
+    the iterator. frames should yield count frames.
+
+    Chunks may be views of one reused buffer, so consume each chunk
+    before taking the next one.
+    '''
+    chunk = bytearray(max(chunk_size, vmddef.count_def.size))
+    view = memoryview(chunk)
+    vmddef.pack_count_into(chunk, 0, vmddef.count(count))
+    offset = vmddef.count_def.size
+    frame_size, _, _, pack_into = vmddef.VMD_IO_UTIL[element]
+    record = vmddef.VMD_RECORDS[element]
+    n = 0
+    for frame in frames:
+        size = (
+            len(frame.data) if type(frame) is vmddef.raw_record
+            else frame_size(frame))
+        if offset + size > len(chunk):
+            yield view[:offset]
+            offset = 0
+            if size > len(chunk):
+                chunk = bytearray(size)
+                view = memoryview(chunk)
+        if type(frame) is record:
+            pack_into(chunk, offset, frame)
+        else:  # raw or compact
+            vmddef.pack_frame_into(chunk, offset, frame)
+        offset += size
+        n += 1
+    if offset > 0:
+        yield view[:offset]
+    if n != count:
+        raise ValueError('{} frames of {} for count {}'.format(
+            n, element, count))
 
 
 def frames_to_dict(frames):
@@ -150,20 +598,24 @@ def remove_redundant_frames(frames):
         return frames
 
 
-def make_name_dict(frame_dict, decode=False):
+def make_name_dict(frame_dict, decode=False, name_table=None):
+    if decode and name_table is None:
+        name_table = NameTable()
     frame_nos = sorted(frame_dict.keys())
     name_dict = defaultdict(list)
     for frame_no in frame_nos:
         for frame in frame_dict[frame_no]:
-            name = frame.name if not decode else b_to_str(frame.name)
+            name = frame.name if not decode else name_table.to_str(frame.name)
             name_dict[name].append(frame)
     return name_dict
 
 
-def make_index_dict(frames, decode=False):
+def make_index_dict(frames, decode=False, name_table=None):
+    if decode and name_table is None:
+        name_table = NameTable()
     result = dict()
     for index, frame in enumerate(frames):
-        name = frame.name if not decode else b_to_str(frame.name)
+        name = frame.name if not decode else name_table.to_str(frame.name)
         d = result.get(name)
         if d is None:
             result[name] = dict()
@@ -199,6 +651,171 @@ def b_to_str(b):
         return b[:-1].decode(vmddef.ENCODING)
 
 
+class NameTable:
+    '''Interned names(bytes) of bones and morphs.
+
+    Each distinct name gets a small integer id in order of appearance,
+    and is decoded to str only once.
+    '''
+    def __init__(self, frames=()):
+        self.ids = {}  # {name: id}
+        self.names = []  # [name]
+        self.strs = []  # [decoded name]
+        self.add_frames(frames)
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name):
+        '''Return id of the name, add it if new.
+        '''
+        name_id = self.ids.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            self.ids[name] = name_id
+            self.names.append(name)
+            self.strs.append(b_to_str(name))
+        return name_id
+
+    def add_frames(self, frames):
+        if len(frames) <= 0 or getattr(frames[0], 'name', None) is None:
+            return  # no name elements
+        ids = self.ids
+        for frame in frames:
+            if frame.name not in ids:
+                self.intern(frame.name)
+
+    def name_ids(self, frames):
+        '''Return [id] of names of frames.
+        '''
+        return [self.intern(frame.name) for frame in frames]
+
+    def get_name(self, name_id):
+        return self.names[name_id]
+
+    def get_str(self, name_id):
+        return self.strs[name_id]
+
+    def to_str(self, name):
+        '''Same as b_to_str(name), decoded only once.
+        '''
+        name_id = self.ids.get(name)
+        if name_id is None:
+            name_id = self.intern(name)
+        return self.strs[name_id]
+
+
+class MotionTable:
+    '''Frames of one fixed size element as columns.
+
+    Columns are fields of a numpy structured array in the vmd layout,
+    (see vmddef.VMD_DTYPES) e.g. table['position'] is (N, 3) float32,
+    table['interpolation'] of bones is (N, 64) uint8.
+    They are views, so writing to them changes the table.
+    Tables read from files are read-only, copy() them to modify.
+    Names of bones and morphs are also given as ids of name_table.
+    '''
+    def __init__(self, element, array, name_table=None):
+        if vmddef.np is None:
+            raise ImportError('numpy is required for MotionTable')
+        self.element = element
+        self.array = array
+        self.name_table = (
+            name_table if name_table is not None else NameTable())
+        self._name_ids = None
+
+    @classmethod
+    def from_bytes(cls, element, buf, offset=0, count=-1, name_table=None):
+        '''frames in the vmd layout -> MotionTable (no copy)
+        '''
+        return cls(
+            element, vmddef.unpack_array(element, buf, offset, count),
+            name_table)
+
+    @classmethod
+    def from_frames(cls, element, frames, name_table=None):
+        '''[namedtuple] -> MotionTable
+        '''
+        return cls(
+            element, vmddef.pack_array(element, frames), name_table)
+
+    @classmethod
+    def from_vmd(cls, vmd, element):
+        return cls(element, vmd.get_array(element), vmd.name_table)
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, field):
+        return self.array[field]
+
+    def __setitem__(self, field, value):
+        self.array[field] = value
+
+    @property
+    def fields(self):
+        return self.array.dtype.names
+
+    @property
+    def name_ids(self):
+        '''ids of names in name_table as int array
+        '''
+        if self._name_ids is None:
+            names = self.array['name'].tolist()  # [bytes]
+            for name in dict.fromkeys(names):
+                self.name_table.intern(name)
+            ids = self.name_table.ids
+            self._name_ids = vmddef.np.array(
+                [ids[name] for name in names], dtype=vmddef.np.int32)
+        return self._name_ids
+
+    def set_name_ids(self, name_ids):
+        np = vmddef.np
+        names = np.frombuffer(b''.join([
+            name.ljust(15, b'\0')[:15] for name in self.name_table.names]),
+            'V15')
+        name_ids = np.asarray(name_ids)
+        self.array['name'] = names[name_ids]
+        self._name_ids = name_ids
+
+    def take(self, indices):
+        '''Return new table of the rows. indices may be a bool mask.
+        '''
+        table = MotionTable(
+            self.element, self.array[indices], self.name_table)
+        if self._name_ids is not None:
+            table._name_ids = self._name_ids[indices]
+        return table
+
+    def sort(self):
+        '''Return new table sorted by name and frame.
+        '''
+        np = vmddef.np
+        if 'name' in self.fields:
+            order = np.lexsort((self.array['frame'], self.name_ids))
+        else:
+            order = np.argsort(self.array['frame'], kind='stable')
+        return self.take(order)
+
+    def copy(self):
+        table = MotionTable(self.element, self.array.copy(), self.name_table)
+        table._name_ids = self._name_ids
+        return table
+
+    def to_array(self):
+        '''structured array in the vmd layout (no copy)
+        '''
+        return self.array
+
+    def to_bytes(self):
+        return vmddef.np.ascontiguousarray(self.array).tobytes()
+
+    def to_frames(self):
+        '''MotionTable -> [namedtuple]
+        '''
+        return vmddef.array_to_frames(self.element, self.array)
+
+
 def str_to_b(s, maxlen=15):
     b = s.encode(vmddef.ENCODING)
     length = len(b)
@@ -248,27 +865,154 @@ def interpolation_is_linear(cp):
     return cp[0] == cp[1] and cp[2] == cp[3]
 
 
-def interpolate_position(frame_no, begin, end, element='bones'):
+def interpolation_ratio(cp, bx):
+    '''Return y at x = bx of the interpolation curve,
+    cp: [x1, y1, x2, y2] in 0..127
+    '''
+    if interpolation_is_linear(cp):
+        return bx
+    t = vmdbezier.bezier3f_x2t([0.0, cp[0] / 127.0, cp[2] / 127.0, 1.0], bx)
+    return vmdbezier.bezier3f([0.0, cp[1] / 127.0, cp[3] / 127.0, 1.0], t)
+
+
+def interpolation_ratios(cp, bx):
+    '''interpolation_ratio for numpy arrays, cp: (..., 4), bx: (...)
+    '''
+    np = vmdbezier.np
+    cp = np.asarray(cp)
+    bx = np.asarray(bx, np.float64)
+    shape = np.broadcast(cp[..., 0], bx).shape
+    by = np.array(np.broadcast_to(bx, shape)).ravel()
+    curved = np.flatnonzero(np.broadcast_to(
+        (cp[..., 0] != cp[..., 1]) | (cp[..., 2] != cp[..., 3]), shape))
+    if len(curved) == 0:
+        return by.reshape(shape)
+    cp = np.broadcast_to(cp, shape + (4,)).reshape(-1, 4)
+    cp = cp.take(curved, 0).astype(np.float64) / 127.0
+    zeros = np.zeros(len(cp))
+    ones = np.ones(len(cp))
+    xcp = np.stack([zeros, cp[:, 0], cp[:, 2], ones], -1)
+    ycp = np.stack([zeros, cp[:, 1], cp[:, 3], ones], -1)
+    by[curved] = vmdbezier.bezier3f_array(
+        ycp, vmdbezier.bezier3f_x2t_array(xcp, by.take(curved)))
+    return by.reshape(shape)
+
+
+class CurveCache:
+    '''LRU cache of sampled interpolation curves.
+
+    A curve (x1, y1, x2, y2 in 0..127) is sampled at table_size + 1
+    points of uniform t, and y at x is interpolated linearly between
+    the samples around x. The error is within 2e-5 of the curve.
+    bezier3f_x2t stops within EPS of x, so its y can be further off
+    where the curve is steep, e.g. (127, 0, 0, 127). The samples are taken by numpy if it is
+    available, with the same values as without it. If exact is True, y is solved by
+    interpolation_ratio every time, e.g. for regression checks.
+    '''
+    def __init__(self, max_size=CURVE_CACHE_SIZE,
+                 table_size=CURVE_TABLE_SIZE, exact=False):
+        self.max_size = max_size
+        self.table_size = table_size
+        self.exact = exact
+        self.ts = [i / table_size for i in range(table_size + 1)]
+        if vmdbezier.np is not None:
+            self.ts = vmdbezier.np.array(self.ts)
+        self.hits = 0
+        self.misses = 0
+        self.tables = OrderedDict()
+
+    def get_table(self, cp):
+        '''Return ([x], [y]) sampled on the curve cp, a tuple.
+        '''
+        table = self.tables.get(cp)
+        if table is not None:
+            self.hits += 1
+            self.tables.move_to_end(cp)
+            return table
+        self.misses += 1
+        table = tuple([vmdbezier.bezier3f_samples(
+            [0.0, p1 / 127.0, p2 / 127.0, 1.0], self.ts)
+            for p1, p2 in ((cp[0], cp[2]), (cp[1], cp[3]))])
+        if vmdbezier.np is not None:
+            table = tuple([samples.tolist() for samples in table])
+        self.tables[cp] = table
+        if len(self.tables) > self.max_size:
+            self.tables.popitem(last=False)
+        return table
+
+    def ratio(self, cp, bx):
+        '''interpolation_ratio looked up in the table of cp.
+        cp may be None for a linear curve, see decode_curves().
+        '''
+        if cp is None or interpolation_is_linear(cp):
+            return bx
+        if self.exact:
+            return interpolation_ratio(cp, bx)
+        xs, ys = self.get_table(tuple(cp))
+        i = min(max(bisect.bisect_right(xs, bx) - 1, 0), self.table_size - 1)
+        x0 = xs[i]
+        y0 = ys[i]
+        width = xs[i + 1] - x0
+        if width <= 0:
+            return y0
+        return y0 + (ys[i + 1] - y0) * (bx - x0) / width
+
+    def clear(self):
+        self.tables.clear()
+
+
+curve_cache = CurveCache(  # used by interpolate_*
+    exact=bool(os.environ.get(EXACT_CURVES_ENV)))
+
+
+def decode_curves(frame, element='bones'):
+    '''Return the interpolation of the frame as curves of channels,
+    ((x1, y1, x2, y2) or None if linear, ...), X, Y, Z, R for bones,
+    and X, Y, Z, R, D, V for cameras.
+    '''
     if element == 'bones':
-        cp = vmddef.bone_vmdformat_to_controlpoints(end.interpolation)
+        cp = vmddef.bone_vmdformat_to_controlpoints(frame.interpolation)
     elif element == 'cameras':
-        cp = vmddef.camera_vmdformat_to_controlpoints(end.interpolation)
+        cp = vmddef.camera_vmdformat_to_controlpoints(frame.interpolation)
     else:
         return None
-    cpi = [[p[axis] for p in cp] for axis in range(len(cp[0]))]
+    return tuple([
+        None if c1x == c1y and c2x == c2y else (c1x, c1y, c2x, c2y)
+        for c1x, c1y, c2x, c2y in zip(*cp)])
+
+
+# indexes of (x1, y1, x2, y2) of each channel in interpolation,
+# channels are in the order of decode_curves()
+CURVE_INDEXES = {
+    'bones': tuple([
+        16 * channel + i for channel in range(4) for i in (0, 4, 8, 12)]),
+    'cameras': tuple([
+        4 * channel + i for channel in range(6) for i in (0, 2, 1, 3)]),
+}
+
+
+def pack_curves(frames, element='bones'):
+    '''Return curves of frames as bytes, (x1, y1, x2, y2) of each
+    channel of decode_curves() for each frame, linear ones included.
+    '''
+    take = operator.itemgetter(*CURVE_INDEXES[element])
+    return bytes(chain.from_iterable(
+        [take(frame.interpolation) for frame in frames]))
+
+
+def interpolate_position(
+        frame_no, begin, end, element='bones', curves=None):
+    if curves is None:
+        curves = decode_curves(end, element)
+        if curves is None:
+            return None
     bx = (frame_no - begin.frame) / (end.frame - begin.frame)
     result = []
     for axis in range(3):  # X, Y, Z
         begin_pos = begin.position[axis]
         end_pos = end.position[axis]
         pos_delta = end_pos - begin_pos
-        if interpolation_is_linear(cpi[axis]) is True:
-            by = bx
-        else:
-            xcp = [0.0, cpi[axis][0] / 127.0, cpi[axis][2] / 127.0, 1.0]
-            t = vmdbezier.bezier3f_x2t(xcp, bx)
-            ycp = [0.0, cpi[axis][1] / 127.0, cpi[axis][3] / 127.0, 1.0]
-            by = vmdbezier.bezier3f(ycp, t)
+        by = curve_cache.ratio(curves[axis], bx)
         result.append(begin_pos + pos_delta * by)
     return result
 
@@ -392,6 +1136,29 @@ def normalize_v(v):
         return v
 
 
+# numpy versions of the above for arrays of vectors, (..., n).
+# Sums are taken in the same order, to give the same values.
+
+def dot_v_array(v1, v2):
+    result = v1[..., 0] * v2[..., 0]
+    for i in range(1, v1.shape[-1]):
+        result = result + v1[..., i] * v2[..., i]
+    return result
+
+
+def cross_v3_array(v1, v2):
+    np = vmddef.np
+    return np.stack([
+        v1[..., i - 1] * v2[..., i] - v1[..., i] * v2[..., i - 1]
+        for i in (2, 0, 1)], -1)
+
+
+def normalize_v_array(v):
+    np = vmddef.np
+    n = np.sqrt(dot_v_array(v, v))[..., None]
+    return np.where(n > EPS, v / np.maximum(n, EPS), v)
+
+
 def bool2sign(b):
     return 1 if b else -1
 
@@ -520,6 +1287,31 @@ def multiply_quaternion(b, a):
     return vr + [wr]
 
 
+def conjugate_q_array(q):
+    return q * (-1.0, -1.0, -1.0, 1.0)
+
+
+def inverse_q_array(q):
+    np = vmddef.np
+    return conjugate_q_array(q) * (1 / np.sqrt(dot_v_array(q, q)))[..., None]
+
+
+def multiply_quaternion_array(b, a):
+    '''multiply_quaternion for numpy arrays of quaternions, (..., 4)
+    '''
+    np = vmddef.np
+    wa = a[..., 3:]
+    wb = b[..., 3:]
+    va = a[..., :3]
+    vb = b[..., :3]
+    wr = wa * wb - dot_v_array(va, vb)[..., None]
+    vr = vb * wa + va * wb + cross_v3_array(va, vb)
+    shape = np.broadcast(vr[..., 0], wr[..., 0]).shape
+    return np.concatenate([
+        np.broadcast_to(vr, shape + (3,)),
+        np.broadcast_to(wr, shape + (1,))], -1)
+
+
 def mirror_quaternion(rotation, plane='yz'):
     if 'yz' == plane:
         return [-rotation[0], rotation[1], rotation[2], -rotation[3]]
@@ -545,6 +1337,19 @@ def diff_q(q1, q2):
     return multiply_quaternion(q1, inverse_q(q2))
 
 
+def rotate_v3q_array(v, q):
+    '''rotate_v3q for numpy arrays, v: (..., 3), q: (..., 4)
+    '''
+    np = vmddef.np
+    v = np.concatenate([v, np.zeros(v.shape[:-1] + (1,))], -1)
+    return multiply_quaternion_array(
+        multiply_quaternion_array(conjugate_q_array(q), v), q)[..., :3]
+
+
+def diff_q_array(q1, q2):
+    return multiply_quaternion_array(q1, inverse_q_array(q2))
+
+
 def quaternion_to_matrix(q):
     i, j, k, w = q
     return [
@@ -622,67 +1427,76 @@ def slerp_q(q1, q2, t):
         return lerp_v(q1, qx, t)
 
 
+def slerp_q_array(q1, q2, t):
+    '''slerp_q for numpy arrays, q1, q2: (..., 4), t: (...)
+    '''
+    np = vmddef.np
+    q1, q2 = np.broadcast_arrays(
+        np.asarray(q1, np.float64), np.asarray(q2, np.float64))
+    shape = q1.shape
+    q1 = q1.reshape(-1, 4)
+    q2 = q2.reshape(-1, 4)
+    t = np.broadcast_to(np.asarray(t, np.float64), shape[:-1]).reshape(-1, 1)
+    dot = dot_v_array(q1, q2)
+    qx = q2 * (1.0 - 2.0 * (dot < 0))[:, None]
+    dot = np.abs(dot)
+    angle = np.arccos(np.minimum(dot, 1.0))[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        q = normalize_v_array((
+            q1 * np.sin(angle * (1 - t)) + qx * np.sin(angle * t)) * (
+            1 / np.sin(angle)))
+    near = np.flatnonzero(dot >= 0.995)  # lerp
+    q1n = q1.take(near, 0)
+    q[near] = q1n + (qx.take(near, 0) - q1n) * t.take(near, 0)
+    return q.reshape(shape)
+
+
 def scale_q(q, t):
     return slerp_q(QUATERNION_IDENTITY, q, t)
 
 
-def interpolate_rotation(frame_no, begin, end, element='bones'):
-    if element == 'bones':
-        cp = vmddef.bone_vmdformat_to_controlpoints(end.interpolation)
-    elif element == 'cameras':
-        cp = vmddef.camera_vmdformat_to_controlpoints(end.interpolation)
-    else:
-        return None
-    cpi = [[p[axis] for p in cp] for axis in range(len(cp[0]))]
-    bx = (frame_no - begin.frame) / (end.frame - begin.frame)
+def scale_q_array(q, t):
+    return slerp_q_array(QUATERNION_IDENTITY, q, t)
 
-    if interpolation_is_linear(cpi[3]):
-        by = bx
-    else:
-        xcp = [0.0, cpi[3][0] / 127.0, cpi[3][2] / 127.0, 1.0]
-        t = vmdbezier.bezier3f_x2t(xcp, bx)
-        ycp = [0.0, cpi[3][1] / 127.0, cpi[3][3] / 127.0, 1.0]
-        by = vmdbezier.bezier3f(ycp, t)
+
+def interpolate_rotation(
+        frame_no, begin, end, element='bones', curves=None):
+    if curves is None:
+        curves = decode_curves(end, element)
+        if curves is None:
+            return None
+    bx = (frame_no - begin.frame) / (end.frame - begin.frame)
+    by = curve_cache.ratio(curves[3], bx)
     if 'bones' == element:
         return slerp_q(begin.rotation, end.rotation, by)
     else:
         return lerp_v(begin.rotation, end.rotation, by)
 
 
-def interpolate_camera_distance(frame_no, begin, end):
-    cp = vmddef.camera_vmdformat_to_controlpoints(end.interpolation)
-    cpi = [[p[axis] for p in cp] for axis in range(len(cp[0]))]
+def interpolate_camera_distance(frame_no, begin, end, curves=None):
+    if curves is None:
+        curves = decode_curves(end, 'cameras')
     bx = (frame_no - begin.frame) / (end.frame - begin.frame)
-    if interpolation_is_linear(cpi[4]):
-        by = bx
-    else:
-        xcp = [0.0, cpi[4][0] / 127.0, cpi[4][2] / 127.0, 1.0]
-        t = vmdbezier.bezier3f_x2t(xcp, bx)
-        ycp = [0.0, cpi[4][1] / 127.0, cpi[4][3] / 127.0, 1.0]
-        by = vmdbezier.bezier3f(ycp, t)
+    by = curve_cache.ratio(curves[4], bx)
     return lerp_v([begin.distance], [end.distance], by)[0]
 
 
-def interpolate_camera_angle_of_view(frame_no, begin, end):
-    cp = vmddef.camera_vmdformat_to_controlpoints(end.interpolation)
-    cpi = [[p[axis] for p in cp] for axis in range(len(cp[0]))]
+def interpolate_camera_angle_of_view(frame_no, begin, end, curves=None):
+    if curves is None:
+        curves = decode_curves(end, 'cameras')
     bx = (frame_no - begin.frame) / (end.frame - begin.frame)
-    if interpolation_is_linear(cpi[5]):
-        by = bx
-    else:
-        xcp = [0.0, cpi[5][0] / 127.0, cpi[5][2] / 127.0, 1.0]
-        t = vmdbezier.bezier3f_x2t(xcp, bx)
-        ycp = [0.0, cpi[5][1] / 127.0, cpi[5][3] / 127.0, 1.0]
-        by = vmdbezier.bezier3f(ycp, t)
+    by = curve_cache.ratio(curves[5], bx)
     return lerp_v([begin.angle_of_view], [end.angle_of_view], by)[0]
 
 
-def mirror_frame(frame, plane='yz'):
+def mirror_frame(frame, plane='yz', name_table=None):
     if 'yz' == plane:
         pos = (-frame.position[0], frame.position[1], frame.position[2])
         if 'name' in frame._fields:
             rotation = tuple(mirror_quaternion(frame.rotation, plane))
-            new_name = b_to_str(frame.name)
+            new_name = (
+                b_to_str(frame.name) if name_table is None else
+                name_table.to_str(frame.name))
             if new_name[0] == vmddef.RIGHT:
                 new_name = vmddef.LEFT + new_name[1:]
             elif new_name[0] == vmddef.LEFT: